@@ -0,0 +1,52 @@
+"""Cost of encoding microphone audio into input_audio_buffer.append frames, before and after the fast path.
+
+"model" is the previous path: base64 to str, InputAudioBufferAppendMessage, model_dump_json and the
+utf-8 encode done by send_str. "template" is AudioAppendEncoder as used by send_audio_append.
+
+Usage: uv run python -m benchmarks.audio_append [--seconds 600] [--chunk 2048]
+"""
+
+import argparse
+import base64
+import os
+import time
+
+from rtclient.codec import AudioAppendEncoder
+from rtclient.models import InputAudioBufferAppendMessage
+
+SAMPLE_RATE = 24000
+SAMPLE_WIDTH = 2
+
+
+def encode_with_model(pcm: bytes) -> bytes:
+    message = InputAudioBufferAppendMessage(audio=base64.b64encode(pcm).decode("utf-8"))
+    return message.model_dump_json(exclude_none=True).encode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=600, help="Seconds of audio to encode")
+    parser.add_argument("--chunk", type=int, default=2048, help="Frames per append")
+    args = parser.parse_args()
+
+    chunk = os.urandom(args.chunk * SAMPLE_WIDTH)
+    chunks = int(args.seconds * SAMPLE_RATE / args.chunk)
+    encoder = AudioAppendEncoder()
+    assert bytes(encoder.encode(chunk)) == encode_with_model(chunk)
+
+    print(f"{'path':<10}{'audio MB/s':>12}{'frame MB/s':>12}{'CPU ms per audio s':>20}")
+    for name, encode in (("model", encode_with_model), ("template", encoder.encode)):
+        frame_bytes = 0
+        start = time.process_time()
+        for _ in range(chunks):
+            frame_bytes += len(encode(chunk))
+        elapsed = time.process_time() - start
+        audio_bytes = chunks * len(chunk)
+        print(
+            f"{name:<10}{audio_bytes / elapsed / 1e6:>12.1f}{frame_bytes / elapsed / 1e6:>12.1f}"
+            f"{elapsed / args.seconds * 1e3:>20.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
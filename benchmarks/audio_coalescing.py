@@ -0,0 +1,101 @@
+"""Sweep capture frame size and coalescing budget for microphone audio sent to the local mock Realtime server.
+
+Capture is simulated in real time: --seconds of speech (a tone) followed by silence until the
+response starts. Each configuration reports messages/sec, CPU ms per second of audio (client and
+server share the process) and the end-of-speech latency: the time from the end of speech (halfway
+through the last captured speech frame) until the first response.audio.delta arrives. That includes
+the server VAD's silence_duration_ms (SILENCE_MS) which is the same for every configuration.
+
+Usage: uv run python -m benchmarks.audio_coalescing [--seconds 3]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from rtclient import RTLowLevelClient
+from rtclient.util.audio_coalescer import AudioCoalescer
+from rtclient.util.mock_server import MockRealtimeServer, silence, tone
+
+SAMPLE_RATE = 24000
+SAMPLE_WIDTH = 2
+SILENCE_MS = 200
+CAPTURE_FRAMES = (240, 480, 960, 2048)
+# (flush_interval_ms, flush_bytes), (0, 0) sends every captured frame as is
+BUDGETS = ((0, 0), (20, 4096), (40, 4096), (100, 16384))
+
+
+async def stream_speech(
+    client: RTLowLevelClient, capture_frames: int, budget: tuple[int, int], seconds: float, responded: asyncio.Event
+) -> float:
+    """Stream speech and then silence in real time until the response starts, returns the loop time at which speech ended."""
+    loop = asyncio.get_running_loop()
+    coalescer = AudioCoalescer(*budget, clock=loop.time)
+    frame_duration = capture_frames / SAMPLE_RATE
+    frame_ms = capture_frames * 1000 // SAMPLE_RATE
+    speech, quiet = tone(frame_ms), silence(frame_ms)
+    speech_frames = max(1, int(seconds / frame_duration))
+
+    captured = 0
+    speech_end = 0.0
+    next_frame_at = loop.time() + frame_duration
+    while not responded.is_set():
+        due_in = coalescer.time_until_flush()
+        if due_in is not None and loop.time() + due_in < next_frame_at:
+            await asyncio.sleep(due_in)
+            audio = coalescer.flush()
+        else:
+            await asyncio.sleep(max(0.0, next_frame_at - loop.time()))
+            next_frame_at += frame_duration
+            captured += 1
+            audio = coalescer.add(speech if captured <= speech_frames else quiet)
+            if captured == speech_frames:
+                speech_end = next_frame_at - frame_duration * 1.5
+        if audio is not None:
+            await client.send_audio_append(audio)
+    return speech_end
+
+
+async def first_audio(client: RTLowLevelClient, responded: asyncio.Event) -> float:
+    loop = asyncio.get_running_loop()
+    async for message in client:
+        if message.type == "response.audio.delta":
+            responded.set()
+            return loop.time()
+    raise RuntimeError("Connection closed before the response started")
+
+
+async def run(capture_frames: int, budget: tuple[int, int], seconds: float) -> tuple[float, float, float]:
+    async with MockRealtimeServer(speed=0) as server:
+        async with RTLowLevelClient(url=server.url) as client:
+            await client.send(
+                {"type": "session.update", "session": {"turn_detection": {"type": "server_vad", "silence_duration_ms": SILENCE_MS}}}
+            )
+            responded = asyncio.Event()
+            cpu_start = time.process_time()
+            started = time.perf_counter()
+            speech_end, first_audio_at = await asyncio.gather(
+                stream_speech(client, capture_frames, budget, seconds, responded), first_audio(client, responded)
+            )
+            cpu = time.process_time() - cpu_start
+            elapsed = time.perf_counter() - started
+        appends = server.received["input_audio_buffer.append"]
+    return appends / elapsed, cpu / elapsed * 1e3, (first_audio_at - speech_end) * 1e3
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=3)
+    args = parser.parse_args()
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+    print(f"{'capture':>8}{'flush ms':>10}{'flush B':>9}{'msg/s':>8}{'CPU ms/s':>10}{'first audio ms':>16}")
+    for capture_frames in CAPTURE_FRAMES:
+        for budget in BUDGETS:
+            rate, cpu, latency = await run(capture_frames, budget, args.seconds)
+            print(f"{capture_frames:>8}{budget[0]:>10}{budget[1]:>9}{rate:>8.1f}{cpu:>10.2f}{latency:>16.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,95 @@
+"""Decode cost of the audio of a long response, from base64 deltas to playback frames.
+
+"b64decode" is what realtime.py does with each delta: base64.b64decode it and slice the bytes
+into OUTPUT_CHUNK_SIZE frames, which copies every frame. "memoryview" and "int16" iterate
+RTOutputItem.audio and slice the views it yields. Playback frames are held until the end of the
+response, as they would be in a playback queue that is filled faster than it is played. Reported
+are the time per delta, the blocks allocated per delta and the peak traced memory. Views save the
+copies but not memory: every frame is a view object of its own, which is more blocks than a
+bytes frame, and it keeps the whole decoded delta alive.
+
+Usage: uv run python -m benchmarks.audio_decode [--seconds 600] [--delta-ms 100]
+"""
+
+import argparse
+import asyncio
+import base64
+import time
+import tracemalloc
+
+from benchmarks.events import audio_payload
+from rtclient import AudioDeltaRecord, RTOutputItem
+
+OUTPUT_CHUNK_SIZE = 2048
+
+
+def response_messages(seconds: float, delta_ms: int) -> list:
+    delta = audio_payload(delta_ms)
+    deltas = int(seconds * 1000 / delta_ms)
+    return [AudioDeltaRecord("event_Bench", "resp_Bench", "item_Bench", 0, 0, delta) for _ in range(deltas)]
+
+
+def output_item(messages: list) -> RTOutputItem:
+    pending = iter(messages)
+
+    async def receive():
+        return next(pending, None)
+
+    return RTOutputItem("item_Bench", "resp_Bench", None, receive)
+
+
+async def b64decode(messages: list) -> list:
+    frames = []
+    async for chunk in output_item(messages):
+        pcm = base64.b64decode(chunk.data)
+        frames.extend(pcm[i : i + OUTPUT_CHUNK_SIZE] for i in range(0, len(pcm), OUTPUT_CHUNK_SIZE))
+    return frames
+
+
+async def memoryview_frames(messages: list) -> list:
+    frames = []
+    async for pcm in output_item(messages).audio():
+        frames.extend(pcm[i : i + OUTPUT_CHUNK_SIZE] for i in range(0, len(pcm), OUTPUT_CHUNK_SIZE))
+    return frames
+
+
+async def int16_frames(messages: list) -> list:
+    samples = OUTPUT_CHUNK_SIZE // 2
+    frames = []
+    async for pcm in output_item(messages).audio("int16"):
+        frames.extend(pcm[i : i + samples] for i in range(0, len(pcm), samples))
+    return frames
+
+
+VARIANTS = {"b64decode": b64decode, "memoryview": memoryview_frames, "int16": int16_frames}
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=600)
+    parser.add_argument("--delta-ms", type=int, default=100)
+    args = parser.parse_args()
+
+    messages = response_messages(args.seconds, args.delta_ms)
+    print(f"{len(messages)} deltas, {args.seconds:.0f}s of audio")
+    print(f"{'variant':<12}{'us/delta':>10}{'blocks/delta':>14}{'peak MB':>10}")
+    for name, variant in VARIANTS.items():
+        start = time.perf_counter()
+        frames = await variant(messages)
+        elapsed = time.perf_counter() - start
+        del frames
+
+        tracemalloc.start()
+        before_blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+        frames = await variant(messages)
+        _, peak = tracemalloc.get_traced_memory()
+        after_blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+        tracemalloc.stop()
+        del frames
+
+        blocks = (after_blocks - before_blocks) / len(messages)
+        print(f"{name:<12}{elapsed / len(messages) * 1e6:>10.2f}{blocks:>14.1f}{peak / 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,63 @@
+"""Throughput of each installed JSON codec over a session-like mix of realtime events.
+
+Decoding covers the server frames in benchmarks.events.SESSION_MIX, encoding covers the
+client events realtime.py sends (audio appends as models, tool outputs and response.create as dicts).
+
+Usage: uv run python -m benchmarks.codecs [--turns 20] [--repeat 5]
+"""
+
+import argparse
+import time
+
+from benchmarks.events import audio_payload, session_mix_frames
+from rtclient.codec import _CODEC_CLASSES, JSONCodec, get_codec
+from rtclient.models import InputAudioBufferAppendMessage
+
+
+def installed_codecs() -> list[JSONCodec]:
+    codecs = []
+    for name in _CODEC_CLASSES:
+        try:
+            codecs.append(get_codec(name))
+        except ImportError:
+            print(f"{name}: not installed, skipped")
+    return codecs
+
+
+def best_of(repeat: int, fn) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    frames = session_mix_frames(args.turns)
+    frame_bytes = sum(len(frame) for frame in frames)
+    appends = [InputAudioBufferAppendMessage(audio=audio_payload(85)) for _ in range(len(frames) // 4)]
+    dicts = [
+        {"type": "conversation.item.create", "item": {"type": "function_call_output", "call_id": "call_x", "output": '{"sum": 3.0}'}},
+        {"type": "response.create"},
+    ] * (len(frames) // 8)
+
+    codecs = installed_codecs()
+    print(f"{'codec':<10}{'decode ev/s':>14}{'decode MB/s':>14}{'encode model/s':>16}{'encode dict/s':>15}")
+    for codec in codecs:
+        decode = best_of(args.repeat, lambda: [codec.loads(frame) for frame in frames])
+        encode_models = best_of(args.repeat, lambda: [codec.dumps_model(message) for message in appends])
+        encode_dicts = best_of(args.repeat, lambda: [codec.dumps(data) for data in dicts])
+        print(
+            f"{codec.name:<10}{len(frames) / decode:>14,.0f}{frame_bytes / decode / 1e6:>14,.1f}"
+            f"{len(appends) / encode_models:>16,.0f}{len(dicts) / encode_dicts:>15,.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Per-turn latency and input tokens of a long voice session against the local mock Realtime server, with and without a context budget.
+
+Every turn commits --user-ms of speech and asks for a response of --assistant-ms of audio. The mock
+reports the input tokens of the conversation on response.done and takes --prefill-ms-per-1k longer
+to start a response per thousand of them, so without trimming both grow with every turn. Latency
+is the time from generate_response (which includes trimming) until the first audio delta.
+
+Usage: uv run python -m benchmarks.context_trimming [--turns 40] [--max-tokens 2000]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from typing import Optional
+
+from rtclient import ContextBudget, NoTurnDetection, RTClient, RTResponse, summarize_transcript
+from rtclient.util.mock_server import MockRealtimeServer, MockResponse, tone
+
+
+async def run(args: argparse.Namespace, budget: Optional[ContextBudget]) -> tuple[list[tuple[int, float]], RTClient]:
+    script = [MockResponse(audio_ms=args.assistant_ms, latency_ms=args.latency_ms)]
+    speech = tone(args.user_ms)
+    turns = []
+    async with MockRealtimeServer(script, speed=0, prefill_ms_per_1k_tokens=args.prefill_ms_per_1k) as server:
+        async with RTClient(url=server.url, budget=budget) as client:
+            await client.configure(turn_detection=NoTurnDetection())
+            items = client.items()
+            for _ in range(args.turns):
+                await client.send_audio(speech)
+                await client.commit_audio()
+                started = time.perf_counter()
+                await client.generate_response()
+                response = await anext(items)
+                while not isinstance(response, RTResponse):
+                    response = await anext(items)
+                latency = 0.0
+                async for item in response:
+                    async for _ in item.audio():
+                        latency = latency or time.perf_counter() - started
+                turns.append((response.usage.input_tokens, latency * 1e3))
+    return turns, client
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=40)
+    parser.add_argument("--user-ms", type=int, default=3000)
+    parser.add_argument("--assistant-ms", type=int, default=5000)
+    parser.add_argument("--max-tokens", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=50, help="Time to first output of an empty conversation")
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=100, help="Added time to first output per 1k input tokens")
+    args = parser.parse_args()
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+    untrimmed, _ = await run(args, None)
+    budget = ContextBudget(max_tokens=args.max_tokens, summarize=summarize_transcript)
+    trimmed, client = await run(args, budget)
+
+    print(f"{'turn':>5}{'input tokens':>14}{'latency ms':>12}{'trimmed tokens':>16}{'latency ms':>12}")
+    for turn, ((tokens, latency), (trimmed_tokens, trimmed_latency)) in enumerate(zip(untrimmed, trimmed), 1):
+        if turn == 1 or turn % 5 == 0:
+            print(f"{turn:>5}{tokens:>14}{latency:>12.1f}{trimmed_tokens:>16}{trimmed_latency:>12.1f}")
+    for name, turns in (("untrimmed", untrimmed), ("trimmed", trimmed)):
+        tokens = sum(tokens for tokens, _ in turns)
+        latency = sum(latency for _, latency in turns) / len(turns)
+        print(f"{name}: {tokens} input tokens in total, {latency:.1f} ms mean latency")
+    metrics = client.trim_metrics
+    print(f"{metrics.trims} trims deleted {metrics.deleted_items} items ({metrics.deleted_tokens} tokens), {metrics.summaries} summaries")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,44 @@
+"""Events/sec of create_server_message_from_dict in strict and trusted decode mode, per message type.
+
+Usage: uv run python -m benchmarks.decode_modes [--seconds 0.5]
+"""
+
+import argparse
+import json
+import time
+
+from benchmarks.events import sample_events
+from rtclient.models import DecodeMode, create_server_message_from_dict
+
+MODES: tuple[DecodeMode, ...] = ("strict", "trusted")
+
+
+def events_per_second(frame: str, mode: DecodeMode, seconds: float) -> float:
+    count = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while True:
+        for _ in range(100):
+            message = create_server_message_from_dict(json.loads(frame), mode)
+        count += 100
+        now = time.perf_counter()
+        if now >= deadline:
+            break
+    assert message is not None
+    return count / (now - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=0.5, help="Time spent per type and mode")
+    args = parser.parse_args()
+
+    print(f"{'type':<52}{'strict ev/s':>14}{'trusted ev/s':>14}{'speedup':>10}")
+    for event_type, event in sample_events().items():
+        frame = json.dumps(event)
+        strict, trusted = (events_per_second(frame, mode, args.seconds) for mode in MODES)
+        print(f"{event_type:<52}{strict:>14,.0f}{trusted:>14,.0f}{trusted / strict:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
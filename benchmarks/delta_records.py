@@ -0,0 +1,64 @@
+"""Per-event decode time and allocations for the streaming delta events in each decode mode.
+
+Usage: uv run python -m benchmarks.delta_records [--events 20000]
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+from benchmarks.events import sample_events
+from rtclient.models import DecodeMode, create_server_message_from_dict
+
+DELTA_TYPES = (
+    "response.audio.delta",
+    "response.audio_transcript.delta",
+    "response.text.delta",
+    "response.function_call_arguments.delta",
+)
+MODES: tuple[DecodeMode, ...] = ("strict", "trusted", "fast")
+
+
+def decode_time_us(frame: str, mode: DecodeMode, events: int) -> float:
+    start = time.perf_counter()
+    for _ in range(events):
+        create_server_message_from_dict(json.loads(frame), mode)
+    return (time.perf_counter() - start) / events * 1e6
+
+
+def allocations(frame: str, mode: DecodeMode, events: int) -> tuple[float, float]:
+    """Blocks allocated per decode and bytes retained per event while holding all decoded events.
+
+    The frame is decoded up front so that only the message construction is measured.
+    """
+    decoded = [json.loads(frame) for _ in range(events)]
+    tracemalloc.start()
+    before_blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    before_bytes, _ = tracemalloc.get_traced_memory()
+    messages = [create_server_message_from_dict(data, mode) for data in decoded]
+    del decoded
+    after_bytes, _ = tracemalloc.get_traced_memory()
+    after_blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    tracemalloc.stop()
+    assert all(message is not None for message in messages)
+    return (after_blocks - before_blocks) / events, (after_bytes - before_bytes) / events
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=20000)
+    args = parser.parse_args()
+
+    events = sample_events()
+    print(f"{'type':<42}{'mode':<9}{'decode us':>11}{'blocks/ev':>11}{'bytes/ev':>10}")
+    for event_type in DELTA_TYPES:
+        frame = json.dumps(events[event_type])
+        for mode in MODES:
+            us = decode_time_us(frame, mode, args.events)
+            blocks, retained = allocations(frame, mode, args.events)
+            print(f"{event_type:<42}{mode:<9}{us:>11.2f}{blocks:>11.1f}{retained:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
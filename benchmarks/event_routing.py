@@ -0,0 +1,207 @@
+"""Per-event routing cost and latency of RTClient against the previous layered queue design.
+
+"layered" replicates the routing RTClient used to do: every item event went through the client's
+message queue, its item queue keyed by response, and the response's own two queues, with a
+membership scan of a list of event types at every hop. "router" is RTClient, which routes every
+event once through rtclient.router. Both consumers iterate every input item, response, output item
+and content chunk of a synthetic session (see benchmarks.message_queue_soak). Latency is the time
+from the receive delegate returning a response.audio.delta to the consumer having its chunk.
+
+Usage: uv run python -m benchmarks.event_routing [--turns 2000]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from collections import deque
+from typing import Optional
+
+from benchmarks.message_queue_soak import turn_events
+from rtclient import RTClient, RTInputItem, RTResponse, create_server_message_from_dict
+from rtclient.util.message_queue import MessageQueue
+
+_CLIENT_ITEM_TYPES = [
+    "response.done",
+    "response.output_item.added",
+    "input_audio_buffer.speech_stopped",
+    "input_audio_buffer.committed",
+    "conversation.item.created",
+    "conversation.item.truncated",
+    "conversation.item.deleted",
+    "conversation.item.input_audio_transcription.completed",
+    "conversation.item.input_audio_transcription.failed",
+    "response.output_item.done",
+    "response.content_part.added",
+    "response.content_part.done",
+    "response.audio_transcript.delta",
+    "response.audio_transcript.done",
+    "response.audio.delta",
+    "response.audio.done",
+    "response.function_call_arguments.delta",
+    "response.function_call_arguments.done",
+    "response.mcp_call_arguments.delta",
+    "response.mcp_call_arguments.done",
+    "mcp_list_tools.in_progress",
+    "mcp_list_tools.completed",
+    "mcp_list_tools.failed",
+    "response.mcp_call.in_progress",
+    "response.mcp_call.completed",
+    "response.text.delta",
+    "response.text.done",
+]
+_RESPONSE_ITEM_TYPES = _CLIENT_ITEM_TYPES[5:6] + _CLIENT_ITEM_TYPES[4:7] + _CLIENT_ITEM_TYPES[9:]
+
+
+class LayeredClient:
+    """The routing of the stacked MessageQueue design, reduced to what the consumer needs."""
+
+    def __init__(self, receive):
+        self._receive = receive
+        self._message_queue = MessageQueue(receive, self._message_id)
+        self._item_queue = MessageQueue(lambda: self._message_queue.receive("ITEM"), self._item_id)
+        self._response_map: dict[str, str] = {}
+
+    def _message_id(self, message) -> Optional[str]:
+        if message.type in ["session.created", "input_audio_buffer.cleared", "rate_limits.updated", "error"]:
+            return "SESSION"
+        elif message.type in ["input_audio_buffer.speech_started", "response.created"]:
+            return "SESSION-ITEM"
+        elif message.type in _CLIENT_ITEM_TYPES:
+            return "ITEM"
+        return None
+
+    def _item_id(self, message) -> Optional[str]:
+        match message.type:
+            case "response.done":
+                return message.response.id
+            case "response.output_item.added":
+                self._response_map[message.item.id] = message.response_id
+                return message.response_id
+            case "input_audio_buffer.speech_stopped" | "input_audio_buffer.committed":
+                return message.item_id
+            case "conversation.item.created":
+                return self._response_map.get(message.item.id, message.item.id)
+            case "conversation.item.input_audio_transcription.completed" | "conversation.item.input_audio_transcription.failed":
+                return message.item_id
+            case "response.output_item.done":
+                self._response_map.pop(message.item.id, None)
+                return message.response_id
+            case _:
+                return getattr(message, "response_id", None)
+
+    async def consume(self, on_audio):
+        while True:
+            message = await self._message_queue.receive("SESSION-ITEM")
+            if message is None:
+                return
+            if message.type == "input_audio_buffer.speech_started":
+                item_id = message.item_id
+                while True:
+                    item_message = await self._item_queue.receive(item_id)
+                    if item_message is None or item_message.type == "conversation.item.input_audio_transcription.completed":
+                        break
+            else:
+                await self._consume_response(message.response.id, on_audio)
+
+    async def _consume_response(self, response_id: str, on_audio):
+        def response_class(message):
+            if message.type in ["response.done", "response.output_item.added"]:
+                return "RESPONSE"
+            return "ITEM" if message.type in _RESPONSE_ITEM_TYPES + ["conversation.item.created"] else None
+
+        def item_id(message):
+            if message.type in ["conversation.item.created", "response.output_item.done"]:
+                return message.item.id
+            return message.item_id
+
+        response_queue = MessageQueue(lambda: self._item_queue.receive(response_id), response_class)
+        item_queue = MessageQueue(lambda: response_queue.receive("ITEM"), item_id)
+        while True:
+            message = await response_queue.receive("RESPONSE")
+            if message is None or message.type == "response.done":
+                return
+            output_item_id = message.item.id
+            while True:
+                item_message = await item_queue.receive(output_item_id)
+                if item_message is None or item_message.type == "response.output_item.done":
+                    break
+                if item_message.type == "response.audio.delta":
+                    on_audio()
+
+
+class FakeSession:
+    """Stands in for RTLowLevelClient, hands out decoded events and notes when audio deltas left."""
+
+    def __init__(self, events: list):
+        self._events = deque(events)
+        self.audio_sent_at: deque[float] = deque()
+        self.closed = False
+
+    async def recv(self):
+        if not self._events:
+            self.closed = True
+            return None
+        message = self._events.popleft()
+        if message.type == "response.audio.delta":
+            self.audio_sent_at.append(time.perf_counter())
+        return message
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        message = await self.recv()
+        if message is None:
+            raise StopAsyncIteration
+        return message
+
+
+async def run_layered(events: list) -> tuple[float, list[float]]:
+    session = FakeSession(events)
+    latencies: list[float] = []
+    client = LayeredClient(session.recv)
+    start = time.perf_counter()
+    await client.consume(lambda: latencies.append(time.perf_counter() - session.audio_sent_at.popleft()))
+    return time.perf_counter() - start, latencies
+
+
+async def run_router(events: list) -> tuple[float, list[float]]:
+    session = FakeSession(events)
+    latencies: list[float] = []
+    client = RTClient()
+    await client._client._session.close()
+    client._client = session
+    start = time.perf_counter()
+    async for item in client.items():
+        if isinstance(item, RTInputItem):
+            await item
+        elif isinstance(item, RTResponse):
+            async for output_item in item:
+                async for chunk in output_item:
+                    if chunk.type == "audio":
+                        latencies.append(time.perf_counter() - session.audio_sent_at.popleft())
+    return time.perf_counter() - start, latencies
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=2000)
+    args = parser.parse_args()
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+    data = [event for turn in range(args.turns) for event in turn_events(turn)]
+    print(f"{len(data)} events")
+    print(f"{'design':<10}{'us/event':>10}{'audio p50 us':>14}{'audio p99 us':>14}")
+    for name, run in (("layered", run_layered), ("router", run_router)):
+        events = [create_server_message_from_dict(dict(event), "trusted") for event in data]
+        elapsed, latencies = await run(events)
+        assert len(latencies) == sum(event["type"] == "response.audio.delta" for event in data)
+        p50 = statistics.median(latencies)
+        p99 = statistics.quantiles(latencies, n=100)[98]
+        print(f"{name:<10}{elapsed / len(events) * 1e6:>10.2f}{p50 * 1e6:>14.1f}{p99 * 1e6:>14.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
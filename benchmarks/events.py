@@ -0,0 +1,220 @@
+"""Synthetic server events shaped like a recorded realtime session, shared by the benchmarks."""
+
+import base64
+import json
+import os
+
+SAMPLE_RATE = 24000
+AUDIO_DELTA_MS = 100
+
+EVENT_ID = "event_BenchX4kZ9aQ2mN7pL1"
+SESSION_ID = "sess_BenchX4kZ9aQ2mN7pL1"
+RESPONSE_ID = "resp_BenchX4kZ9aQ2mN7pL1"
+ITEM_ID = "item_BenchX4kZ9aQ2mN7pL1"
+PREVIOUS_ITEM_ID = "item_BenchPrev9aQ2mN7pL1"
+CALL_ID = "call_BenchX4kZ9aQ2mN7"
+
+
+def audio_payload(ms: int = AUDIO_DELTA_MS) -> str:
+    """Base64 pcm16 mono audio of the given duration at 24kHz."""
+    return base64.b64encode(os.urandom(SAMPLE_RATE * 2 * ms // 1000)).decode("utf-8")
+
+
+def _delta_fields() -> dict:
+    return {
+        "event_id": EVENT_ID,
+        "response_id": RESPONSE_ID,
+        "item_id": ITEM_ID,
+        "output_index": 0,
+        "content_index": 0,
+    }
+
+
+def response_payload(status: str = "in_progress", output_items: int = 0) -> dict:
+    output = [
+        {
+            "id": f"item_BenchOut{i:06d}",
+            "object": "realtime.item",
+            "type": "message",
+            "status": "completed",
+            "role": "assistant",
+            "content": [{"type": "audio", "transcript": "Sure, here is the answer to your question. " * 4}],
+        }
+        for i in range(output_items)
+    ]
+    return {
+        "object": "realtime.response",
+        "id": RESPONSE_ID,
+        "status": status,
+        "status_details": None,
+        "output": output,
+        "conversation_id": "conv_BenchX4kZ9aQ2mN7pL1",
+        "usage": None
+        if status == "in_progress"
+        else {
+            "total_tokens": 1234,
+            "input_tokens": 1000,
+            "output_tokens": 234,
+            "input_token_details": {
+                "text_tokens": 400,
+                "audio_tokens": 600,
+                "image_tokens": 0,
+                "cached_tokens": 128,
+                "cached_tokens_details": {"text_tokens": 128, "audio_tokens": 0, "image_tokens": 0},
+            },
+            "output_token_details": {"text_tokens": 34, "audio_tokens": 200},
+        },
+    }
+
+
+def session_payload() -> dict:
+    return {
+        "id": SESSION_ID,
+        "object": "realtime.session",
+        "model": "gpt-realtime",
+        "modalities": ["audio", "text"],
+        "instructions": "You are a helpful developer assistant",
+        "voice": "marin",
+        "input_audio_format": "pcm16",
+        "output_audio_format": "pcm16",
+        "input_audio_transcription": {"model": "whisper-1"},
+        "turn_detection": {
+            "type": "server_vad",
+            "threshold": 0.5,
+            "prefix_padding_ms": 200,
+            "silence_duration_ms": 200,
+        },
+        "tools": [
+            {
+                "type": "function",
+                "name": f"tool_{i}",
+                "description": "A benchmark tool definition",
+                "parameters": {"type": "object", "properties": {"path": {"type": "string"}}, "required": []},
+            }
+            for i in range(8)
+        ],
+        "tool_choice": "auto",
+        "temperature": 0.8,
+        "max_response_output_tokens": "inf",
+    }
+
+
+def sample_events() -> dict[str, dict]:
+    """One representative event for every server message type that the client models."""
+    audio_item = {
+        "id": ITEM_ID,
+        "object": "realtime.item",
+        "type": "message",
+        "status": "in_progress",
+        "role": "assistant",
+        "content": [],
+    }
+    return {
+        "session.created": {"type": "session.created", "event_id": EVENT_ID, "session": session_payload()},
+        "input_audio_buffer.speech_started": {
+            "type": "input_audio_buffer.speech_started",
+            "event_id": EVENT_ID,
+            "audio_start_ms": 1200,
+            "item_id": ITEM_ID,
+        },
+        "input_audio_buffer.speech_stopped": {
+            "type": "input_audio_buffer.speech_stopped",
+            "event_id": EVENT_ID,
+            "audio_end_ms": 3400,
+            "item_id": ITEM_ID,
+        },
+        "input_audio_buffer.committed": {
+            "type": "input_audio_buffer.committed",
+            "event_id": EVENT_ID,
+            "previous_item_id": PREVIOUS_ITEM_ID,
+            "item_id": ITEM_ID,
+        },
+        "conversation.item.created": {
+            "type": "conversation.item.created",
+            "event_id": EVENT_ID,
+            "previous_item_id": PREVIOUS_ITEM_ID,
+            "item": audio_item,
+        },
+        "conversation.item.input_audio_transcription.delta": {
+            "type": "conversation.item.input_audio_transcription.delta",
+            "event_id": EVENT_ID,
+            "item_id": ITEM_ID,
+            "content_index": 0,
+            "delta": "What time",
+        },
+        "response.created": {"type": "response.created", "event_id": EVENT_ID, "response": response_payload()},
+        "response.output_item.added": {
+            "type": "response.output_item.added",
+            "event_id": EVENT_ID,
+            "response_id": RESPONSE_ID,
+            "output_index": 0,
+            "item": audio_item,
+        },
+        "response.content_part.added": {
+            "type": "response.content_part.added",
+            "event_id": EVENT_ID,
+            "response_id": RESPONSE_ID,
+            "item_id": ITEM_ID,
+            "output_index": 0,
+            "content_index": 0,
+            "part": {"type": "audio", "transcript": ""},
+        },
+        "response.audio.delta": {"type": "response.audio.delta", **_delta_fields(), "delta": audio_payload()},
+        "response.audio_transcript.delta": {
+            "type": "response.audio_transcript.delta",
+            **_delta_fields(),
+            "delta": "Sure",
+        },
+        "response.text.delta": {"type": "response.text.delta", **_delta_fields(), "delta": "Sure"},
+        "response.function_call_arguments.delta": {
+            "type": "response.function_call_arguments.delta",
+            "event_id": EVENT_ID,
+            "response_id": RESPONSE_ID,
+            "item_id": ITEM_ID,
+            "output_index": 0,
+            "call_id": CALL_ID,
+            "delta": '{"timez',
+        },
+        "response.audio.done": {"type": "response.audio.done", **_delta_fields()},
+        "response.done": {
+            "type": "response.done",
+            "event_id": EVENT_ID,
+            "response": response_payload("completed", output_items=1),
+        },
+        "rate_limits.updated": {
+            "type": "rate_limits.updated",
+            "event_id": EVENT_ID,
+            "rate_limits": [
+                {"name": "requests", "limit": 5000, "remaining": 4999, "reset_seconds": 0.012},
+                {"name": "tokens", "limit": 400000, "remaining": 398766, "reset_seconds": 0.184},
+            ],
+        },
+    }
+
+
+# Relative frequency of each event type in a typical voice turn with a short assistant answer.
+SESSION_MIX: dict[str, int] = {
+    "input_audio_buffer.speech_started": 1,
+    "input_audio_buffer.speech_stopped": 1,
+    "input_audio_buffer.committed": 1,
+    "conversation.item.created": 2,
+    "conversation.item.input_audio_transcription.delta": 6,
+    "response.created": 1,
+    "response.output_item.added": 1,
+    "response.content_part.added": 1,
+    "response.audio.delta": 60,
+    "response.audio_transcript.delta": 40,
+    "response.audio.done": 1,
+    "response.done": 1,
+    "rate_limits.updated": 1,
+}
+
+
+def session_mix_frames(turns: int = 1) -> list[str]:
+    """Encoded text frames following SESSION_MIX, repeated for the given number of turns."""
+    events = sample_events()
+    frames: list[str] = []
+    for _ in range(turns):
+        for event_type, count in SESSION_MIX.items():
+            frames.extend([json.dumps(events[event_type])] * count)
+    return frames
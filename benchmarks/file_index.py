@@ -0,0 +1,123 @@
+"""list_files latency with a fresh os.walk per call against queries of a FileIndex.
+
+Builds a synthetic tree of --files empty files, --files-per-dir per directory spread over
+nested directories with a mix of extensions and some hidden directories, in a temporary
+directory. The walk is the previous list_files, which visits the whole tree when a filter
+matches fewer than max_results files. The index is scanned once, then every query is
+answered from memory; a refresh after touching a few directories shows what keeping it
+current costs.
+
+Usage: uv run python -m benchmarks.file_index [--files 500000] [--files-per-dir 50]
+"""
+
+import argparse
+import fnmatch
+import os
+import statistics
+import tempfile
+import time
+from typing import List, Optional
+
+from rtclient.util.file_index import FileIndex
+
+EXTENSIONS = [".py", ".ts", ".md", ".json", ".png", ".txt", ".c", ".h"]
+
+QUERIES = [
+    ("everything", dict()),
+    ("by extension", dict(extensions=[".png"])),
+    ("by prefix", dict(prefix="d3/")),
+    ("by glob", dict(pattern="d1*/*7.md")),
+    ("no matches", dict(extensions=[".rs"])),
+]
+
+
+def build_tree(root: str, files: int, files_per_dir: int) -> int:
+    created = 0
+    directory = 0
+    while created < files:
+        # d3/d31/d312 style nesting, every 20th directory hidden
+        digits = str(directory)
+        parts = ["d" + digits[: i + 1] for i in range(len(digits))]
+        if directory % 20 == 19:
+            parts[-1] = "." + parts[-1]
+        path = os.path.join(root, *parts)
+        os.makedirs(path, exist_ok=True)
+        for i in range(min(files_per_dir, files - created)):
+            open(os.path.join(path, f"f{i}{EXTENSIONS[i % len(EXTENSIONS)]}"), "w").close()
+            created += 1
+        directory += 1
+    return directory
+
+
+def walk(root: str, max_results: int = 500, extensions: Optional[List[str]] = None, prefix: str = "", pattern: Optional[str] = None):
+    """The os.walk list_files replaced by the index, with prefix and pattern applied the same way."""
+    root = os.path.abspath(os.path.join(root, prefix))
+    results: List[str] = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+        filenames = [f for f in filenames if not f.startswith(".")]
+        for fname in filenames:
+            if extensions and os.path.splitext(fname)[1].lower() not in [e.lower() for e in extensions]:
+                continue
+            rel_path = os.path.relpath(os.path.join(dirpath, fname), start=os.getcwd())
+            if pattern is not None and not fnmatch.fnmatch(rel_path, pattern):
+                continue
+            results.append(rel_path)
+            if len(results) >= max_results:
+                return results
+    return results
+
+
+def timed(function, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - started) * 1e3)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=500_000)
+    parser.add_argument("--files-per-dir", type=int, default=50)
+    parser.add_argument("--max-results", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        started = time.perf_counter()
+        directories = build_tree(root, args.files, args.files_per_dir)
+        print(f"built {args.files} files in {directories} directories in {time.perf_counter() - started:.1f} s")
+
+        cwd = os.getcwd()
+        os.chdir(root)
+        try:
+            index = FileIndex(root)
+            index.scan()
+            print(f"index scan: {index.metrics.last_scan_seconds * 1e3:.0f} ms")
+            print(f"{'query':>14} {'os.walk ms':>11} {'index ms':>9}")
+            for name, query in QUERIES:
+                pattern = query.get("pattern")
+                walk_ms = timed(lambda: walk(".", args.max_results, **query), args.repeat)
+                index_ms = timed(
+                    lambda: index.query(query.get("prefix", ""), query.get("extensions"), pattern, limit=args.max_results),
+                    args.repeat * 10,
+                )
+                print(f"{name:>14} {walk_ms:>11.1f} {index_ms:>9.3f}")
+
+            index.refresh()
+            print(f"refresh, nothing changed: {index.metrics.last_refresh_seconds * 1e3:.0f} ms")
+            for directory in ("d1", "d2", "d3"):
+                open(os.path.join(root, directory, "new.py"), "w").close()
+            index.refresh()
+            print(
+                f"refresh, 3 directories changed: {index.metrics.last_refresh_seconds * 1e3:.0f} ms,"
+                f" new files found: {len(index.query(pattern='d?/new.py'))}"
+            )
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
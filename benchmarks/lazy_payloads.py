@@ -0,0 +1,61 @@
+"""Parse time and memory of response.done with many output items, eager (strict) vs lazy (trusted).
+
+"lazy" only reads response.id like realtime.receive_messages does, "lazy+output" also reads
+response.output and response.usage to show the cost when everything is eventually materialized.
+
+Usage: uv run python -m benchmarks.lazy_payloads [--items 1 10 50 200]
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+from benchmarks.events import EVENT_ID, response_payload
+from rtclient.models import create_server_message_from_dict
+
+
+def response_done_frame(items: int) -> str:
+    return json.dumps({"type": "response.done", "event_id": EVENT_ID, "response": response_payload("completed", items)})
+
+
+def decode(frame: str, variant: str):
+    message = create_server_message_from_dict(json.loads(frame), "strict" if variant == "eager" else "trusted")
+    message.response.id
+    if variant == "lazy+output":
+        message.response.output
+        message.response.usage
+    return message
+
+
+def parse_ms(frame: str, variant: str, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        decode(frame, variant)
+    return (time.perf_counter() - start) / repeat * 1e3
+
+
+def peak_kib(frame: str, variant: str) -> float:
+    tracemalloc.start()
+    message = decode(frame, variant)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del message
+    return peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, nargs="+", default=[1, 10, 50, 200])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'items':>6}{'variant':>13}{'parse ms':>11}{'peak KiB':>11}")
+    for items in args.items:
+        frame = response_done_frame(items)
+        for variant in ("eager", "lazy", "lazy+output"):
+            print(f"{items:>6}{variant:>13}{parse_ms(frame, variant, args.repeat):>11.3f}{peak_kib(frame, variant):>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
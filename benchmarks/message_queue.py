@@ -0,0 +1,65 @@
+"""MessageQueue throughput for different numbers of concurrent ids and receivers.
+
+"interleaved" routes messages round robin to one receiver per id, like deltas of concurrent items.
+"backlog" stores every message before a single receiver per id drains them, like a response whose
+audio deltas arrive before anyone iterates over its items.
+
+Usage: uv run python -m benchmarks.message_queue [--messages 200000]
+"""
+
+import argparse
+import asyncio
+import time
+
+from rtclient.util.message_queue import MessageQueue
+
+IDS = (1, 10, 100, 1000)
+
+
+def make_queue(messages: int, ids: int) -> MessageQueue[tuple[str, int]]:
+    routed = ((str(index % ids), index) for index in range(messages))
+
+    async def receive():
+        return next(routed, None)
+
+    return MessageQueue(receive, lambda message: message[0])
+
+
+async def drain(queue: MessageQueue, id: str) -> int:
+    received = 0
+    while await queue.receive(id) is not None:
+        received += 1
+    return received
+
+
+async def interleaved(messages: int, ids: int) -> int:
+    queue = make_queue(messages, ids)
+    counts = await asyncio.gather(*(drain(queue, str(id)) for id in range(ids)))
+    return sum(counts)
+
+
+async def backlog(messages: int, ids: int) -> int:
+    queue = make_queue(messages, ids)
+    # A receiver for an id that never gets messages keeps the queue polling until the stream ends
+    await queue.receive("never")
+    counts = await asyncio.gather(*(drain(queue, str(id)) for id in range(ids)))
+    return sum(counts)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=200_000)
+    args = parser.parse_args()
+
+    print(f"{'scenario':<12}{'ids':>6}{'messages/s':>14}")
+    for scenario in (interleaved, backlog):
+        for ids in IDS:
+            start = time.perf_counter()
+            received = await scenario(args.messages, ids)
+            elapsed = time.perf_counter() - start
+            assert received == args.messages
+            print(f"{scenario.__name__:<12}{ids:>6}{received / elapsed:>14,.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,158 @@
+"""Soak test of RTClient message retention: a multi-hour synthetic session on a fake clock.
+
+The session is a voice turn every --turn-seconds: VAD and input item events, then a response with
+audio and transcript deltas. The consumer iterates RTClient.items() and awaits every input item
+but only iterates every --iterate-every-th response (0 never), so everything routed to the
+others is stored until the retention policy evicts it. Memory is sampled with tracemalloc every
+simulated half hour and must be flat over the second half of the session.
+
+Usage: uv run python -m benchmarks.message_queue_soak [--hours 4] [--iterate-every 2]
+"""
+
+import argparse
+import asyncio
+import os
+import tracemalloc
+
+from rtclient import DEFAULT_RETENTION, RetentionPolicy, RTClient, RTResponse, create_server_message_from_dict
+
+AUDIO_DELTAS_PER_RESPONSE = 30
+AUDIO_DELTA = "A" * 1024
+CHECKPOINT_SECONDS = 1800
+
+POLICIES = {
+    "default": DEFAULT_RETENTION,
+    "ttl+terminal": RetentionPolicy(max_per_id=10_000, max_total=20_000, ttl=300, evict_terminated=True),
+}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def turn_events(turn: int) -> list[dict]:
+    event = {"event_id": f"event_Soak{turn:010d}"}
+    user_item = f"item_SoakUser{turn:010d}"
+    assistant_item = f"item_SoakAsst{turn:010d}"
+    response_id = f"resp_Soak{turn:010d}"
+    ids = {"response_id": response_id, "item_id": assistant_item, "output_index": 0, "content_index": 0}
+    response = {"object": "realtime.response", "id": response_id, "status": "in_progress", "status_details": None, "output": [], "conversation_id": None, "usage": None}
+    assistant = {"id": assistant_item, "object": "realtime.item", "type": "message", "status": "in_progress", "role": "assistant", "content": []}
+    events = [
+        {"type": "input_audio_buffer.speech_started", "audio_start_ms": turn * 1000, "item_id": user_item},
+        {"type": "input_audio_buffer.speech_stopped", "audio_end_ms": turn * 1000 + 900, "item_id": user_item},
+        {"type": "input_audio_buffer.committed", "previous_item_id": None, "item_id": user_item},
+        {
+            "type": "conversation.item.created",
+            "previous_item_id": None,
+            "item": {"id": user_item, "object": "realtime.item", "type": "message", "status": "completed", "role": "user", "content": [{"type": "input_audio", "transcript": None}]},
+        },
+        {"type": "conversation.item.input_audio_transcription.completed", "item_id": user_item, "content_index": 0, "transcript": "What time is it?"},
+        {"type": "response.created", "response": response},
+        {"type": "response.output_item.added", "response_id": response_id, "output_index": 0, "item": assistant},
+        {"type": "conversation.item.created", "previous_item_id": user_item, "item": assistant},
+        {"type": "response.content_part.added", **ids, "part": {"type": "audio", "transcript": ""}},
+    ]
+    for _ in range(AUDIO_DELTAS_PER_RESPONSE):
+        events.append({"type": "response.audio.delta", **ids, "delta": AUDIO_DELTA})
+        events.append({"type": "response.audio_transcript.delta", **ids, "delta": "word "})
+    events += [
+        {"type": "response.audio.done", **ids},
+        {"type": "response.audio_transcript.done", **ids, "transcript": "word " * AUDIO_DELTAS_PER_RESPONSE},
+        {"type": "response.content_part.done", **ids, "part": {"type": "audio", "transcript": "word " * AUDIO_DELTAS_PER_RESPONSE}},
+        {"type": "response.output_item.done", "response_id": response_id, "output_index": 0, "item": {**assistant, "status": "completed"}},
+        {"type": "response.done", "response": {**response, "status": "completed"}},
+        {"type": "rate_limits.updated", "rate_limits": [{"name": "requests", "limit": 5000, "remaining": 4999, "reset_seconds": 0.01}]},
+    ]
+    return [{**event, **data} for data in events]
+
+
+class SyntheticSession:
+    """Stands in for RTLowLevelClient, yields decoded events and advances the clock turn by turn."""
+
+    def __init__(self, clock: Clock, turns: int, turn_seconds: float):
+        self._clock = clock
+        self._turns = turns
+        self._turn_seconds = turn_seconds
+        self._turn = 0
+        self._pending: list = []
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self._pending:
+            if self._turn == self._turns:
+                raise StopAsyncIteration
+            self._clock.now = self._turn * self._turn_seconds
+            self._pending = [create_server_message_from_dict(data, "trusted") for data in reversed(turn_events(self._turn))]
+            self._turn += 1
+        return self._pending.pop()
+
+
+async def consume(client: RTClient, iterate_every: int):
+    responses = 0
+    async for item in client.items():
+        if isinstance(item, RTResponse):
+            responses += 1
+            if iterate_every and responses % iterate_every == 0:
+                async for output_item in item:
+                    async for _ in output_item:
+                        pass
+        else:
+            await item
+
+
+async def soak(policy: RetentionPolicy, hours: float, turn_seconds: float, iterate_every: int) -> list[tuple[float, int, int]]:
+    clock = Clock()
+    turns = int(hours * 3600 / turn_seconds)
+    client = RTClient(retention=policy)
+    await client._client._session.close()
+    client._client = SyntheticSession(clock, turns, turn_seconds)
+    # Retention runs on the simulated session time
+    client._queue._clock = clock
+
+    samples: list[tuple[float, int, int]] = []
+
+    async def sample():
+        next_checkpoint = CHECKPOINT_SECONDS
+        while True:
+            await asyncio.sleep(0)
+            if clock.now >= next_checkpoint:
+                stored = sum(metrics.stored for metrics in client.retention_metrics.values())
+                samples.append((clock.now / 3600, tracemalloc.get_traced_memory()[0], stored))
+                next_checkpoint += CHECKPOINT_SECONDS
+
+    sampler = asyncio.create_task(sample())
+    await consume(client, iterate_every)
+    sampler.cancel()
+    return samples
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hours", type=float, default=4)
+    parser.add_argument("--turn-seconds", type=float, default=8)
+    parser.add_argument("--iterate-every", type=int, default=2, help="Iterate every n-th response, 0 never")
+    args = parser.parse_args()
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+    for name, policy in POLICIES.items():
+        tracemalloc.start()
+        samples = await soak(policy, args.hours, args.turn_seconds, args.iterate_every)
+        tracemalloc.stop()
+        print(f"{name}: {policy}")
+        print(f"{'hour':>6}{'memory MB':>12}{'stored':>9}")
+        for hour, memory, stored in samples:
+            print(f"{hour:>6.1f}{memory / 1e6:>12.2f}{stored:>9}")
+
+        second_half = [memory for hour, memory, _ in samples if hour >= args.hours / 2]
+        assert max(second_half) <= second_half[0] * 1.1 + 1e6, f"memory grew over the second half with {name}"
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,123 @@
+"""End-to-end latency of multi-tool turns against the local mock Realtime server, per call vs batched completion.
+
+The mock answers a user message with --calls function calls of a tool that takes --tool-ms, and
+answers function call outputs with a message after --latency-ms. The per call flow is the one
+realtime.py had: each tool runs on the event loop and its output is followed by its own
+response.create. The batched flow runs the calls in parallel with ToolExecutor and sends a single
+response.create through ToolCallBatcher. A turn lasts from the user message until every
+response.create was answered and every response is done.
+
+Usage: uv run python -m benchmarks.tool_batching [--calls 3] [--tool-ms 200] [--turns 5]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+from rtclient import RTLowLevelClient
+from rtclient.util.mock_server import MockFunctionCall, MockRealtimeServer, MockResponse
+from rtclient.util.tool_executor import ToolCallBatcher, ToolExecutor
+
+
+def lookup(ms: int) -> dict:
+    time.sleep(ms / 1000)
+    return {"ok": True}
+
+
+class Turn:
+    def __init__(self, calls: int):
+        self.calls = calls
+        self.outputs = 0
+        self.creates = 0
+        self.answered = 0
+        self.open = 0
+        self.generations = 0
+        self.rejected = 0
+
+    @property
+    def done(self) -> bool:
+        return self.outputs == self.calls and self.creates > 1 and self.answered == self.creates and self.open == 0
+
+
+async def run_turn(client: RTLowLevelClient, args: argparse.Namespace, batched: bool, tools: ToolExecutor) -> Turn:
+    turn = Turn(args.calls)
+
+    async def send_output(call_id: str, result: dict):
+        output = {"type": "function_call_output", "call_id": call_id, "output": json.dumps(result)}
+        await client.send({"type": "conversation.item.create", "item": output})
+        turn.outputs += 1
+
+    async def respond():
+        turn.creates += 1
+        await client.send_response_create()
+
+    async def run_call(message) -> bool:
+        await send_output(message.call_id, await tools.run(message.name, json.loads(message.arguments)))
+        return True
+
+    batcher = ToolCallBatcher(respond)
+    await client.send({"type": "conversation.item.create", "item": {"type": "message", "role": "user", "content": [{"type": "input_text", "text": "Look these up"}]}})
+    await respond()
+    while not turn.done:
+        message = await client.recv()
+        match message.type:
+            case "response.created":
+                turn.answered += 1
+                turn.open += 1
+                turn.generations += 1
+            case "error":
+                turn.answered += 1
+                turn.rejected += 1
+            case "response.done":
+                turn.open -= 1
+                if batched:
+                    batcher.response_done(message.response.id)
+            case "response.function_call_arguments.done":
+                if batched:
+                    batcher.add(message.response_id, run_call(message))
+                else:
+                    await send_output(message.call_id, lookup(**json.loads(message.arguments)))
+                    await respond()
+    return turn
+
+
+async def run(args: argparse.Namespace, batched: bool) -> tuple[list[float], list[Turn]]:
+    def script(conversation: list[dict]) -> MockResponse:
+        if conversation and conversation[-1]["type"] == "function_call_output":
+            return MockResponse(transcript="Here is what I found.", audio_ms=500, latency_ms=args.latency_ms)
+        calls = [MockFunctionCall("lookup", json.dumps({"ms": args.tool_ms})) for _ in range(args.calls)]
+        return MockResponse(transcript="", audio_ms=0, function_calls=calls, latency_ms=args.latency_ms)
+
+    latencies, turns = [], []
+    async with MockRealtimeServer(script, speed=0) as server:
+        async with RTLowLevelClient(url=server.url) as client, ToolExecutor({"lookup": lookup}, max_concurrency=args.calls) as tools:
+            await client.send({"type": "session.update", "session": {"turn_detection": None}})
+            for _ in range(args.turns):
+                started = time.perf_counter()
+                turns.append(await run_turn(client, args, batched, tools))
+                latencies.append((time.perf_counter() - started) * 1e3)
+    return latencies, turns
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=3)
+    parser.add_argument("--tool-ms", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=150, help="Time to first output of every response")
+    parser.add_argument("--turns", type=int, default=5)
+    args = parser.parse_args()
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+    print(f"{'flow':>9}{'turn ms':>10}{'responses':>11}{'rejected':>10}")
+    for name, batched in (("per call", False), ("batched", True)):
+        latencies, turns = await run(args, batched)
+        generations = statistics.mean(turn.generations for turn in turns)
+        rejected = statistics.mean(turn.rejected for turn in turns)
+        print(f"{name:>9}{statistics.median(latencies):>10.1f}{generations:>11.1f}{rejected:>10.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
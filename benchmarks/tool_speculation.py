@@ -0,0 +1,76 @@
+"""Time to a tool result with and without starting the call while its arguments stream in.
+
+The mock streams the arguments of a list_files-like call 8 characters every --delta-ms, the
+field the tool speculates on first and then the defaults the model likes to restate. The tool
+takes --tool-ms. Reported is the time from response.output_item.added of the call until its
+result is ready, when the tool starts at response.function_call_arguments.done and when
+ToolSpeculator starts it as soon as root is known.
+
+Usage: uv run python -m benchmarks.tool_speculation [--delta-ms 20] [--tool-ms 200]
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import os
+import statistics
+import time
+from typing import Optional
+
+from rtclient import RTLowLevelClient
+from rtclient.util.mock_server import MockFunctionCall, MockRealtimeServer, MockResponse
+from rtclient.util.tool_executor import ToolExecutor, ToolSpec, ToolSpeculator
+
+ARGUMENTS = {"root": "src", "max_results": 500, "include_hidden": False}
+
+
+def list_files(root: str = ".", max_results: int = 500, include_hidden: bool = False, delay_ms: int = 0) -> dict:
+    time.sleep(delay_ms / 1000)
+    return {"root": root, "files": []}
+
+
+async def run(args: argparse.Namespace, speculate: bool) -> list[float]:
+    call = MockFunctionCall("list_files", json.dumps(ARGUMENTS), delta_ms=args.delta_ms)
+    script = [MockResponse(transcript="", audio_ms=0, function_calls=[call])]
+    specs = {"list_files": ToolSpec(speculate_on=("root",))}
+    tools = {"list_files": functools.partial(list_files, delay_ms=args.tool_ms)}
+    timings = []
+    async with MockRealtimeServer(script, speed=0) as server:
+        async with RTLowLevelClient(url=server.url) as client, ToolExecutor(tools, specs) as executor:
+            speculator = ToolSpeculator(executor)
+            for _ in range(args.turns):
+                await client.send_response_create()
+                added_at: Optional[float] = None
+                while True:
+                    message = await client.recv()
+                    if speculate:
+                        speculator.observe(message)
+                    if message.type == "response.output_item.added":
+                        added_at = time.perf_counter()
+                    elif message.type == "response.function_call_arguments.done":
+                        if speculate:
+                            await speculator.result(message)
+                        else:
+                            await executor.run(message.name, json.loads(message.arguments))
+                        timings.append((time.perf_counter() - added_at) * 1e3)
+                    elif message.type == "response.done":
+                        break
+    return timings
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--delta-ms", type=float, default=20, help="Time between 8 character argument deltas")
+    parser.add_argument("--tool-ms", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=10)
+    args = parser.parse_args()
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+    for name, speculate in (("at done", False), ("speculative", True)):
+        timings = await run(args, speculate)
+        print(f"{name:>12}: {statistics.median(timings):.1f} ms to result")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,18 +1,24 @@
 import base64
 import datetime
+import glob
 import mimetypes
 import os
+import threading
 from typing import List, Optional, TypedDict
 from typing import Any
 from zoneinfo import ZoneInfo
 import dotenv
 import pyaudio
+from rtclient.util.file_index import FileIndex, walk_files
+from rtclient.util.tool_executor import ToolSpec
 dotenv.load_dotenv()
 
 GH_PAT = os.environ.get("GH_PAT") or None
 
 INPUT_SAMPLE_RATE = 24000  # Input sample rate
-INPUT_CHUNK_SIZE = 2048  # Input chunk size
+INPUT_CHUNK_SIZE = 480  # Input capture frame size (20 ms at 24 kHz)
+AUDIO_FLUSH_INTERVAL_MS = int(os.environ.get("AUDIO_FLUSH_INTERVAL_MS", "40"))  # Send captured audio at least this often
+AUDIO_FLUSH_BYTES = int(os.environ.get("AUDIO_FLUSH_BYTES", "4096"))  # ... or as soon as this many bytes are captured
 OUTPUT_SAMPLE_RATE = 24000  # Output sample rate. ** Note: This must be 24000 **
 OUTPUT_CHUNK_SIZE = 2048 # Output chunk size
 STREAM_FORMAT = pyaudio.paInt16  # Stream format
@@ -24,6 +30,7 @@ OUTPUT_SAMPLE_WIDTH = 2  # Output sample width
 WEAVE_PROJECT=os.environ.get("WEAVE_PROJECT", "realtime-example")
 INSTRUCTIONS=os.environ.get("INSTRUCTIONS", "You are a helpful developer assistant")
 IDLE_TIMEOUT_SECONDS = int(os.environ.get("IDLE_TIMEOUT_SECONDS", "5"))
+RECORD_SESSION_PATH = os.environ.get("RECORD_SESSION_PATH") or None  # Record every websocket frame, see rtclient/util/recording.py
 VOICE_TYPE = "marin"
 TEMPERATURE = 0.7
 MAX_RESPONSE_OUTPUT_TOKENS = 4096
@@ -81,7 +88,8 @@ TOOLS = [
                 "root": {"type": "string", "description": "Root directory to start from", "default": "."},
                 "max_results": {"type": "integer", "description": "Maximum number of files to return", "default": 500},
                 "include_hidden": {"type": "boolean", "description": "Whether to include hidden files and directories", "default": False},
-                "extensions": {"type": "array", "description": "Optional list of file extensions to include (e.g. ['.png','.jpg'])", "items": {"type": "string"}}
+                "extensions": {"type": "array", "description": "Optional list of file extensions to include (e.g. ['.png','.jpg'])", "items": {"type": "string"}},
+                "pattern": {"type": "string", "description": "Optional glob the path below root must match, * also matches '/' (e.g. 'src/*_test.py')"}
             },
             "required": []
         }
@@ -125,31 +133,47 @@ def add_numbers(numbers: Optional[List[float]] = None, a: Optional[float] = None
     return {"sum": total, "operands": numbers}
 
 
-def list_files(root: str = ".", max_results: int = 500, include_hidden: bool = False, extensions: Optional[List[str]] = None):
+FILE_INDEX_REFRESH_SECONDS = float(os.environ.get("FILE_INDEX_REFRESH_SECONDS", "2"))  # How often the file index looks for changed directories
+FILE_INDEX_WAIT_SECONDS = float(os.environ.get("FILE_INDEX_WAIT_SECONDS", "1"))  # How long list_files waits for the first scan before walking instead
+
+_file_index: Optional[FileIndex] = None
+_file_index_lock = threading.Lock()
+
+
+def working_file_index() -> FileIndex:
+    """The index of the working directory, started on first use and kept for the rest of the process."""
+    global _file_index
+    with _file_index_lock:
+        if _file_index is None:
+            _file_index = FileIndex(os.getcwd(), refresh_interval=FILE_INDEX_REFRESH_SECONDS)
+            _file_index.start()
+        return _file_index
+
+
+def list_files(root: str = ".", max_results: int = 500, include_hidden: bool = False, extensions: Optional[List[str]] = None, pattern: Optional[str] = None):
     root = os.path.abspath(root)
-    results: List[str] = []
-    for dirpath, dirnames, filenames in os.walk(root):
-        if not include_hidden:
-            # Filter hidden directories in-place to prevent walking into them
-            dirnames[:] = [d for d in dirnames if not d.startswith('.')]
-            filenames = [f for f in filenames if not f.startswith('.')]
-        for fname in filenames:
-            if extensions:
-                try:
-                    ext = os.path.splitext(fname)[1].lower()
-                except Exception:
-                    ext = ""
-                if ext not in [e.lower() for e in extensions]:
-                    continue
-            full_path = os.path.join(dirpath, fname)
-            try:
-                rel_path = os.path.relpath(full_path, start=os.getcwd())
-            except Exception:
-                rel_path = full_path
-            results.append(rel_path)
-            if len(results) >= max_results:
-                return {"root": root, "count": len(results), "files": results, "truncated": True}
-    return {"root": root, "count": len(results), "files": results, "truncated": False}
+    try:
+        base = os.path.relpath(root, start=os.getcwd())
+    except Exception:
+        # A root on another drive has no relative path, list it by its full one
+        base = root
+    parts = base.split(os.sep)
+    # The index leaves out hidden files and directories; listings that include them and roots
+    # outside the working directory are walked until max_results files matched instead
+    hidden = include_hidden or any(part.startswith(".") for part in parts if part != ".")
+    indexed = not hidden and base != root and parts[0] != ".."
+    index = working_file_index() if indexed else None
+    if index is not None and index.ready.wait(FILE_INDEX_WAIT_SECONDS):
+        prefix = "" if base == "." else base + os.sep
+        if pattern is not None:
+            pattern = glob.escape(prefix) + pattern
+        matches = index.query(prefix, extensions or None, pattern, limit=max_results + 1)
+    else:
+        matches = walk_files(root, extensions or None, pattern, include_hidden, limit=max_results + 1)
+        if base != ".":
+            matches = [os.path.join(base, path) for path in matches]
+    results = matches[:max_results]
+    return {"root": root, "count": len(results), "files": results, "truncated": len(matches) > max_results}
 
 
 def get_image_file_by_path(path: str, inline_limit_bytes: int = 1024 * 1024*10):
@@ -205,3 +229,17 @@ TOOL_MAP = {
     "list_files": list_files,
     # "get_image_file_by_path": get_image_file_by_path,
 }
+
+# How each tool runs off the event loop, see rtclient/util/tool_executor.py. Tools not listed get ToolSpec().
+# speculate_on marks read-only tools that may start as soon as those fields of their arguments have streamed in.
+# cache_ttl reuses results of identical calls for that many seconds unless stale says they are out of date.
+# None is cached: list_files' index answers in milliseconds and sees changes anywhere below root, which
+# a stale check on root's mtime would miss, and image reads return data URLs of up to 10 MB.
+TOOL_SPECS = {
+    "get_current_datetime": ToolSpec(timeout=2, speculate_on=("timezone",)),
+    "add_numbers": ToolSpec(timeout=2),
+    "list_files": ToolSpec(timeout=10, speculate_on=("root",)),
+    "get_image_file_by_path": ToolSpec(timeout=10),
+}
+TOOL_MAX_CONCURRENCY = int(os.environ.get("TOOL_MAX_CONCURRENCY", "4"))  # Tool calls running at once
+TOOL_CACHE_DIR = os.environ.get("TOOL_CACHE_DIR", ".cache/tools") or None  # Cached tool results kept across restarts, empty keeps them in memory only
@@ -3,12 +3,12 @@ import aiohttp
 # Licensed under the MIT license.
 
 import asyncio
-import base64
-import json
+import functools
 import os
 import queue
 import threading
 import time
+from collections.abc import Awaitable
 import pyaudio
 from dotenv import load_dotenv
 from logger import Logger
@@ -21,16 +21,21 @@ import weave
 from weave.integrations import patch_openai_realtime
 
 from rtclient import (
-    InputAudioBufferAppendMessage,
     InputAudioTranscription,
     RTLowLevelClient,
     ServerVAD,
     SessionUpdateMessage,
     SessionUpdateParams,
 )
+from rtclient.util.audio_coalescer import AudioCoalescer
+from rtclient.util.playback import BargeIn, PlaybackTracker
+from rtclient.util.tool_cache import ToolCache
+from rtclient.util.tool_executor import ToolCallBatcher, ToolCancelledError, ToolExecutor, ToolSpeculator
 from config import (
     INPUT_SAMPLE_RATE,
     INPUT_CHUNK_SIZE,
+    AUDIO_FLUSH_INTERVAL_MS,
+    AUDIO_FLUSH_BYTES,
     OUTPUT_SAMPLE_RATE,
     OUTPUT_CHUNK_SIZE,
     STREAM_FORMAT,
@@ -43,7 +48,12 @@ from config import (
     TOOLS,
     TOOL_CHOICE,
     TOOL_MAP,
-    WEAVE_PROJECT
+    TOOL_SPECS,
+    TOOL_MAX_CONCURRENCY,
+    TOOL_CACHE_DIR,
+    WEAVE_PROJECT,
+    working_file_index,
+    RECORD_SESSION_PATH,
 )
 from idle_handler import clear_idle_timer, reset_idle_timer
 from logger import Logger
@@ -52,7 +62,7 @@ weave.init(WEAVE_PROJECT)
 patch_openai_realtime()
 
 audio_input_queue = queue.Queue()
-audio_output_queue = queue.Queue()
+playback = PlaybackTracker(frame_bytes=OUTPUT_CHUNK_SIZE)
 execute_tool_queue = asyncio.Queue()
 client_event_queue = asyncio.Queue()
 
@@ -62,13 +72,55 @@ async def send_text_client_event(client: RTLowLevelClient):
         await client.send(message)
 
 async def send_message(client: RTLowLevelClient, data: dict):
-    await client.send(json.dumps(data))
+    await client.send(data)
 
-async def receive_messages(client: RTLowLevelClient, thread_id: str | None = None):
+async def send_function_call_output(client: RTLowLevelClient, call_id: str, output):
+    await client.send({
+        "type": "conversation.item.create",
+        "item": {
+            "type": "function_call_output",
+            "call_id": call_id,
+            "output": client.codec.dumps(output)
+        }
+    })
+
+async def run_tool_call(client: RTLowLevelClient, message, result: Awaitable) -> bool:
+    """Send the output of the call once its result is in, False when no response should follow."""
+    try:
+        tool_result = await result
+    except ToolCancelledError:
+        # The user interrupted, the call still gets an output but the model waits for the user
+        await send_function_call_output(client, message.call_id, {"ok": False, "error": "Cancelled, the user interrupted"})
+        return False
+    except Exception as e:
+        await logger.info(f"Client | tool {message.name} failed | {type(e).__name__}: {e}")
+        tool_result = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+    # If the tool provided a user item to attach to the conversation (e.g., image as data URL), send it first
+    try:
+        if isinstance(tool_result, dict) and tool_result.get("user_item"):
+            await client.send({
+                "type": "conversation.item.create",
+                "item": tool_result["user_item"],
+            })
+    except Exception as e:
+        await logger.info(f"Client | failed to attach user item from tool result: {e}")
+
+    await send_function_call_output(client, message.call_id, tool_result)
+    return True
+
+async def receive_messages(client: RTLowLevelClient, tools: ToolExecutor, thread_id: str | None = None):
+    # Flushes playback, cancels the response and truncates the item to what was heard when the user interrupts
+    barge_in = BargeIn(client, playback)
+    # The calls of a response run in parallel, one response.create follows once all of them and the response are done
+    tool_calls = ToolCallBatcher(client.send_response_create)
+    # Starts tools while their arguments stream in, see speculate_on in config.TOOL_SPECS
+    speculator = ToolSpeculator(tools, client.codec.loads)
     while True:
         message = await client.recv()
         if message is None:
             continue
+        await barge_in.observe(message)
+        speculator.observe(message)
         match message.type:
             case "session.created":
                 await logger.info(f"Server | session.created | model: {message.session.model}, session_id: {message.session.id}")
@@ -83,8 +135,8 @@ async def receive_messages(client: RTLowLevelClient, thread_id: str | None = Non
             case "input_audio_buffer.speech_started":
                 await logger.info(f"Server | input_audio_buffer.speech_started | item_id: {message.item_id}, audio_start_ms: {message.audio_start_ms}")
                 await clear_idle_timer(logger)
-                while not audio_output_queue.empty():
-                    audio_output_queue.get()
+                tools.cancel()
+                await logger.info(f"Client | barge-in | {barge_in.metrics}")
                 await asyncio.sleep(0)
             case "input_audio_buffer.speech_stopped":
                 await logger.info(f"Server | input_audio_buffer.speech_stopped | item_id: {message.item_id}, audio_end_ms: {message.audio_end_ms}")
@@ -106,12 +158,15 @@ async def receive_messages(client: RTLowLevelClient, thread_id: str | None = Non
                 await clear_idle_timer(logger)
             case "response.done":
                 await logger.info(f"Server | response.done | response_id: {message.response.id}")
+                await logger.info(f"Client | send lanes | {client.send_metrics}")
+                await logger.info(f"Client | tool cache | {tools.cache.metrics}")
+                tool_calls.response_done(message.response.id)
                 await reset_idle_timer(logger, thread_id)
             case "response.output_item.added":
                 await logger.info(f"Server | response.output_item.added | response_id: {message.response_id}, item_id: {message.item.id}")
             case "response.output_item.done":
                 if message.item.type == "mcp_call":
-                    await client.send(json.dumps({"type": "response.create"}))
+                    await client.send_response_create()
                 await logger.info(f"Server | response.output_item.done | response_id: {message.response_id}, item_id: {message.item.id}")
             case "response.content_part.added":
                 await logger.info(f"Server | response.content_part.added | response_id: {message.response_id}, item_id: {message.item_id}")
@@ -127,9 +182,6 @@ async def receive_messages(client: RTLowLevelClient, thread_id: str | None = Non
                 await logger.info(f"Server | response.audio_transcript.done | response_id: {message.response_id}, item_id: {message.item_id}, transcript: {message.transcript}")
             case "response.audio.delta":
                 await logger.info(f"Server | response.audio.delta | response_id: {message.response_id}, item_id: {message.item_id}, audio_data_length: {len(message.delta)}")
-                audio_data = base64.b64decode(message.delta)
-                for i in range(0, len(audio_data), OUTPUT_CHUNK_SIZE):
-                    audio_output_queue.put(audio_data[i:i+OUTPUT_CHUNK_SIZE])
                 await asyncio.sleep(0)
             case "response.audio.done":
                 await logger.info(f"Server | response.audio.done | response_id: {message.response_id}, item_id: {message.item_id}")
@@ -138,30 +190,7 @@ async def receive_messages(client: RTLowLevelClient, thread_id: str | None = Non
                 await logger.info(f"Server | response.function_call_arguments.delta | response_id: {message.response_id}, item_id: {message.item_id}, arguments: {message.delta}")
             case "response.function_call_arguments.done":
                 await logger.info(f"Server | response.function_call_arguments.done | response_id: {message.response_id}, item_id: {message.item_id}, arguments: {message.arguments}")
-                fn = TOOL_MAP[message.name]
-                tool_args = json.loads(message.arguments) if message.arguments else {}
-                tool_result = fn(**tool_args)
-                # If the tool provided a user item to attach to the conversation (e.g., image as data URL), send it first
-                try:
-                    if isinstance(tool_result, dict) and tool_result.get("user_item"):
-                        await client.send(json.dumps({
-                            "type": "conversation.item.create",
-                            "item": tool_result["user_item"],
-                        }))
-                except Exception as e:
-                    await logger.info(f"Client | failed to attach user item from tool result: {e}")
-
-                call_id = message.call_id
-                function_output_event = {
-                    "type": "conversation.item.create",
-                    "item": {
-                        "type": "function_call_output",
-                        "call_id": call_id,
-                        "output": json.dumps(tool_result)
-                    }
-                }
-                await client.send(json.dumps(function_output_event))
-                await client.send(json.dumps({"type": "response.create"}))
+                tool_calls.add(message.response_id, run_tool_call(client, message, speculator.result(message)))
 
             case "rate_limits.updated":
                 await logger.info(f"Server | rate_limits.updated | rate_limits: {message.rate_limits}")
@@ -173,14 +202,23 @@ def listen_audio(input_stream: pyaudio.Stream):
         audio_data = input_stream.read(INPUT_CHUNK_SIZE, exception_on_overflow=False)
         if audio_data is None:
             continue
-        base64_audio = base64.b64encode(audio_data).decode("utf-8")
-        audio_input_queue.put(base64_audio)
+        audio_input_queue.put(audio_data)
 
 async def send_audio(client: RTLowLevelClient):
+    coalescer = AudioCoalescer(AUDIO_FLUSH_INTERVAL_MS, AUDIO_FLUSH_BYTES)
+    loop = asyncio.get_event_loop()
     while not client.closed:
-        base64_audio = await asyncio.get_event_loop().run_in_executor(None, audio_input_queue.get)
+        try:
+            captured = await loop.run_in_executor(
+                None, functools.partial(audio_input_queue.get, timeout=coalescer.time_until_flush())
+            )
+            audio_data = coalescer.add(captured)
+        except queue.Empty:
+            audio_data = coalescer.flush()
+        if audio_data is None:
+            continue
         await logger.info("Client | input_audio_buffer.append")
-        await client.send(InputAudioBufferAppendMessage(audio=base64_audio))
+        await client.send_audio_append(audio_data)
         await asyncio.sleep(0)
 
 def play_audio(
@@ -191,8 +229,7 @@ def play_audio(
     IDLE_RESET_THROTTLE_SECONDS = 1.0
     last_idle_reset_at = 0.0
     while True:
-        audio_data = audio_output_queue.get()
-        output_stream.write(audio_data)
+        playback.play_next(output_stream.write)
         now = time.monotonic()
         if now - last_idle_reset_at >= IDLE_RESET_THROTTLE_SECONDS:
             main_event_loop.call_soon_threadsafe(
@@ -203,6 +240,8 @@ def play_audio(
 async def with_openai(thread_id: str | None = None):
     key = os.environ.get("OPENAI_API_KEY") or ""
     model = os.environ.get("OPENAI_MODEL") or "gpt-realtime"
+    # e.g. ws://127.0.0.1:8765 for the local mock server, see rtclient/util/mock_server.py
+    url = os.environ.get("OPENAI_REALTIME_URL") or "wss://api.openai.com"
 
     p = pyaudio.PyAudio()
     input_default_input_index = int(p.get_default_input_device_info()['index'])
@@ -231,7 +270,14 @@ async def with_openai(thread_id: str | None = None):
     output_stream.start_stream()
 
     print("Start Processing")
-    async with RTLowLevelClient(model=model) as client:
+    async with RTLowLevelClient(
+        url=url,
+        model=model,
+        decode_mode="fast",
+        priority_events={"input_audio_buffer.speech_started"},
+        send_lanes=True,
+        record_path=RECORD_SESSION_PATH,
+    ) as client:
         await logger.info("Client | session.update")
         await client.send(
             SessionUpdateMessage(
@@ -240,7 +286,7 @@ async def with_openai(thread_id: str | None = None):
                     modalities={"text", "audio"},
                     input_audio_format="pcm16",
                     output_audio_format="pcm16",
-                    turn_detection=ServerVAD(type="server_vad", threshold=0.5, prefix_padding_ms=200, silence_duration_ms=200),
+                    turn_detection=ServerVAD(type="server_vad", threshold=0.5, prefix_padding_ms=200, silence_duration_ms=200, interrupt_response=False),
                     input_audio_transcription=InputAudioTranscription(model="whisper-1"),
                     voice=VOICE_TYPE,
                     instructions=INSTRUCTIONS,
@@ -257,7 +303,7 @@ async def with_openai(thread_id: str | None = None):
                 modalities={"text", "audio"},
                 input_audio_format="pcm16",
                 output_audio_format="pcm16",
-                turn_detection=ServerVAD(type="server_vad", threshold=0.5, prefix_padding_ms=200, silence_duration_ms=200),
+                turn_detection=ServerVAD(type="server_vad", threshold=0.5, prefix_padding_ms=200, silence_duration_ms=200, interrupt_response=False),
                 input_audio_transcription=InputAudioTranscription(model="whisper-1"),
                 voice=VOICE_TYPE,
                 instructions=INSTRUCTIONS,
@@ -275,12 +321,20 @@ async def with_openai(thread_id: str | None = None):
             args=(output_stream, main_event_loop, thread_id),
             daemon=True,
         ).start()
-        send_audio_task = asyncio.create_task(send_audio(client))
-        receive_task = asyncio.create_task(receive_messages(client, thread_id))
+        # Scan the working directory in the background so the first list_files doesn't wait for it
+        working_file_index()
+        tool_cache = ToolCache(directory=TOOL_CACHE_DIR)
+        try:
+            async with ToolExecutor(TOOL_MAP, TOOL_SPECS, max_concurrency=TOOL_MAX_CONCURRENCY, cache=tool_cache) as tools:
+                send_audio_task = asyncio.create_task(send_audio(client))
+                receive_task = asyncio.create_task(receive_messages(client, tools, thread_id))
 
-        send_text_client_event_task = asyncio.create_task(send_text_client_event(client))
+                send_text_client_event_task = asyncio.create_task(send_text_client_event(client))
 
-        await asyncio.gather(send_audio_task, receive_task, send_text_client_event_task)
+                await asyncio.gather(send_audio_task, receive_task, send_text_client_event_task)
+        finally:
+            # Waits for queued disk writes
+            tool_cache.close()
 
 async def main():
     with weave.thread() as thread_ctx:
@@ -1,22 +1,45 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT License.
 
+import asyncio
 import base64
+import binascii
+import inspect
+import logging
 import os
-import json
 import typing
 import uuid
-from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Callable
+from collections import deque
+from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable
+from dataclasses import dataclass
 from typing import Literal, Optional
 
 
 from aiohttp import ClientSession, WSMsgType
 
 from rtclient import models
+from rtclient.codec import (
+    CONSTANT_FRAMES,
+    AudioAppendEncoder,
+    CodecName,
+    JSONCodec,
+    base64_decoded_length,
+    get_codec,
+    sniff_event_type,
+)
+from rtclient.deltas import (
+    AudioDeltaRecord,
+    AudioTranscriptDeltaRecord,
+    DeltaRecord,
+    FunctionCallArgumentsDeltaRecord,
+    TextDeltaRecord,
+)
 from rtclient.models import (
     AssistantContentPart,
     AudioFormat,
     ClientMessageBase,
+    ClientSystemMessageItem,
+    DecodeMode,
     ErrorMessage,
     FunctionToolChoice,
     InputAudioBufferAppendMessage,
@@ -83,6 +106,7 @@ from rtclient.models import (
     ResponseTextDeltaMessage,
     ResponseTextDoneMessage,
     ServerMessageBase,
+    ServerEvent,
     ServerMessageType,
     ServerVAD,
     Session,
@@ -100,7 +124,44 @@ from rtclient.models import (
     Voice,
     create_server_message_from_dict,
 )
-from rtclient.util.message_queue import MessageQueue
+from rtclient.conversation import (
+    PCM16_BYTES_PER_MS,
+    ContextBudget,
+    ConversationEntry,
+    ConversationIndex,
+    TrimMetrics,
+    select_trimmed,
+    summarize_transcript,
+)
+from rtclient.router import CONTROL, ITEMS, is_terminal, item_route, response_route, route_event
+from rtclient.util.audio_coalescer import AudioCoalescer
+from rtclient.util.broadcast import Broadcaster, SlowConsumerPolicy, Subscription, SubscriptionMetrics
+from rtclient.util.message_queue import MessageQueue, RetentionMetrics, RetentionPolicy
+from rtclient.util.recording import SessionRecorder
+from rtclient.util.send_scheduler import AudioPolicy, Lane, LaneMetrics, SendScheduler
+
+if typing.TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# What happens to events that were not subscribed to, see RTLowLevelClient.subscribe.
+#   drop  - discarded without being decoded
+#   defer - the raw frames are kept (up to max_deferred) and decoded on drain_deferred
+UnsubscribedPolicy = Literal["drop", "defer"]
+
+# Bounds on what RTClient keeps for responses and items that are not (yet) being iterated, generous
+# enough that a consumer that is merely behind doesn't lose messages. See RetentionPolicy.
+DEFAULT_RETENTION = RetentionPolicy(max_per_id=10_000, max_total=20_000)
+
+# Messages a subscription buffers before its slow consumer policy applies, see RTClient.subscribe.
+DEFAULT_SUBSCRIPTION_BUFFER = 1000
+
+def _log_failure(task: asyncio.Task):
+    """Done callback of background tasks that reports what they raised instead of leaving it unretrieved."""
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"{task.get_name()} failed", exc_info=task.exception())
 
 
 class RTLowLevelClient:
@@ -108,6 +169,15 @@ class RTLowLevelClient:
         self,
         url: Optional[str] = "wss://api.openai.com",
         model: Optional[str] = None,
+        decode_mode: DecodeMode = "strict",
+        codec: CodecName | JSONCodec = "auto",
+        priority_events: Iterable[str] = (),
+        unsubscribed_policy: UnsubscribedPolicy = "drop",
+        max_deferred: int = 1024,
+        send_lanes: bool = False,
+        audio_policy: AudioPolicy = "coalesce",
+        max_audio_queue: int = 16,
+        record_path: Optional[str] = None,
     ):
         self._url = url
         key = os.environ.get("OPENAI_API_KEY")
@@ -116,6 +186,41 @@ class RTLowLevelClient:
         self._key_credential = key
         self._session = ClientSession(base_url=self._url)
         self._model = model
+        self._decode_mode: DecodeMode = decode_mode
+        self._codec = get_codec(codec)
+
+        # None means every event type is delivered
+        self._subscribed: Optional[set[str]] = None
+        self._unsubscribed: set[str] = set()
+        self._unsubscribed_policy: UnsubscribedPolicy = unsubscribed_policy
+        self._deferred_frames: deque[str] = deque(maxlen=max_deferred)
+
+        # Priority events are read eagerly by a background task and overtake any regular events
+        # that are already buffered, see _pump_frames.
+        self._priority_events: frozenset[str] = frozenset(priority_events)
+        self._priority_frames: deque[str] = deque()
+        self._pending_frames: deque[tuple[Optional[str], str]] = deque()
+        self._frames_available = asyncio.Event()
+        self._pump_task: Optional[asyncio.Task] = None
+        self._pump_done = False
+
+        self._audio_append_encoder = AudioAppendEncoder()
+        # The encoder reuses its buffer, which must not change while a frame is being written.
+        self._audio_append_lock = asyncio.Lock()
+
+        # With send lanes all sends go through a single writer task that prioritizes
+        # control messages over tool results over audio, see SendScheduler.
+        self._scheduler: Optional[SendScheduler] = None
+        if send_lanes:
+            self._scheduler = SendScheduler(
+                self._send_frame,
+                self._send_audio_append,
+                audio_policy=audio_policy,
+                max_audio_queue=max_audio_queue,
+            )
+
+        # Opt-in wire-level recording of every frame sent and received, see rtclient.util.recording.
+        self._recorder: Optional[SessionRecorder] = SessionRecorder(record_path) if record_path else None
 
     async def connect(self):
         self.request_id = uuid.uuid4()
@@ -123,25 +228,217 @@ class RTLowLevelClient:
             "Authorization": f"Bearer {self._key_credential}",
             "openai-beta": "realtime=v1",
         }
-        self.ws = await self._session.ws_connect("/v1/realtime", headers=headers, params={"model": "gpt-realtime"})
+        self.ws = await self._session.ws_connect("/v1/realtime", headers=headers, params={"model": self._model or "gpt-realtime"})
+        if self._priority_events:
+            self._pump_done = False
+            self._pump_task = asyncio.create_task(self._pump_frames())
+        if self._scheduler is not None:
+            self._scheduler.start()
 
-    async def send(self, message: MessageType | str):
+    @property
+    def codec(self) -> JSONCodec:
+        return self._codec
 
-        if not isinstance(message, str):
-            message = message.model_dump_json(exclude_none=True)
-        await self.ws.send_str(message)
+    @property
+    def send_metrics(self) -> dict[Lane, LaneMetrics]:
+        """Queue depth and send latency per lane, empty unless send_lanes is enabled."""
+        if self._scheduler is None:
+            return {}
+        return self._scheduler.metrics
 
-    async def recv(self) -> ServerMessageType | None:
-        if self.ws.closed:
-            return None
-        websocket_message = await self.ws.receive()
-        if websocket_message.type == WSMsgType.TEXT:
-            data = json.loads(websocket_message.data)
-            return create_server_message_from_dict(data)
+    def subscribe(self, *event_types: str):
+        """Only deliver the given event types (in addition to earlier subscriptions) from recv.
+
+        Other events are dropped or deferred according to unsubscribed_policy before being decoded.
+        Priority events are always delivered.
+        """
+        if self._subscribed is None:
+            self._subscribed = set()
+        self._subscribed.update(event_types)
+        self._unsubscribed.difference_update(event_types)
+
+    def unsubscribe(self, *event_types: str):
+        """Stop delivering the given event types from recv."""
+        if self._subscribed is not None:
+            self._subscribed.difference_update(event_types)
+        self._unsubscribed.update(event_types)
+
+    def subscribe_all(self):
+        """Deliver every event type again, this is the default."""
+        self._subscribed = None
+        self._unsubscribed.clear()
+
+    def is_subscribed(self, event_type: Optional[str]) -> bool:
+        """Whether events of the given type are delivered, events of unknown type always are."""
+        if event_type is None or event_type in self._priority_events:
+            return True
+        if event_type in self._unsubscribed:
+            return False
+        return self._subscribed is None or event_type in self._subscribed
+
+    def drain_deferred(self) -> list[ServerEvent]:
+        """Decode and return the deferred events in the order they were received."""
+        messages = []
+        while self._deferred_frames:
+            message = self._decode_frame(self._deferred_frames.popleft())
+            if message is not None:
+                messages.append(message)
+        return messages
+
+    def discard_pending(self, *event_types: str) -> int:
+        """Drop already received but not yet delivered events of the given types without decoding them.
+
+        Only frames read ahead because of priority_events can be discarded, e.g. the backlog of
+        response.audio.delta after input_audio_buffer.speech_started. Returns the number of discarded events.
+        """
+        if not self._pending_frames:
+            return 0
+        discard = set(event_types)
+        kept = deque(entry for entry in self._pending_frames if entry[0] not in discard)
+        discarded = len(self._pending_frames) - len(kept)
+        self._pending_frames = kept
+        return discarded
+
+    def _accept_frame(self, event_type: Optional[str], frame: str) -> bool:
+        if self.is_subscribed(event_type):
+            return True
+        if self._unsubscribed_policy == "defer":
+            self._deferred_frames.append(frame)
+        return False
+
+    async def _pump_frames(self):
+        try:
+            while not self.ws.closed:
+                websocket_message = await self.ws.receive()
+                if websocket_message.type == WSMsgType.TEXT:
+                    frame = websocket_message.data
+                    if self._recorder is not None:
+                        self._recorder.record_received(frame)
+                    event_type = sniff_event_type(frame)
+                    if event_type in self._priority_events:
+                        self._priority_frames.append(frame)
+                    elif self._accept_frame(event_type, frame):
+                        self._pending_frames.append((event_type, frame))
+                    else:
+                        continue
+                    self._frames_available.set()
+                elif websocket_message.type in (WSMsgType.CLOSE, WSMsgType.CLOSING, WSMsgType.CLOSED, WSMsgType.ERROR):
+                    break
+        finally:
+            self._pump_done = True
+            self._frames_available.set()
+
+    async def _receive_frame(self) -> Optional[str]:
+        """The next text frame to decode, None once the connection is closed."""
+        if self._pump_task is not None:
+            while True:
+                if self._priority_frames:
+                    return self._priority_frames.popleft()
+                if self._pending_frames:
+                    return self._pending_frames.popleft()[1]
+                if self._pump_done:
+                    return None
+                self._frames_available.clear()
+                await self._frames_available.wait()
+
+        filtering = self._subscribed is not None or bool(self._unsubscribed)
+        while True:
+            if self.ws.closed:
+                return None
+            websocket_message = await self.ws.receive()
+            if websocket_message.type != WSMsgType.TEXT:
+                return None
+            frame = websocket_message.data
+            if self._recorder is not None:
+                self._recorder.record_received(frame)
+            if not filtering or self._accept_frame(sniff_event_type(frame), frame):
+                return frame
+
+    def _decode_frame(self, frame: str) -> ServerEvent | None:
+        data = self._codec.loads(frame)
+        return create_server_message_from_dict(data, self._decode_mode)
+
+    async def _send_frame(self, frame: str | bytes | bytearray):
+        if self._recorder is not None:
+            self._recorder.record_sent(frame)
+        await self._write_frame(frame)
+
+    async def _write_frame(self, frame: str | bytes | bytearray):
+        if isinstance(frame, str):
+            await self.ws.send_str(frame)
         else:
+            await self.ws.send_frame(frame, WSMsgType.TEXT)
+
+    async def _send_audio_append(self, pcm: bytes | bytearray | memoryview):
+        if self._recorder is not None:
+            self._recorder.record_audio_sent(pcm)
+        async with self._audio_append_lock:
+            await self._write_frame(self._audio_append_encoder.encode(pcm))
+
+    async def _send_scheduled(self, frame: str | bytes, lane: Lane):
+        if self._scheduler is None:
+            await self._send_frame(frame)
+        else:
+            await self._scheduler.send(frame, lane)
+
+    async def send(self, message: MessageType | dict | str, lane: Optional[Lane] = None):
+        """Send a client message, a raw event dict, or an already encoded frame.
+
+        With send_lanes enabled the lane is derived from the message unless given, function call
+        outputs go to the tool lane, input audio buffer messages to the audio lane and everything
+        else to the control lane. Returns once written.
+        """
+        if isinstance(message, InputAudioBufferAppendMessage):
+            await self.send_audio_append(base64.b64decode(message.audio))
+            return
+        if isinstance(message, dict):
+            event_type = message.get("type")
+            is_tool_output = isinstance(message.get("item"), dict) and message["item"].get("type") == "function_call_output"
+            message = self._codec.dumps(message)
+        elif not isinstance(message, str):
+            event_type = message.type
+            is_tool_output = getattr(getattr(message, "item", None), "type", None) == "function_call_output"
+            message = self._codec.dumps_model(message)
+        else:
+            event_type = sniff_event_type(message)
+            is_tool_output = '"function_call_output"' in message
+        if lane is None:
+            if event_type is not None and event_type.startswith("input_audio_buffer."):
+                # Keeps commits and clears behind the audio queued before them
+                lane = "audio"
+            else:
+                lane = "tool" if event_type == "conversation.item.create" and is_tool_output else "control"
+        await self._send_scheduled(message, lane)
+
+    async def send_audio_append(self, pcm: bytes | bytearray | memoryview):
+        """Append raw audio to the input buffer, encoded without building an InputAudioBufferAppendMessage.
+
+        With send_lanes enabled this only queues the audio according to audio_policy.
+        """
+        if self._scheduler is None:
+            await self._send_audio_append(pcm)
+        else:
+            await self._scheduler.send_audio(pcm)
+
+    async def send_audio_commit(self):
+        await self._send_scheduled(CONSTANT_FRAMES["input_audio_buffer.commit"], "audio")
+
+    async def send_audio_clear(self):
+        await self._send_scheduled(CONSTANT_FRAMES["input_audio_buffer.clear"], "audio")
+
+    async def send_response_create(self):
+        await self._send_scheduled(CONSTANT_FRAMES["response.create"], "control")
+
+    async def send_response_cancel(self):
+        await self._send_scheduled(CONSTANT_FRAMES["response.cancel"], "control")
+
+    async def recv(self) -> ServerEvent | None:
+        frame = await self._receive_frame()
+        if frame is None:
             return None
+        return self._decode_frame(frame)
 
-    def __aiter__(self) -> AsyncIterator[ServerMessageType | None]:
+    def __aiter__(self) -> AsyncIterator[ServerEvent | None]:
         return self
 
     async def __anext__(self):
@@ -151,6 +448,13 @@ class RTLowLevelClient:
         return message
 
     async def close(self):
+        if self._scheduler is not None:
+            await self._scheduler.stop()
+        if self._pump_task is not None:
+            self._pump_task.cancel()
+            self._pump_task = None
+        if self._recorder is not None:
+            self._recorder.close()
         await self.ws.close()
         await self._session.close()
 
@@ -168,6 +472,10 @@ class RTLowLevelClient:
 
 RTMessageContentChunkType = Literal["audio_transcript", "text", "audio", "tool_call_arguments"]
 
+# How RTOutputItem.audio yields the decoded PCM of each audio delta, both without copying it.
+#   memoryview - a read-only memoryview of the bytes
+#   int16      - a read-only NumPy int16 array over the same memory
+AudioView = Literal["memoryview", "int16"]
 
 class RTMessageContentChunk:
     def __init__(self, type: RTMessageContentChunkType, data: str, index: int):
@@ -176,13 +484,40 @@ class RTMessageContentChunk:
         self.index = index
 
 
+@dataclass
+class RTFunctionCall:
+    call_id: str
+    name: str
+    arguments: str
+
+
+class _Accumulator:
+    """Deltas collected in a list and joined only when read, instead of concatenated one by one."""
+
+    __slots__ = ("_parts",)
+
+    def __init__(self):
+        self._parts: list[str] = []
+
+    def append(self, delta: str):
+        self._parts.append(delta)
+
+    def replace(self, value: str):
+        self._parts = [value]
+
+    def value(self) -> str:
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
+
+
 class RTInputItem:
     def __init__(
         self,
         id: str,
         audio_start_ms: int,
         has_transcription: bool,
-        receive: Callable[[], Awaitable[Optional[ServerMessageType]]],
+        receive: Callable[[], Awaitable[Optional[ServerEvent]]],
     ):
         self.id = id
         self._has_transcription = has_transcription
@@ -222,17 +557,103 @@ class RTInputItem:
 
 
 class RTOutputItem:
+    """An output item of a response, iterated as content chunks.
+
+    Transcript, text, function call arguments and audio duration are accumulated while the item is
+    read, so awaiting transcript(), text() or arguments() after streaming it costs nothing more.
+    Awaiting them before the item is done reads the rest of it. Messages read that way while the
+    item was being iterated are kept for the iterator, so it still sees every chunk, and an
+    iteration stopped early doesn't keep them waiting.
+    """
+
     def __init__(
         self,
         id: str,
         response_id: str,
         previous_id: Optional[str],
-        receive: Callable[[], Awaitable[Optional[ServerMessageType]]],
+        receive: Callable[[], Awaitable[Optional[ServerEvent]]],
+        item: Optional[ResponseItem] = None,
     ):
         self.id = id
         self.response_id = response_id
         self.previous_id = previous_id
         self.receive = receive
+        self.type = item.type if item is not None else "message"
+        self.name: Optional[str] = getattr(item, "name", None)
+        self.call_id: Optional[str] = getattr(item, "call_id", None)
+        self.audio_bytes = 0
+        self._transcript = _Accumulator()
+        self._text = _Accumulator()
+        self._arguments = _Accumulator()
+        self._iterated = False
+        self._done = asyncio.Event()
+        # Serializes reads, and holds messages read by _complete until the iterator gets to them
+        self._read_lock = asyncio.Lock()
+        self._read_ahead: deque[Optional[ServerEvent]] = deque()
+
+    @property
+    def audio_ms(self) -> float:
+        """Duration of the audio received for the item so far."""
+        return self.audio_bytes / PCM16_BYTES_PER_MS
+
+    def _accumulate(self, server_message: Optional[ServerEvent]) -> bool:
+        """Record the message in the item's results, False once the item is done."""
+        if server_message is None or server_message.type == "response.output_item.done":
+            self._done.set()
+            return False
+        match server_message.type:
+            case "response.audio.delta":
+                self.audio_bytes += base64_decoded_length(server_message.delta)
+            case "response.audio_transcript.delta":
+                self._transcript.append(server_message.delta)
+            case "response.text.delta":
+                self._text.append(server_message.delta)
+            case "response.function_call_arguments.delta":
+                self._arguments.append(server_message.delta)
+            case "response.audio_transcript.done":
+                self._transcript.replace(server_message.transcript)
+            case "response.text.done":
+                self._text.replace(server_message.text)
+            case "response.function_call_arguments.done":
+                self._arguments.replace(server_message.arguments)
+        return True
+
+    async def _read(self) -> Optional[ServerEvent]:
+        """The next message of the item for the iterator, None once it is done."""
+        self._iterated = True
+        async with self._read_lock:
+            if self._read_ahead:
+                return self._read_ahead.popleft()
+            if self._done.is_set():
+                return None
+            server_message = await self.receive()
+            return server_message if self._accumulate(server_message) else None
+
+    async def _complete(self):
+        while not self._done.is_set():
+            async with self._read_lock:
+                if self._done.is_set():
+                    break
+                server_message = await self.receive()
+                if not self._accumulate(server_message):
+                    server_message = None
+                if self._iterated:
+                    self._read_ahead.append(server_message)
+
+    async def transcript(self) -> str:
+        """The full audio transcript, once the item is done."""
+        await self._complete()
+        return self._transcript.value()
+
+    async def text(self) -> str:
+        """The full text, once the item is done."""
+        await self._complete()
+        return self._text.value()
+
+    async def arguments(self) -> str:
+        """The full function call arguments, once the item is done."""
+        await self._complete()
+        return self._arguments.value()
 
     def __aiter__(self) -> AsyncIterator[RTMessageContentChunk]:
         return self
@@ -241,8 +662,8 @@ class RTOutputItem:
         while True:
             # TODO: This loop is to allow ignoring some of the inner response messages,
             # next iteration should properly extract meaning out of them and expose via relevant abstractions.
-            server_message = await self.receive()
-            if server_message is None or server_message.type == "response.output_item.done":
+            server_message = await self._read()
+            if server_message is None:
                 raise StopAsyncIteration
             if server_message.type == "response.audio_transcript.delta":
                 return RTMessageContentChunk("audio_transcript", server_message.delta, server_message.content_index)
@@ -253,101 +674,109 @@ class RTOutputItem:
             elif server_message.type == "response.function_call_arguments.delta":
                 return RTMessageContentChunk("tool_call_arguments", server_message.delta, server_message.output_index)
 
+    async def audio(self, view: AudioView = "memoryview") -> AsyncIterator["memoryview | np.ndarray"]:
+        """Decoded PCM of each audio delta of the item, its other chunks are skipped.
+
+        Every delta is decoded once into a fresh buffer that is then only viewed, so slicing the
+        result into playback frames doesn't copy it either. The buffers aren't pooled: the standard
+        library can't decode base64 into existing storage, so reusing a buffer would add a copy
+        rather than save the allocation, and would change views a consumer still holds.
+        """
+        if view == "int16":
+            import numpy as np
+        while True:
+            server_message = await self._read()
+            if server_message is None:
+                return
+            if server_message.type == "response.audio.delta":
+                pcm = memoryview(binascii.a2b_base64(server_message.delta))
+                yield pcm if view == "memoryview" else np.frombuffer(pcm, dtype=np.int16)
+
 
 class RTResponse:
+    """A response, iterated as its output items.
+
+    The awaitable results are those of its output items once the response is done, see RTOutputItem.
+    Like there, output items read by awaiting them are kept for an iterator that was started.
+    """
+
     def __init__(
         self,
         id: str,
         previous_id: Optional[str],
-        receive: Callable[[], Awaitable[Optional[ServerMessageType]]],
+        receive: Callable[[], Awaitable[Optional[ServerEvent]]],
+        receive_item: Callable[[str], Awaitable[Optional[ServerEvent]]],
     ):
         self.id = id
         self.previous_id = previous_id
         self._receive = receive
-        self._response_queue = MessageQueue(lambda: self._receive_response_message(), self._response_message_classifier)
-        self._item_queue = MessageQueue(lambda: self._response_queue.receive("ITEM"), self._item_id_extractor)
-
-    async def _receive_response_message(self):
-        return await self._receive()
+        self._receive_item = receive_item
+        self.output_items: list[RTOutputItem] = []
+        self.status: Optional[str] = None
+        self.usage: Optional[Usage] = None
+        self._iterated = False
+        self._done = asyncio.Event()
+        self._read_lock = asyncio.Lock()
+        self._read_ahead: deque[RTOutputItem] = deque()
 
-    def _response_message_classifier(self, message: ServerMessageType | None) -> Optional[str]:
-        if not message:
-            return
-        if message.type in [
-            "response.done",
-            "response.output_item.added",
-        ]:
-            return "RESPONSE"
-        elif message.type in [
-            "conversation.item.created",
-            "conversation.item.truncated",
-            "conversation.item.deleted",
-            "response.output_item.done",
-            "response.content_part.added",
-            "response.content_part.done",
-            "response.audio_transcript.delta",
-            "response.audio_transcript.done",
-            "response.audio.delta",
-            "response.audio.done",
-            "response.function_call_arguments.delta",
-            "response.function_call_arguments.done",
-            "response.mcp_call_arguments.delta",
-            "response.mcp_call_arguments.done",
-            "mcp_list_tools.in_progress",
-            "mcp_list_tools.completed",
-            "mcp_list_tools.failed",
-            "response.mcp_call.in_progress",
-            "response.mcp_call.completed",
-            "response.text.delta",
-            "response.text.done",
-        ]:
-            return "ITEM"
-        return None
+    @property
+    def audio_ms(self) -> float:
+        """Duration of the audio received for the response so far."""
+        return sum(item.audio_ms for item in self.output_items)
 
-    def _item_id_extractor(self, message: ServerMessageType | None) -> Optional[str]:
-        if not message:
-            return
-        if message.type in [
-            "conversation.item.created",
-            "response.output_item.done",
-        ]:
-            return message.item.id
-        elif message.type in [
-            "conversation.item.truncated",
-            "conversation.item.deleted",
-            "response.content_part.added",
-            "response.content_part.done",
-            "response.audio_transcript.delta",
-            "response.audio_transcript.done",
-            "response.audio.delta",
-            "response.audio.done",
-            "response.function_call_arguments.delta",
-            "response.function_call_arguments.done",
-            "response.mcp_call_arguments.delta",
-            "response.mcp_call_arguments.done",
-            "mcp_list_tools.in_progress",
-            "mcp_list_tools.completed",
-            "mcp_list_tools.failed",
-            "response.mcp_call.in_progress",
-            "response.mcp_call.completed",
-            "response.text.delta",
-            "response.text.done",
-        ]:
-            return message.item_id
-        else:
+    def _handle(self, control_message: Optional[ServerEvent]) -> Optional[RTOutputItem]:
+        """Record the message, returns the output item it adds, None once the response is done."""
+        if control_message is None or control_message.type == "response.done":
+            if control_message is not None:
+                self.status = control_message.response.status
+                self.usage = control_message.response.usage
+            self._done.set()
             return None
+        if control_message.type == "response.output_item.added":
+            item_id = control_message.item.id
+            item = RTOutputItem(item_id, self.id, None, lambda: self._receive_item(item_id), control_message.item)
+            self.output_items.append(item)
+            return item
+        raise ValueError(f"Unexpected message type {control_message.type}")
+
+    async def _complete(self) -> list[RTOutputItem]:
+        while not self._done.is_set():
+            async with self._read_lock:
+                if self._done.is_set():
+                    break
+                item = self._handle(await self._receive())
+                if item is not None and self._iterated:
+                    self._read_ahead.append(item)
+        return self.output_items
+
+    async def transcript(self) -> str:
+        """The audio transcripts of all output items, once the response is done."""
+        return "".join([await item.transcript() for item in await self._complete()])
+
+    async def text(self) -> str:
+        """The text of all output items, once the response is done."""
+        return "".join([await item.text() for item in await self._complete()])
+
+    async def function_calls(self) -> list[RTFunctionCall]:
+        """The function calls of the response with their full arguments, once it is done."""
+        return [
+            RTFunctionCall(item.call_id, item.name, await item.arguments())
+            for item in await self._complete()
+            if item.type == "function_call"
+        ]
 
     def __aiter__(self) -> AsyncIterator[RTOutputItem]:
         return self
 
     async def __anext__(self):
-        control_message = await self._response_queue.receive("RESPONSE")
-        if control_message is None or control_message.type == "response.done":
+        self._iterated = True
+        async with self._read_lock:
+            if self._read_ahead:
+                return self._read_ahead.popleft()
+            item = None if self._done.is_set() else self._handle(await self._receive())
+        if item is None:
             raise StopAsyncIteration
-        if control_message.type == "response.output_item.added":
-            item_id = control_message.item.id
-            return RTOutputItem(item_id, self.id, None, lambda: self._item_queue.receive(item_id))
-        raise ValueError(f"Unexpected message type {control_message.type}")
+        return item
 
 
 class RTClient:
@@ -355,138 +784,120 @@ class RTClient:
         self,
         url: Optional[str] = None,
         model: Optional[str] = None,
+        decode_mode: DecodeMode = "strict",
+        codec: CodecName | JSONCodec = "auto",
+        audio_flush_interval_ms: float = 0,
+        audio_flush_bytes: int = 0,
+        record_path: Optional[str] = None,
+        retention: RetentionPolicy = DEFAULT_RETENTION,
+        budget: Optional[ContextBudget] = None,
     ):
 
-        self._client = RTLowLevelClient(url, model)
-
-        self._message_queue = MessageQueue(self._receive_message, self._message_id_extractor)
+        self._client = RTLowLevelClient(url, model, decode_mode, codec, record_path=record_path)
 
-        self._item_queue = MessageQueue(self._receive_item_message, self._item_id_extractor)
+        # Audio passed to send_audio is coalesced into appends on this budget, 0 sends it as is.
+        self._audio_coalescer = AudioCoalescer(audio_flush_interval_ms, audio_flush_bytes)
+        self._audio_flush_timer: Optional[asyncio.TimerHandle] = None
+        self._audio_flush_task: Optional[asyncio.Task] = None
 
-        self._response_map: dict[str, str] = {}
+        # Every server event is routed once, straight to the consumer that handles it, see rtclient.router
+        self._queue = MessageQueue(
+            self._receive_message, route_event, retention, is_terminal=is_terminal, observer=self._observe
+        )
+        self._broadcaster: Broadcaster[ServerEvent] = Broadcaster()
+        # The conversation as the server holds it, as far as the events read so far tell
+        self.conversation = ConversationIndex()
+        # Oldest items are deleted after every response to keep the conversation within budget
+        self.budget = budget
+        self.trim_metrics = TrimMetrics()
+        self._trim_lock = asyncio.Lock()
+        self._trim_task: Optional[asyncio.Task] = None
+        # Items a delete was sent for that the server has not confirmed yet, with the event id of the
+        # delete, and the other way around to match the errors of refused deletes
+        self._deleting: dict[str, str] = {}
+        self._delete_events: dict[str, str] = {}
         self._transcription_enabled = False
 
     async def _receive_message(self):
         async for message in self._client:
             return message
+        self._broadcaster.close()
         return None
 
-    def _message_id_extractor(self, message: ServerMessageType) -> Optional[str]:
-        if message.type in [
-            "session.created",
-            "input_audio_buffer.cleared",
-            "rate_limits.updated",
-            "error",
-        ]:
-            if message.type == "session.created":
-                print()
-            return "SESSION"
-        elif message.type in [
-            "input_audio_buffer.speech_started",
-            "response.created",
-        ]:
-            return "SESSION-ITEM"
-        elif message.type in [
-            "response.done",
-            "response.output_item.added",
-            "input_audio_buffer.speech_stopped",
-            "input_audio_buffer.committed",
-            "conversation.item.created",
-            "conversation.item.truncated",
-            "conversation.item.deleted",
-            "conversation.item.input_audio_transcription.completed",
-            "conversation.item.input_audio_transcription.failed",
-            "response.output_item.done",
-            "response.content_part.added",
-            "response.content_part.done",
-            "response.audio_transcript.delta",
-            "response.audio_transcript.done",
-            "response.audio.delta",
-            "response.audio.done",
-            "response.function_call_arguments.delta",
-            "response.function_call_arguments.done",
-            "response.mcp_call_arguments.delta",
-            "response.mcp_call_arguments.done",
-            "mcp_list_tools.in_progress",
-            "mcp_list_tools.completed",
-            "mcp_list_tools.failed",
-            "response.mcp_call.in_progress",
-            "response.mcp_call.completed",
-            "response.text.delta",
-            "response.text.done",
-        ]:
-            return "ITEM"
-        return None
+    def _observe(self, route: str, message: ServerEvent):
+        self.conversation.observe(message)
+        if message.type == "conversation.item.deleted":
+            self._forget_delete(message.item_id)
+        elif message.type == "error" and message.error.event_id in self._delete_events:
+            # Otherwise the item would stay excluded from the budget for the rest of the session
+            item_id = self._delete_events[message.error.event_id]
+            self._forget_delete(item_id)
+            self.trim_metrics.failed_deletes += 1
+            if message.error.code == "item_not_found":
+                self.conversation.remove(item_id)
+        elif message.type == "response.done" and self.budget is not None and self._trim_task is None:
+            self._trim_task = asyncio.create_task(self._trim_after_response(), name="trim_context")
+            self._trim_task.add_done_callback(_log_failure)
+        if not self._broadcaster:
+            return
+        if message.type == "response.output_item.added":
+            self._broadcaster.link(item_route(message.item.id), route)
+        self._broadcaster.publish(route, message, is_terminal(message))
 
-    async def _receive_item_message(self):
-        return await self._message_queue.receive("ITEM")
-
-    def _item_id_extractor(self, message: ServerMessageType) -> Optional[str]:
-        match message.type:
-            case "response.done":
-                return message.response.id
-            case "response.output_item.added":
-                self._response_map[message.item.id] = message.response_id
-                return message.response_id
-            case "input_audio_buffer.speech_stopped":
-                return message.item_id
-            case "input_audio_buffer.committed":
-                return message.item_id
-            case "conversation.item.created":
-                if message.item.id in self._response_map:
-                    return self._response_map[message.item.id]
-                return message.item.id
-            case "conversation.item.truncated":
-                if message.item_id in self._response_map:
-                    return self._response_map[message.item_id]
-                return message.item_id
-            case "conversation.item.deleted":
-                if message.item_id in self._response_map:
-                    return self._response_map[message.item_id]
-                return message.item_id
-            case "conversation.item.input_audio_transcription.completed":
-                return message.item_id
-            case "conversation.item.input_audio_transcription.failed":
-                return message.item_id
-            case "response.output_item.done":
-                self._response_map.pop(message.item.id, None)
-                return message.response_id
-            case "response.content_part.added":
-                return message.response_id
-            case "response.content_part.done":
-                return message.response_id
-            case "response.audio_transcript.delta":
-                return message.response_id
-            case "mcp_list_tools.in_progress":
-                return message.item_id
-            case "mcp_list_tools.completed":
-                return message.item_id
-            case "mcp_list_tools.failed":
-                return message.item_id
-            case "response.mcp_call_arguments.done":
-                return message.response_id
-            case "response.mcp_call_arguments.delta":
-                return message.response_id
-            case "response.mcp_call.in_progress":
-                return message.item_id
-            case "response.mcp_call.completed":
-                return message.item_id
-            case "response.audio_transcript.done":
-                return message.response_id
-            case "response.audio.delta":
-                return message.response_id
-            case "response.audio.done":
-                return message.response_id
-            case "response.function_call_arguments.delta":
-                return message.response_id
-            case "response.function_call_arguments.done":
-                return message.response_id
-            case "response.text.delta":
-                return message.response_id
-            case "response.text.done":
-                return message.response_id
-            case _:
-                return None
+    def _receive_item(self, item_id: str) -> Awaitable[Optional[ServerEvent]]:
+        return self._queue.receive(item_route(item_id))
+
+    def _forget_delete(self, item_id: str):
+        event_id = self._deleting.pop(item_id, None)
+        if event_id is not None:
+            del self._delete_events[event_id]
+
+    async def _trim_after_response(self):
+        try:
+            await self.trim_context()
+        finally:
+            self._trim_task = None
+
+    async def trim_context(self) -> list[ConversationEntry]:
+        """Delete the oldest items when the conversation is over budget, returns the entries deleted.
+
+        Runs on its own after every response and before generate_response, the server confirms
+        each delete with conversation.item.deleted or refuses it with an error for its event id.
+        """
+        budget = self.budget
+        if budget is None:
+            return []
+        async with self._trim_lock:
+            trimmed = select_trimmed(self.conversation, budget, self._deleting)
+            if not trimmed:
+                return []
+            metrics = self.trim_metrics
+            if budget.summarize is not None:
+                summary = budget.summarize(trimmed)
+                if inspect.isawaitable(summary):
+                    summary = await summary
+                if summary:
+                    # Inserted after the last item it replaces, so it takes their place once they are deleted
+                    await self._client.send(
+                        ItemCreateMessage(
+                            previous_item_id=trimmed[-1].id,
+                            item=ClientSystemMessageItem(content=[InputTextContentPart(text=summary)]),
+                        )
+                    )
+                    metrics.summaries += 1
+            for entry in trimmed:
+                event_id = f"event_{uuid.uuid4().hex}"
+                self._deleting[entry.id] = event_id
+                self._delete_events[event_id] = entry.id
+                try:
+                    await self._client.send(ItemDeleteMessage(event_id=event_id, item_id=entry.id))
+                except BaseException:
+                    self._forget_delete(entry.id)
+                    raise
+            metrics.trims += 1
+            metrics.deleted_items += len(trimmed)
+            metrics.deleted_tokens += sum(entry.tokens for entry in trimmed)
+            return trimmed
 
     async def configure(
         self,
@@ -524,31 +935,67 @@ class RTClient:
         )
 
     async def send_audio(self, audio: bytes):
-        base64_encoded = base64.b64encode(audio).decode("utf-8")
-        await self._client.send(InputAudioBufferAppendMessage(audio=base64_encoded))
+        audio_to_send = self._audio_coalescer.add(audio)
+        if audio_to_send is not None:
+            self._cancel_audio_flush()
+            await self._append_audio(audio_to_send)
+        elif self._audio_flush_timer is None:
+            delay = self._audio_coalescer.time_until_flush()
+            self._audio_flush_timer = asyncio.get_running_loop().call_later(delay, self._flush_audio_later)
+
+    def _flush_audio_later(self):
+        self._audio_flush_timer = None
+        task = asyncio.create_task(self.flush_audio(), name="flush_audio")
+        self._audio_flush_task = task
+        task.add_done_callback(_log_failure)
+        task.add_done_callback(self._audio_flush_done)
+
+    def _audio_flush_done(self, task: asyncio.Task):
+        if self._audio_flush_task is task:
+            self._audio_flush_task = None
+
+    async def flush_audio(self):
+        """Send any audio still buffered by the coalescing budget."""
+        self._cancel_audio_flush()
+        audio = self._audio_coalescer.flush()
+        if audio is not None:
+            await self._append_audio(audio)
+
+    async def _append_audio(self, audio: bytes):
+        self.conversation.append_input_audio(len(audio) / PCM16_BYTES_PER_MS)
+        await self._client.send_audio_append(audio)
+
+    def _cancel_audio_flush(self):
+        if self._audio_flush_timer is not None:
+            self._audio_flush_timer.cancel()
+            self._audio_flush_timer = None
 
     async def commit_audio(self):
-        await self._client.send(InputAudioBufferCommitMessage())
+        await self.flush_audio()
+        await self._client.send_audio_commit()
 
     async def clear_audio(self):
-        await self._client.send(InputAudioBufferClearMessage())
+        self._cancel_audio_flush()
+        self._audio_coalescer.flush()
+        await self._client.send_audio_clear()
 
     async def send_item(self, item: models.ClientItem):
         await self._client.send(ItemCreateMessage(item=item))
 
     async def generate_response(self):
-        await self._client.send(ResponseCreateMessage())
+        await self.trim_context()
+        await self._client.send_response_create()
 
     async def control_messages(self) -> AsyncIterable[ServerMessageType]:
         while True:
-            message = await self._message_queue.receive("SESSION")
+            message = await self._queue.receive(CONTROL)
             if message is None:
                 break
             yield message
 
     async def items(self) -> AsyncIterable[RTInputItem | RTResponse]:
         while True:
-            message = await self._message_queue.receive("SESSION-ITEM")
+            message = await self._queue.receive(ITEMS)
             if message is None:
                 break
             elif message.type == "input_audio_buffer.speech_started":
@@ -557,18 +1004,67 @@ class RTClient:
                     item_id,
                     message.audio_start_ms,
                     self._transcription_enabled,
-                    lambda: self._item_queue.receive(item_id),
+                    lambda: self._receive_item(item_id),
                 )
             elif message.type == "response.created":
                 response_id = message.response.id
-                yield RTResponse(response_id, None, lambda: self._item_queue.receive(response_id))
+                yield RTResponse(
+                    response_id,
+                    None,
+                    lambda: self._queue.receive(response_route(response_id)),
+                    self._receive_item,
+                )
             else:
                 raise ValueError(f"Unexpected message type {message.type}")
 
+    def subscribe(
+        self,
+        target: Optional[RTInputItem | RTResponse | RTOutputItem] = None,
+        max_buffered: int = DEFAULT_SUBSCRIPTION_BUFFER,
+        policy: SlowConsumerPolicy = "drop_oldest",
+    ) -> Subscription[ServerEvent]:
+        """Observe the events of an item or response, or the control messages, next to their consumer.
+
+        The subscription gets a copy of every event for target that its consumer has not read yet,
+        for a response including the events of its output items, without taking them from the
+        consumer. Subscribing right after target is yielded sees all of its events. Events are
+        read from the connection as the client is iterated, a subscription never paces that.
+        """
+        routes: list[str] = []
+        backlog: list[ServerEvent] = []
+
+        def add(route: str) -> list[ServerEvent]:
+            stored = self._queue.stored(route)
+            backlog.extend(stored)
+            # A route whose terminal event is stored already has nothing more coming
+            if not stored or not is_terminal(stored[-1]):
+                routes.append(route)
+            return stored
+
+        if target is None:
+            add(CONTROL)
+        elif isinstance(target, RTResponse):
+            for message in add(response_route(target.id)):
+                if message.type == "response.output_item.added":
+                    add(item_route(message.item.id))
+        else:
+            add(item_route(target.id))
+        return self._broadcaster.subscribe(routes, max_buffered, policy, backlog)
+
+    @property
+    def retention_metrics(self) -> dict[str, RetentionMetrics]:
+        """Stored and evicted message counts of the routed events."""
+        return {"events": self._queue.metrics}
+
     async def connect(self):
         await self._client.connect()
 
     async def close(self):
+        self._cancel_audio_flush()
+        if self._audio_flush_task is not None:
+            self._audio_flush_task.cancel()
+        if self._trim_task is not None:
+            self._trim_task.cancel()
         await self._client.close()
 
     async def __aenter__(self):
@@ -591,6 +1087,7 @@ __all__ = [
     "MessageRole",
     "InputAudioTranscription",
     "ClientMessageBase",
+    "DecodeMode",
     "Temperature",
     "ToolsDefinition",
     "SessionUpdateParams",
@@ -663,5 +1160,35 @@ __all__ = [
     "RateLimitsUpdatedMessage",
     "UserMessageType",
     "ServerMessageType",
+    "ServerEvent",
     "create_server_message_from_dict",
+    "CodecName",
+    "JSONCodec",
+    "get_codec",
+    "sniff_event_type",
+    "AudioAppendEncoder",
+    "AudioPolicy",
+    "Lane",
+    "LaneMetrics",
+    "UnsubscribedPolicy",
+    "RetentionPolicy",
+    "RetentionMetrics",
+    "DEFAULT_RETENTION",
+    "SlowConsumerPolicy",
+    "Subscription",
+    "SubscriptionMetrics",
+    "DEFAULT_SUBSCRIPTION_BUFFER",
+    "AudioView",
+    "ConversationIndex",
+    "ConversationEntry",
+    "ContextBudget",
+    "TrimMetrics",
+    "summarize_transcript",
+    "RTFunctionCall",
+    "PCM16_BYTES_PER_MS",
+    "DeltaRecord",
+    "AudioDeltaRecord",
+    "AudioTranscriptDeltaRecord",
+    "TextDeltaRecord",
+    "FunctionCallArgumentsDeltaRecord",
 ]
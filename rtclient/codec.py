@@ -0,0 +1,169 @@
+"""
+JSON codecs and frame helpers for the websocket frames sent and received by RTLowLevelClient.
+
+The stdlib json module is always available, orjson and msgspec are used when installed.
+"auto" picks the fastest installed backend.
+"""
+
+import binascii
+import json
+from typing import Any, Literal, Optional, Union
+
+from pydantic import BaseModel
+
+CodecName = Literal["auto", "stdlib", "orjson", "msgspec"]
+
+
+class JSONCodec:
+    """Encodes and decodes text frames using the stdlib json module."""
+
+    name: str = "stdlib"
+
+    def loads(self, frame: Union[str, bytes]) -> Any:
+        return json.loads(frame)
+
+    def dumps(self, data: Any) -> str:
+        return json.dumps(data, separators=(",", ":"))
+
+    def dumps_model(self, message: BaseModel) -> str:
+        """Serialize a client message, None fields are left out as the API expects."""
+        # pydantic-core serializes straight to JSON in rust, which is faster than going through
+        # model_dump and any of the python level backends.
+        return message.model_dump_json(exclude_none=True)
+
+
+class OrjsonCodec(JSONCodec):
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self._orjson = orjson
+
+    def loads(self, frame: Union[str, bytes]) -> Any:
+        return self._orjson.loads(frame)
+
+    def dumps(self, data: Any) -> str:
+        return self._orjson.dumps(data).decode("utf-8")
+
+
+class MsgspecCodec(JSONCodec):
+    name = "msgspec"
+
+    def __init__(self):
+        import msgspec
+
+        self._decoder = msgspec.json.Decoder()
+        self._encoder = msgspec.json.Encoder()
+
+    def loads(self, frame: Union[str, bytes]) -> Any:
+        return self._decoder.decode(frame)
+
+    def dumps(self, data: Any) -> str:
+        return self._encoder.encode(data).decode("utf-8")
+
+
+_CODEC_CLASSES: dict[str, type[JSONCodec]] = {
+    "stdlib": JSONCodec,
+    "orjson": OrjsonCodec,
+    "msgspec": MsgspecCodec,
+}
+
+# Preference order for "auto"
+_AUTO_ORDER = ("orjson", "msgspec", "stdlib")
+
+
+def get_codec(codec: Union[CodecName, JSONCodec] = "auto") -> JSONCodec:
+    """Resolve a codec name to an instance, "auto" falls back to stdlib when nothing faster is installed.
+
+    Raises ImportError when a specific backend is requested but not installed.
+    """
+    if isinstance(codec, JSONCodec):
+        return codec
+    if codec == "auto":
+        for name in _AUTO_ORDER:
+            try:
+                return _CODEC_CLASSES[name]()
+            except ImportError:
+                continue
+    if codec not in _CODEC_CLASSES:
+        raise ValueError(f"Unknown codec {codec}")
+    return _CODEC_CLASSES[codec]()
+
+
+# Client events without parameters, encoded once.
+CONSTANT_FRAMES: dict[str, bytes] = {
+    event_type: b'{"type":"' + event_type.encode("ascii") + b'"}'
+    for event_type in (
+        "input_audio_buffer.commit",
+        "input_audio_buffer.clear",
+        "response.create",
+        "response.cancel",
+    )
+}
+
+_AUDIO_APPEND_PREFIX = b'{"type":"input_audio_buffer.append","audio":"'
+_AUDIO_APPEND_SUFFIX = b'"}'
+
+
+class AudioAppendEncoder:
+    """Builds input_audio_buffer.append frames from raw pcm without pydantic or JSON string escaping.
+
+    The base64 alphabet never needs escaping, so the encoded audio is spliced into a pre-built
+    template. The returned frame is a buffer that's reused by the next encode call.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray(_AUDIO_APPEND_PREFIX)
+
+    def encode(self, pcm: Union[bytes, bytearray, memoryview]) -> bytearray:
+        buffer = self._buffer
+        del buffer[len(_AUDIO_APPEND_PREFIX) :]
+        buffer += binascii.b2a_base64(pcm, newline=False)
+        buffer += _AUDIO_APPEND_SUFFIX
+        return buffer
+
+
+def base64_decoded_length(data: str) -> int:
+    """Number of bytes the base64 string decodes to, without decoding it."""
+    return len(data) * 3 // 4 - data.endswith("=") - data.endswith("==")
+
+
+def sniff_event_type(frame: str) -> Optional[str]:
+    """Cheaply read the top level "type" of an encoded event without decoding it.
+
+    Returns None when the type can't be determined safely, e.g. when "type" is not among the
+    top level keys that precede the first nested object, in which case the frame should be fully decoded.
+    """
+    open_index = frame.find("{")
+    if open_index == -1:
+        return None
+    start = open_index + 1
+    while True:
+        index = frame.find('"type"', start)
+        if index == -1:
+            return None
+        # Any nested container before the match means it may not be a top level key.
+        if frame.find("{", open_index + 1, index) != -1 or frame.find("[", open_index + 1, index) != -1:
+            return None
+        cursor = _skip_whitespace(frame, index + 6)
+        if cursor >= len(frame) or frame[cursor] != ":":
+            # "type" was a string value rather than a key, keep looking.
+            start = index + 6
+            continue
+        cursor = _skip_whitespace(frame, cursor + 1)
+        if cursor >= len(frame) or frame[cursor] != '"':
+            return None
+        end = frame.find('"', cursor + 1)
+        if end == -1:
+            return None
+        event_type = frame[cursor + 1 : end]
+        if "\\" in event_type:
+            return None
+        return event_type
+
+
+def _skip_whitespace(frame: str, cursor: int) -> int:
+    while cursor < len(frame) and frame[cursor] in " \t\r\n":
+        cursor += 1
+    return cursor
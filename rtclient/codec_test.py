@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+from benchmarks.events import session_mix_frames
+from rtclient.codec import _CODEC_CLASSES, JSONCodec, get_codec
+from rtclient.models import InputAudioBufferAppendMessage, SessionUpdateMessage, SessionUpdateParams
+
+
+def available_codecs() -> list[str]:
+    names = []
+    for name in _CODEC_CLASSES:
+        try:
+            get_codec(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+@pytest.mark.parametrize("name", available_codecs())
+def test_codec_round_trips_session_frames(name):
+    codec = get_codec(name)
+    for frame in set(session_mix_frames()):
+        data = codec.loads(frame)
+        assert data == json.loads(frame)
+        assert json.loads(codec.dumps(data)) == data
+
+
+@pytest.mark.parametrize("name", available_codecs())
+def test_codec_dumps_model_excludes_none(name):
+    codec = get_codec(name)
+    message = SessionUpdateMessage(session=SessionUpdateParams(voice="marin", modalities={"audio"}))
+
+    assert json.loads(codec.dumps_model(message)) == {
+        "type": "session.update",
+        "session": {"voice": "marin", "modalities": ["audio"]},
+    }
+    assert json.loads(codec.dumps_model(InputAudioBufferAppendMessage(audio="AAAA"))) == {
+        "type": "input_audio_buffer.append",
+        "audio": "AAAA",
+    }
+
+
+def test_get_codec():
+    codec = JSONCodec()
+    assert get_codec(codec) is codec
+    assert get_codec("auto").name in available_codecs()
+    with pytest.raises(ValueError):
+        get_codec("yaml")
@@ -0,0 +1,290 @@
+"""Local mirror of the server side conversation, kept current from the server events RTClient routes.
+
+Items are linked in conversation order by previous_item_id and indexed by id, so lookups, inserts
+and deletes are O(1). Every item carries an estimate of its audio duration and of the input
+tokens it costs each following response, which a ContextBudget keeps in bounds by deleting the
+oldest items.
+"""
+
+import math
+from collections.abc import Awaitable, Callable, Collection, Iterator
+from dataclasses import dataclass
+from typing import Optional
+
+from rtclient.codec import base64_decoded_length
+from rtclient.models import ResponseItem, ServerEvent
+
+# Rough token costs used for the estimates: about 4 characters of text per token, user audio
+# at about 10 tokens and assistant audio at about 20 tokens per second.
+CHARS_PER_TOKEN = 4
+USER_AUDIO_MS_PER_TOKEN = 100
+ASSISTANT_AUDIO_MS_PER_TOKEN = 50
+# Output audio is pcm16 mono at 24kHz, audio durations are derived from the decoded byte count.
+PCM16_BYTES_PER_MS = 48
+
+
+@dataclass
+class ConversationEntry:
+    id: str
+    type: str
+    role: Optional[str] = None
+    status: Optional[str] = None
+    item: Optional[ResponseItem] = None
+    previous_id: Optional[str] = None
+    next_id: Optional[str] = None
+    text: str = ""
+    audio_ms: float = 0
+    truncated: bool = False
+
+    @property
+    def tokens(self) -> int:
+        """Estimated input tokens of the item."""
+        ms_per_token = ASSISTANT_AUDIO_MS_PER_TOKEN if self.role == "assistant" else USER_AUDIO_MS_PER_TOKEN
+        return math.ceil(len(self.text) / CHARS_PER_TOKEN) + math.ceil(self.audio_ms / ms_per_token)
+
+
+@dataclass
+class ContextBudget:
+    """Input token budget of the conversation, see RTClient's budget.
+
+    Once the estimated tokens of the conversation exceed max_tokens, the oldest items are deleted
+    until it is back under target_tokens, 3/4 of max_tokens by default, so trimming happens every
+    few turns rather than every turn. The last keep_last items are never deleted. summarize, when
+    set, is given the items about to be deleted and returns the text of a system message put in
+    their place, or None to skip it.
+    """
+
+    max_tokens: int
+    target_tokens: Optional[int] = None
+    keep_last: int = 4
+    summarize: Optional[Callable[[list[ConversationEntry]], Optional[str] | Awaitable[Optional[str]]]] = None
+
+    @property
+    def target(self) -> int:
+        return self.target_tokens if self.target_tokens is not None else self.max_tokens * 3 // 4
+
+
+@dataclass
+class TrimMetrics:
+    trims: int = 0
+    deleted_items: int = 0
+    deleted_tokens: int = 0
+    summaries: int = 0
+    # Deletes the server answered with an error
+    failed_deletes: int = 0
+
+
+def select_trimmed(
+    index: "ConversationIndex", budget: ContextBudget, deleting: Collection[str] = ()
+) -> list[ConversationEntry]:
+    """The oldest entries to delete to bring the conversation under budget, skipping those in deleting."""
+    tokens = index.tokens - sum(index[item_id].tokens for item_id in deleting if item_id in index)
+    if tokens <= budget.max_tokens:
+        return []
+    entries = [entry for entry in index if entry.id not in deleting]
+    trimmed: list[ConversationEntry] = []
+    for entry in entries[: max(len(entries) - budget.keep_last, 0)]:
+        # A function call goes together with its output
+        if tokens <= budget.target and (not trimmed or trimmed[-1].type != "function_call"):
+            break
+        if entry.status == "in_progress":
+            break
+        trimmed.append(entry)
+        tokens -= entry.tokens
+    # Stopped before the output of the last call, by keep_last or an item still in progress
+    if trimmed and trimmed[-1].type == "function_call":
+        trimmed.pop()
+    return trimmed
+
+
+def summarize_transcript(entries: list[ConversationEntry], max_chars: int = 600) -> Optional[str]:
+    """Summary keeping the start of the latest messages of entries, within max_chars overall."""
+    lines = [f"{entry.role}: {entry.text}" for entry in entries if entry.type == "message" and entry.text]
+    if not lines:
+        return None
+    # At least 40 characters of each message that is kept
+    lines = lines[-max(max_chars // 40, 1) :]
+    per_line = max_chars // len(lines)
+    clipped = [line if len(line) <= per_line else line[: per_line - 3] + "..." for line in lines]
+    return "Earlier in the conversation:\n" + "\n".join(clipped)
+
+
+def _item_text(item: ResponseItem) -> str:
+    match item.type:
+        case "message":
+            return "".join(getattr(part, "text", None) or getattr(part, "transcript", None) or "" for part in item.content)
+        case "function_call":
+            return item.name + item.arguments
+        case "function_call_output":
+            return item.output
+    return ""
+
+
+class ConversationIndex:
+    """The items of the conversation in order, by id, with running totals of their estimates."""
+
+    def __init__(self):
+        self._entries: dict[str, ConversationEntry] = {}
+        self.first_id: Optional[str] = None
+        self.last_id: Optional[str] = None
+        self.tokens = 0
+        # Audio durations seen before their item was created
+        self._speech_started: dict[str, int] = {}
+        self._pending_audio_ms: dict[str, float] = {}
+        # Input audio sent since the last commit, for items committed without server VAD
+        self._input_audio_ms = 0.0
+        self._handlers = {
+            "input_audio_buffer.speech_started": self._speech_start,
+            "input_audio_buffer.speech_stopped": self._speech_stop,
+            "input_audio_buffer.committed": self._committed,
+            "input_audio_buffer.cleared": self._cleared,
+            "conversation.item.created": self._created,
+            "response.output_item.done": self._output_item_done,
+            "conversation.item.truncated": self._truncated,
+            "conversation.item.deleted": self._deleted,
+            "conversation.item.input_audio_transcription.completed": self._transcribed,
+            "response.audio.delta": self._audio_delta,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._entries
+
+    def __getitem__(self, item_id: str) -> ConversationEntry:
+        return self._entries[item_id]
+
+    def get(self, item_id: str) -> Optional[ConversationEntry]:
+        return self._entries.get(item_id)
+
+    def __iter__(self) -> Iterator[ConversationEntry]:
+        item_id = self.first_id
+        while item_id is not None:
+            entry = self._entries[item_id]
+            yield entry
+            item_id = entry.next_id
+
+    @property
+    def audio_ms(self) -> float:
+        return sum(entry.audio_ms for entry in self._entries.values())
+
+    def transcript(self) -> list[tuple[str, str]]:
+        """Role and text of every message in conversation order."""
+        return [(entry.role, entry.text) for entry in self if entry.type == "message" and entry.role is not None]
+
+    def append_input_audio(self, audio_ms: float):
+        """Count input audio as it is sent, it becomes the duration of the user item it is committed as."""
+        self._input_audio_ms += audio_ms
+
+    def observe(self, message: ServerEvent):
+        handler = self._handlers.get(message.type)
+        if handler is not None:
+            handler(message)
+
+    def _update(self, entry: ConversationEntry, text: Optional[str] = None, audio_ms: Optional[float] = None):
+        before = entry.tokens
+        if text is not None:
+            entry.text = text
+        if audio_ms is not None:
+            entry.audio_ms = audio_ms
+        self.tokens += entry.tokens - before
+
+    def _insert(self, entry: ConversationEntry, previous_id: Optional[str]):
+        entries = self._entries
+        # An item whose predecessor is unknown, e.g. one from before the index was created, goes last
+        if previous_id is not None and previous_id not in entries:
+            previous_id = self.last_id
+        entry.previous_id = previous_id
+        entry.next_id = entries[previous_id].next_id if previous_id is not None else self.first_id
+        if previous_id is None:
+            self.first_id = entry.id
+        else:
+            entries[previous_id].next_id = entry.id
+        if entry.next_id is None:
+            self.last_id = entry.id
+        else:
+            entries[entry.next_id].previous_id = entry.id
+        entries[entry.id] = entry
+        self.tokens += entry.tokens
+
+    def _speech_start(self, message: ServerEvent):
+        self._speech_started[message.item_id] = message.audio_start_ms
+
+    def _speech_stop(self, message: ServerEvent):
+        start = self._speech_started.pop(message.item_id, message.audio_end_ms)
+        self._pending_audio_ms[message.item_id] = message.audio_end_ms - start
+
+    def _committed(self, message: ServerEvent):
+        # The speech duration from server VAD is more precise than the whole buffer
+        self._pending_audio_ms.setdefault(message.item_id, self._input_audio_ms)
+        self._input_audio_ms = 0
+
+    def _cleared(self, message: ServerEvent):
+        self._input_audio_ms = 0
+
+    def _created(self, message: ServerEvent):
+        existing = self._entries.get(message.item.id)
+        if existing is not None:
+            self._set_item(existing, message.item)
+        else:
+            self._add(message.item, message.previous_item_id)
+
+    def _add(self, item: ResponseItem, previous_id: Optional[str]):
+        entry = ConversationEntry(item.id, item.type, getattr(item, "role", None), item.status, item)
+        entry.text = _item_text(item)
+        entry.audio_ms = self._pending_audio_ms.pop(item.id, 0)
+        self._insert(entry, previous_id)
+
+    def _set_item(self, entry: ConversationEntry, item: ResponseItem):
+        entry.item = item
+        entry.status = item.status
+        text = _item_text(item)
+        # The item in a later event can lack a transcript the index already has
+        if text or entry.type != "message":
+            self._update(entry, text=text)
+
+    def _output_item_done(self, message: ServerEvent):
+        entry = self._entries.get(message.item.id)
+        if entry is None:
+            self._add(message.item, self.last_id)
+        elif not entry.truncated:
+            self._set_item(entry, message.item)
+
+    def _truncated(self, message: ServerEvent):
+        entry = self._entries.get(message.item_id)
+        if entry is not None:
+            entry.truncated = True
+            # The server drops the transcript of truncated audio
+            self._update(entry, text="", audio_ms=message.audio_end_ms)
+
+    def _deleted(self, message: ServerEvent):
+        self.remove(message.item_id)
+
+    def remove(self, item_id: str):
+        """Forget the item, e.g. one the server turned out not to have."""
+        entry = self._entries.pop(item_id, None)
+        if entry is None:
+            return
+        if entry.previous_id is None:
+            self.first_id = entry.next_id
+        else:
+            self._entries[entry.previous_id].next_id = entry.next_id
+        if entry.next_id is None:
+            self.last_id = entry.previous_id
+        else:
+            self._entries[entry.next_id].previous_id = entry.previous_id
+        self.tokens -= entry.tokens
+
+    def _transcribed(self, message: ServerEvent):
+        entry = self._entries.get(message.item_id)
+        if entry is not None:
+            self._update(entry, text=message.transcript)
+
+    def _audio_delta(self, message: ServerEvent):
+        audio_ms = base64_decoded_length(message.delta) / PCM16_BYTES_PER_MS
+        entry = self._entries.get(message.item_id)
+        if entry is None:
+            self._pending_audio_ms[message.item_id] = self._pending_audio_ms.get(message.item_id, 0) + audio_ms
+        elif not entry.truncated:
+            self._update(entry, audio_ms=entry.audio_ms + audio_ms)
@@ -0,0 +1,152 @@
+import asyncio
+
+import pytest
+
+from rtclient import InputAudioTranscription, InputTextContentPart, RTClient, ServerVAD, create_server_message_from_dict
+from rtclient.conversation import ContextBudget, ConversationIndex, select_trimmed, summarize_transcript
+from rtclient.models import ClientUserMessageItem
+from rtclient.util.mock_server import MockRealtimeServer, MockResponse, silence, tone
+
+
+def event(type: str, **data) -> dict:
+    return {"type": type, "event_id": "event_1", **data}
+
+
+def message_item(id: str, role: str, text: str) -> dict:
+    return {"id": id, "object": "realtime.item", "type": "message", "status": "completed", "role": role, "content": [{"type": "input_text" if role == "user" else "text", "text": text}]}
+
+
+def observe(index: ConversationIndex, *events: dict):
+    for data in events:
+        index.observe(create_server_message_from_dict(data))
+
+
+def test_index_follows_item_events():
+    index = ConversationIndex()
+    observe(
+        index,
+        event("conversation.item.created", previous_item_id=None, item=message_item("item_1", "user", "Hello there")),
+        event("conversation.item.created", previous_item_id="item_1", item=message_item("item_3", "assistant", "Hi")),
+        # Inserted between the two
+        event("conversation.item.created", previous_item_id="item_1", item=message_item("item_2", "user", "Are you there?")),
+        event("conversation.item.created", previous_item_id="item_unknown", item=message_item("item_4", "user", "Bye")),
+    )
+    assert [entry.id for entry in index] == ["item_1", "item_2", "item_3", "item_4"]
+    assert index["item_3"].previous_id == "item_2"
+    assert index.tokens == sum(entry.tokens for entry in index) == 3 + 4 + 1 + 1
+
+    observe(index, event("conversation.item.deleted", item_id="item_2"), event("conversation.item.deleted", item_id="item_4"))
+    assert [entry.id for entry in index] == ["item_1", "item_3"]
+    assert index.last_id == "item_3" and index["item_3"].previous_id == "item_1"
+    assert index.tokens == 3 + 1
+
+    observe(index, event("conversation.item.truncated", item_id="item_3", content_index=0, audio_end_ms=1000))
+    assert index["item_3"].truncated
+    assert index["item_3"].tokens == 1000 // 50
+    assert index.tokens == 3 + 20
+    assert index.transcript() == [("user", "Hello there"), ("assistant", "")]
+
+
+@pytest.mark.asyncio
+async def test_index_mirrors_session(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    async with MockRealtimeServer([MockResponse(transcript="Hi there", audio_ms=600)], speed=0) as server:
+        async with RTClient(url=server.url) as client:
+            await client.configure(
+                turn_detection=ServerVAD(silence_duration_ms=200),
+                input_audio_transcription=InputAudioTranscription(model="whisper-1"),
+            )
+            for chunk in (tone(300), silence(300)):
+                await client.send_audio(chunk)
+            items = client.items()
+            await asyncio.wait_for(await anext(items), 5)
+            response = await asyncio.wait_for(anext(items), 5)
+            await asyncio.wait_for(response.transcript(), 5)
+
+    user, assistant = client.conversation
+    assert (user.role, user.text, user.audio_ms) == ("user", server.user_transcript, 500)
+    assert (assistant.role, assistant.text, assistant.audio_ms) == ("assistant", "Hi there", 600)
+    assert client.conversation.tokens == user.tokens + assistant.tokens
+
+
+def test_select_trimmed_keeps_recent_items_and_call_outputs():
+    index = ConversationIndex()
+    call = {"id": "item_2", "object": "realtime.item", "type": "function_call", "status": "completed", "name": "f", "call_id": "call_1", "arguments": "{}"}
+    output = {"id": "item_3", "object": "realtime.item", "type": "function_call_output", "status": "completed", "call_id": "call_1", "output": "x" * 40}
+    observe(
+        index,
+        event("conversation.item.created", previous_item_id=None, item=message_item("item_1", "user", "x" * 40)),
+        event("conversation.item.created", previous_item_id="item_1", item=call),
+        event("conversation.item.created", previous_item_id="item_2", item=output),
+        event("conversation.item.created", previous_item_id="item_3", item=message_item("item_4", "assistant", "x" * 40)),
+        event("conversation.item.created", previous_item_id="item_4", item=message_item("item_5", "user", "x" * 40)),
+    )
+    assert index.tokens == 10 + 1 + 10 + 10 + 10
+    assert select_trimmed(index, ContextBudget(max_tokens=41)) == []
+    # Under target after the call, its output goes with it
+    trimmed = select_trimmed(index, ContextBudget(max_tokens=40, target_tokens=30, keep_last=1))
+    assert [entry.id for entry in trimmed] == ["item_1", "item_2", "item_3"]
+    # keep_last keeps the output, so the call stays too
+    assert [entry.id for entry in select_trimmed(index, ContextBudget(max_tokens=10, keep_last=3))] == ["item_1"]
+    assert [entry.id for entry in select_trimmed(index, ContextBudget(max_tokens=10, keep_last=1), deleting={"item_1"})] == ["item_2", "item_3", "item_4"]
+    assert summarize_transcript(trimmed) == "Earlier in the conversation:\nuser: " + "x" * 40
+
+
+def test_select_trimmed_keeps_a_call_whose_output_is_in_progress():
+    index = ConversationIndex()
+    call = {"id": "item_2", "object": "realtime.item", "type": "function_call", "status": "completed", "name": "f", "call_id": "call_1", "arguments": "{}"}
+    output = {"id": "item_3", "object": "realtime.item", "type": "function_call_output", "status": "in_progress", "call_id": "call_1", "output": "x" * 40}
+    observe(
+        index,
+        event("conversation.item.created", previous_item_id=None, item=message_item("item_1", "user", "x" * 40)),
+        event("conversation.item.created", previous_item_id="item_1", item=call),
+        event("conversation.item.created", previous_item_id="item_2", item=output),
+        event("conversation.item.created", previous_item_id="item_3", item=message_item("item_4", "assistant", "x" * 40)),
+    )
+    assert [entry.id for entry in select_trimmed(index, ContextBudget(max_tokens=10, keep_last=0))] == ["item_1"]
+
+
+@pytest.mark.asyncio
+async def test_client_trims_conversation_to_budget(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    budget = ContextBudget(max_tokens=100, keep_last=2, summarize=lambda entries: summarize_transcript(entries, max_chars=80))
+    async with MockRealtimeServer([MockResponse(transcript="y" * 40, audio_ms=0)], speed=0) as server:
+        async with RTClient(url=server.url, budget=budget) as client:
+            await client.configure(modalities={"text"})
+            items = client.items()
+            input_tokens = []
+            for turn in range(8):
+                await client.send_item(ClientUserMessageItem(content=[InputTextContentPart(text=f"{turn}" * 80)]))
+                await client.generate_response()
+                response = await asyncio.wait_for(anext(items), 5)
+                await asyncio.wait_for(response.text(), 5)
+                input_tokens.append(response.usage.input_tokens)
+            server_items = [item["id"] for item in server.connections[0].items]
+
+    assert client.trim_metrics.trims >= 2
+    assert client.trim_metrics.summaries == client.trim_metrics.trims
+    assert max(input_tokens) <= budget.max_tokens + 30
+    # The deletes sent before the last response were confirmed before it started
+    assert [entry.id for entry in client.conversation][:-2] == server_items[:-2]
+    assert client.conversation.transcript()[0][0] == "system"
+
+
+@pytest.mark.asyncio
+async def test_refused_deletes_count_against_the_budget_again(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    budget = ContextBudget(max_tokens=100, keep_last=0)
+    async with MockRealtimeServer([], speed=0) as server:
+        async with RTClient(url=server.url, budget=budget) as client:
+            # An item the server doesn't have, so its delete fails with item_not_found
+            observe(client.conversation, event("conversation.item.created", previous_item_id=None, item=message_item("item_ghost", "user", "g" * 800)))
+            trimmed = await client.trim_context()
+            assert [entry.id for entry in trimmed] == ["item_ghost"]
+            assert "item_ghost" in client._deleting
+
+            control = client.control_messages()
+            error = await asyncio.wait_for(anext(message async for message in control if message.type == "error"), 5)
+
+    assert error.error.code == "item_not_found"
+    assert client.trim_metrics.failed_deletes == 1
+    assert not client._deleting and not client._delete_events
+    assert "item_ghost" not in client.conversation
@@ -0,0 +1,146 @@
+"""
+Compact records for the high frequency streaming delta events.
+
+response.audio.delta, response.audio_transcript.delta, response.text.delta and
+response.function_call_arguments.delta make up nearly all server frames in a voice session.
+In "fast" decode mode these are built as the slotted records below instead of pydantic models.
+
+The records expose the same attributes as their pydantic counterparts in rtclient.models
+(ResponseAudioDeltaMessage etc.) so code that reads message.type, message.delta,
+message.item_id, ... accepts either transparently. They are not validated.
+"""
+
+from __future__ import annotations
+
+from typing import Optional, Union
+
+
+class _DeltaRecord:
+    __slots__ = ("event_id", "response_id", "item_id", "output_index", "delta")
+
+    type: str
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._fields())
+        return f"{self.__class__.__name__}(type={self.type!r}, {fields})"
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self._fields())
+
+    @classmethod
+    def _fields(cls) -> tuple[str, ...]:
+        return tuple(name for klass in reversed(cls.__mro__) for name in getattr(klass, "__slots__", ()))
+
+
+class _ContentDeltaRecord(_DeltaRecord):
+    __slots__ = ("content_index",)
+
+    def __init__(
+        self,
+        event_id: str,
+        response_id: str,
+        item_id: str,
+        output_index: int,
+        content_index: int,
+        delta: str,
+    ):
+        self.event_id = event_id
+        self.response_id = response_id
+        self.item_id = item_id
+        self.output_index = output_index
+        self.content_index = content_index
+        self.delta = delta
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(
+            data["event_id"],
+            data["response_id"],
+            data["item_id"],
+            data["output_index"],
+            data["content_index"],
+            data["delta"],
+        )
+
+
+class AudioDeltaRecord(_ContentDeltaRecord):
+    """Fast counterpart of ResponseAudioDeltaMessage, delta is base64 encoded audio."""
+
+    __slots__ = ()
+    type = "response.audio.delta"
+
+
+class AudioTranscriptDeltaRecord(_ContentDeltaRecord):
+    """Fast counterpart of ResponseAudioTranscriptDeltaMessage."""
+
+    __slots__ = ()
+    type = "response.audio_transcript.delta"
+
+
+class TextDeltaRecord(_ContentDeltaRecord):
+    """Fast counterpart of ResponseTextDeltaMessage."""
+
+    __slots__ = ()
+    type = "response.text.delta"
+
+
+class FunctionCallArgumentsDeltaRecord(_DeltaRecord):
+    """Fast counterpart of ResponseFunctionCallArgumentsDeltaMessage."""
+
+    __slots__ = ("call_id",)
+    type = "response.function_call_arguments.delta"
+
+    def __init__(
+        self,
+        event_id: str,
+        response_id: str,
+        item_id: str,
+        output_index: int,
+        call_id: str,
+        delta: str,
+    ):
+        self.event_id = event_id
+        self.response_id = response_id
+        self.item_id = item_id
+        self.output_index = output_index
+        self.call_id = call_id
+        self.delta = delta
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(
+            data["event_id"],
+            data["response_id"],
+            data["item_id"],
+            data["output_index"],
+            data["call_id"],
+            data["delta"],
+        )
+
+
+DeltaRecord = Union[
+    AudioDeltaRecord,
+    AudioTranscriptDeltaRecord,
+    TextDeltaRecord,
+    FunctionCallArgumentsDeltaRecord,
+]
+
+DELTA_RECORD_CLASSES: dict[str, type[DeltaRecord]] = {
+    "response.audio.delta": AudioDeltaRecord,
+    "response.audio_transcript.delta": AudioTranscriptDeltaRecord,
+    "response.text.delta": TextDeltaRecord,
+    "response.function_call_arguments.delta": FunctionCallArgumentsDeltaRecord,
+}
+
+
+def create_delta_record(data: dict) -> Optional[DeltaRecord]:
+    """Build the record for a decoded delta event, None if it is not a delta or misses a field."""
+    cls = DELTA_RECORD_CLASSES.get(data.get("type"))
+    if cls is None:
+        return None
+    try:
+        return cls.from_dict(data)
+    except KeyError:
+        return None
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 import logging
+from collections.abc import Callable
 from typing import Annotated, Any, Literal, Union
 
-from pydantic import AfterValidator, AliasChoices, BaseModel, Field
+from pydantic import AfterValidator, AliasChoices, BaseModel, Field, SerializerFunctionWrapHandler, TypeAdapter, ValidationInfo, WrapSerializer
 from pydantic_core import ValidationError
 
+from rtclient.deltas import DELTA_RECORD_CLASSES, DeltaRecord, create_delta_record
+
 logger = logging.getLogger(__name__)
 
 """
@@ -73,12 +76,27 @@ def is_resp_id(id: str) -> str:
     raise ValueError(f"ID {id} is not a response ID")
 
 
-SessionID = Annotated[str, AfterValidator(is_sess_id)]
-EventID = Annotated[str, AfterValidator(is_event_id)]
-ItemID = Annotated[str, AfterValidator(is_item_id)]
-ResponseID = Annotated[str, AfterValidator(is_resp_id)]
-CallID = Annotated[str, AfterValidator(is_call_id)]
-ConversationID = Annotated[str, AfterValidator(is_conv_id)]
+# Validation context used when decoding messages from a trusted server, see DecodeMode.
+TRUSTED_CONTEXT = {"trusted": True}
+
+
+def _id_validator(check: Callable[[str], str]) -> AfterValidator:
+    """Wrap an ID check so it is skipped when validating with TRUSTED_CONTEXT."""
+
+    def validate(id: str, info: ValidationInfo) -> str:
+        if info.context is not None and info.context.get("trusted"):
+            return id
+        return check(id)
+
+    return AfterValidator(validate)
+
+
+SessionID = Annotated[str, _id_validator(is_sess_id)]
+EventID = Annotated[str, _id_validator(is_event_id)]
+ItemID = Annotated[str, _id_validator(is_item_id)]
+ResponseID = Annotated[str, _id_validator(is_resp_id)]
+CallID = Annotated[str, _id_validator(is_call_id)]
+ConversationID = Annotated[str, _id_validator(is_conv_id)]
 
 # https://platform.openai.com/docs/api-reference/realtime-client-events/session/update
 Voice = Literal[
@@ -106,6 +124,8 @@ class ServerVAD(BaseModel):
     threshold: Annotated[float, Field(strict=True, ge=0.0, le=1.0)] | None = None
     prefix_padding_ms: int | None = None
     silence_duration_ms: int | None = None
+    create_response: bool | None = None
+    interrupt_response: bool | None = None
 
 
 TurnDetection = Annotated[
@@ -425,14 +445,95 @@ class Session(BaseModel):
     max_response_output_tokens: int | Literal["inf"] | None = None
 
 
+class _RawField:
+    """Field of a lazy payload that is read straight from the raw payload."""
+
+    def __set_name__(self, owner: type, name: str):
+        self.name = name
+
+    def __get__(self, instance: Any, owner: type) -> Any:
+        if instance is None:
+            return self
+        return instance._raw.get(self.name)
+
+
+class _LazyField(_RawField):
+    """Field of a lazy payload that is validated from the raw payload on first access."""
+
+    def __init__(self, annotation: Any):
+        self.adapter = TypeAdapter(annotation)
+
+    def __get__(self, instance: Any, owner: type) -> Any:
+        if instance is None:
+            return self
+        materialized = instance._materialized
+        if self.name not in materialized:
+            value = instance._raw.get(self.name)
+            if value is not None:
+                value = self.adapter.validate_python(value, context=TRUSTED_CONTEXT)
+            materialized[self.name] = value
+        return materialized[self.name]
+
+
+class _LazyPayload:
+    """Keeps a decoded payload as is and builds nested models only when they are read.
+
+    Used for the large nested payloads in trusted and fast decode mode, where most consumers only
+    look at a few scalar fields. materialize() returns the full model.
+    """
+
+    __slots__ = ("_raw", "_materialized")
+    _model_class: type[BaseModel]
+
+    def __init__(self, raw: dict):
+        self._raw = raw
+        self._materialized: dict[str, Any] = {}
+
+    def materialize(self) -> BaseModel:
+        return self._model_class.model_validate(self._raw, context=TRUSTED_CONTEXT)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(id={self._raw.get('id')!r})"
+
+
+def _serialize_payload(value: Any, handler: SerializerFunctionWrapHandler) -> Any:
+    """Serializes a lazy payload as its full model, so trusted messages dump like strict ones."""
+    return handler(value.materialize() if isinstance(value, _LazyPayload) else value)
+
+
+class LazySession(_LazyPayload):
+    """Session that defers validating tools, modalities, turn detection and transcription settings."""
+
+    __slots__ = ()
+    _model_class = Session
+
+    id = _RawField()
+    model = _RawField()
+    instructions = _RawField()
+    voice = _RawField()
+    input_audio_format = _RawField()
+    output_audio_format = _RawField()
+    temperature = _RawField()
+    max_response_output_tokens = _RawField()
+    tool_choice = _LazyField(ToolChoice | None)
+    modalities = _LazyField(set[Modality] | None)
+    input_audio_transcription = _LazyField(InputAudioTranscription | None)
+    turn_detection = _LazyField(TurnDetection | None)
+    tools = _LazyField(ToolsDefinition | None)
+
+
+# A session field that holds a LazySession in trusted mode
+SessionPayload = Annotated[Session, WrapSerializer(_serialize_payload)]
+
+
 class SessionCreatedMessage(ServerMessageBase):
     type: Literal["session.created"] = "session.created"
-    session: Session
+    session: SessionPayload
 
 
 class SessionUpdatedMessage(ServerMessageBase):
     type: Literal["session.updated"] = "session.updated"
-    session: Session
+    session: SessionPayload
 
 
 class InputAudioBufferCommittedMessage(ServerMessageBase):
@@ -645,14 +746,32 @@ class Response(BaseModel):
     conversation_id: ConversationID | None
 
 
+class LazyResponse(_LazyPayload):
+    """Response that defers validating its output items, usage and status details."""
+
+    __slots__ = ()
+    _model_class = Response
+
+    id = _RawField()
+    status = _RawField()
+    conversation_id = _RawField()
+    status_details = _LazyField(ResponseStatusDetails | None)
+    output = _LazyField(list[ResponseItem])
+    usage = _LazyField(Usage | None)
+
+
+# A response field that holds a LazyResponse in trusted mode
+ResponsePayload = Annotated[Response, WrapSerializer(_serialize_payload)]
+
+
 class ResponseCreatedMessage(ServerMessageBase):
     type: Literal["response.created"] = "response.created"
-    response: Response
+    response: ResponsePayload
 
 
 class ResponseDoneMessage(ServerMessageBase):
     type: Literal["response.done"] = "response.done"
-    response: Response
+    response: ResponsePayload
 
 
 class ResponseOutputItemAddedMessage(ServerMessageBase):
@@ -880,6 +999,9 @@ SERVER_MESSAGE_CLASSES: dict[str, type[ServerMessageType]] = {
 
 MessageType = Union[UserMessageType, ServerMessageType]
 
+# Anything RTLowLevelClient.recv can produce, the delta records only appear in "fast" decode mode.
+ServerEvent = Union[ServerMessageType, DeltaRecord]
+
 
 def create_user_message_from_dict(data: dict) -> UserMessageType | None:
     """Create a user message object from a dictionary based on its 'type'."""
@@ -902,10 +1024,75 @@ def create_user_message_from_dict(data: dict) -> UserMessageType | None:
     return None
 
 
-def create_server_message_from_dict(data: dict) -> ServerMessageType | None:
+# How server messages are built from decoded JSON.
+#   strict  - full pydantic validation including the ID prefix checks, used by default and in tests.
+#   trusted - the server is assumed to send well formed messages. Messages with only scalar fields
+#             are built without validation, session and response payloads are kept raw and
+#             validated on access (LazySession, LazyResponse), everything else is validated
+#             with the ID checks skipped.
+#   fast    - trusted, and the streaming delta events are built as the slotted records in
+#             rtclient.deltas instead of pydantic models.
+DecodeMode = Literal["strict", "trusted", "fast"]
+
+# Server messages whose fields are all scalars, these can be built without any validation
+# in trusted mode since there are no nested models to instantiate.
+TRUSTED_CONSTRUCT_CLASSES: frozenset[type[ServerMessageType]] = frozenset(
+    {
+        InputAudioBufferCommittedMessage,
+        InputAudioBufferClearedMessage,
+        InputAudioBufferSpeechStartedMessage,
+        InputAudioBufferSpeechStoppedMessage,
+        ItemTruncatedMessage,
+        ItemDeletedMessage,
+        ItemInputAudioTranscriptionCompletedMessage,
+        ItemInputAudioTranscriptionDeltaMessage,
+        ResponseTextDeltaMessage,
+        ResponseTextDoneMessage,
+        ResponseAudioTranscriptDeltaMessage,
+        ResponseAudioTranscriptDoneMessage,
+        ResponseAudioDeltaMessage,
+        ResponseAudioDoneMessage,
+        ResponseFunctionCallArgumentsDeltaMessage,
+        ResponseFunctionCallArgumentsDoneMessage,
+    }
+)
+
+
+def _construct_trusted(cls: type[BaseModel], data: dict) -> BaseModel:
+    """Build a model by adopting data as its field storage, skipping validation entirely.
+
+    This is what model_construct does without the per field default handling, which makes
+    model_construct slower than validating. Only safe for the scalar messages in
+    TRUSTED_CONSTRUCT_CLASSES and takes ownership of data.
+    """
+    message = cls.__new__(cls)
+    object.__setattr__(message, "__dict__", data)
+    object.__setattr__(message, "__pydantic_fields_set__", set(data))
+    object.__setattr__(message, "__pydantic_extra__", None)
+    object.__setattr__(message, "__pydantic_private__", None)
+    return message
+
+
+# Server messages whose large nested payload is kept raw in trusted mode, by field name.
+LAZY_PAYLOAD_CLASSES: dict[type[ServerMessageType], tuple[str, type[_LazyPayload]]] = {
+    SessionCreatedMessage: ("session", LazySession),
+    SessionUpdatedMessage: ("session", LazySession),
+    ResponseCreatedMessage: ("response", LazyResponse),
+    ResponseDoneMessage: ("response", LazyResponse),
+}
+
+
+def create_server_message_from_dict(
+    data: dict, mode: DecodeMode = "strict"
+) -> ServerEvent | None:
     event_type = data.get("type")
     if not event_type:
         return None
+    if mode == "fast" and event_type in DELTA_RECORD_CLASSES:
+        record = create_delta_record(data)
+        if record is None:
+            logger.debug(f"Failed to construct delta record for type {event_type}")
+        return record
     # Use .get() to look up the class, providing a default if the key is not found.
     cls = SERVER_MESSAGE_CLASSES.get(event_type, None)
 
@@ -913,8 +1100,16 @@ def create_server_message_from_dict(data: dict) -> ServerMessageType | None:
         return None
 
     try:
+        if mode != "strict":
+            if cls in TRUSTED_CONSTRUCT_CLASSES:
+                return _construct_trusted(cls, data)
+            if cls in LAZY_PAYLOAD_CLASSES:
+                field, lazy_cls = LAZY_PAYLOAD_CLASSES[cls]
+                data[field] = lazy_cls(data[field])
+                return _construct_trusted(cls, data)
+            return cls.model_validate(data, context=TRUSTED_CONTEXT)
         return cls(**data)
-    except ValidationError as e:
+    except (ValidationError, KeyError) as e:
         logger.debug(
             f"Failed to construct message for type {event_type} with error - {e}"
         )
@@ -0,0 +1,137 @@
+import json
+
+import pytest
+
+from benchmarks.events import sample_events
+from rtclient.deltas import DELTA_RECORD_CLASSES, AudioDeltaRecord
+from rtclient.models import (
+    LAZY_PAYLOAD_CLASSES,
+    LazyResponse,
+    LazySession,
+    Response,
+    ResponseAudioDeltaMessage,
+    ResponseDoneMessage,
+    Session,
+    create_server_message_from_dict,
+)
+
+
+def materialized(message):
+    """The message with any lazy payload replaced by its full model."""
+    if type(message) in LAZY_PAYLOAD_CLASSES:
+        field, _ = LAZY_PAYLOAD_CLASSES[type(message)]
+        return message.model_copy(update={field: getattr(message, field).materialize()})
+    return message
+
+
+@pytest.mark.parametrize("event_type", list(sample_events().keys()))
+def test_trusted_matches_strict(event_type):
+    event = sample_events()[event_type]
+    strict = create_server_message_from_dict(json.loads(json.dumps(event)), "strict")
+    trusted = create_server_message_from_dict(json.loads(json.dumps(event)), "trusted")
+
+    assert strict is not None
+    assert trusted is not None
+    assert type(trusted) is type(strict)
+    assert materialized(trusted).model_dump(exclude_none=True) == strict.model_dump(exclude_none=True)
+
+
+@pytest.mark.parametrize("message_class", list(LAZY_PAYLOAD_CLASSES))
+def test_lazy_payloads_serialize_as_models(message_class):
+    event_type = message_class.model_fields["type"].default
+    events = sample_events()
+    # session.updated carries the same payload as session.created
+    event = {**events.get(event_type, events["session.created"]), "type": event_type}
+    strict = create_server_message_from_dict(json.loads(json.dumps(event)), "strict")
+    trusted = create_server_message_from_dict(json.loads(json.dumps(event)), "trusted")
+    field, lazy_class = LAZY_PAYLOAD_CLASSES[message_class]
+    assert isinstance(getattr(trusted, field), lazy_class)
+
+    dumped = trusted.model_dump_json()
+    assert json.loads(dumped) == json.loads(strict.model_dump_json())
+    assert message_class.model_validate_json(dumped) == strict
+    assert trusted.model_dump(exclude_none=True) == strict.model_dump(exclude_none=True)
+
+
+def test_strict_rejects_malformed_ids():
+    event = sample_events()["response.audio.delta"]
+    event["item_id"] = "not_an_item"
+
+    assert create_server_message_from_dict(dict(event), "strict") is None
+
+    trusted = create_server_message_from_dict(dict(event), "trusted")
+    assert isinstance(trusted, ResponseAudioDeltaMessage)
+    assert trusted.item_id == "not_an_item"
+
+
+def test_trusted_skips_nested_id_validators():
+    event = sample_events()["response.done"]
+    event["response"]["id"] = "not_a_response"
+
+    assert create_server_message_from_dict(json.loads(json.dumps(event)), "strict") is None
+
+    trusted = create_server_message_from_dict(json.loads(json.dumps(event)), "trusted")
+    assert isinstance(trusted, ResponseDoneMessage)
+    assert trusted.response.id == "not_a_response"
+    assert trusted.response.usage.input_tokens == 1000
+
+
+@pytest.mark.parametrize("event_type", list(DELTA_RECORD_CLASSES.keys()))
+def test_fast_builds_delta_records(event_type):
+    event = sample_events()[event_type]
+    strict = create_server_message_from_dict(dict(event), "strict")
+    fast = create_server_message_from_dict(dict(event), "fast")
+
+    assert isinstance(fast, DELTA_RECORD_CLASSES[event_type])
+    assert not hasattr(fast, "__dict__")
+    for field, value in strict.model_dump().items():
+        assert getattr(fast, field) == value
+
+
+def test_fast_rejects_incomplete_delta():
+    event = sample_events()["response.audio.delta"]
+    del event["item_id"]
+
+    assert create_server_message_from_dict(dict(event), "fast") is None
+
+
+def test_fast_keeps_models_for_other_events():
+    event = sample_events()["response.done"]
+    fast = create_server_message_from_dict(json.loads(json.dumps(event)), "fast")
+
+    assert isinstance(fast, ResponseDoneMessage)
+    assert not isinstance(fast, AudioDeltaRecord)
+
+
+def test_trusted_response_payload_is_lazy():
+    event = sample_events()["response.done"]
+    strict = create_server_message_from_dict(json.loads(json.dumps(event)), "strict")
+    trusted = create_server_message_from_dict(json.loads(json.dumps(event)), "trusted")
+
+    response = trusted.response
+    assert isinstance(response, LazyResponse)
+    assert response.id == strict.response.id
+    assert response.status == "completed"
+    assert response._materialized == {}
+
+    assert response.output == strict.response.output
+    assert response.output is response.output
+    assert response.usage == strict.response.usage
+    assert response.status_details is None
+    assert isinstance(response.materialize(), Response)
+
+
+def test_trusted_session_payload_is_lazy():
+    event = sample_events()["session.created"]
+    strict = create_server_message_from_dict(json.loads(json.dumps(event)), "strict")
+    trusted = create_server_message_from_dict(json.loads(json.dumps(event)), "trusted")
+
+    session = trusted.session
+    assert isinstance(session, LazySession)
+    assert (session.id, session.model) == (strict.session.id, strict.session.model)
+    assert session._materialized == {}
+
+    assert session.tools == strict.session.tools
+    assert session.turn_detection == strict.session.turn_detection
+    assert session.modalities == {"audio", "text"}
+    assert isinstance(session.materialize(), Session)
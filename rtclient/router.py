@@ -0,0 +1,102 @@
+"""Routing of server events to the RTClient consumer that handles them, in a single table lookup.
+
+Every event type maps to a function that returns the route key of the event:
+    control          - session level events, see RTClient.control_messages
+    items            - the start of input items and responses, see RTClient.items
+    response:<id>    - response level events, see RTResponse
+    item:<id>        - everything about one input or output item, see RTInputItem and RTOutputItem
+Events without a route are dropped.
+"""
+
+from collections.abc import Callable
+from typing import Optional
+
+from rtclient.models import ServerEvent
+
+CONTROL = "control"
+ITEMS = "items"
+
+
+def response_route(response_id: str) -> str:
+    return "response:" + response_id
+
+
+def item_route(item_id: str) -> str:
+    return "item:" + item_id
+
+
+def _control(message: ServerEvent) -> str:
+    return CONTROL
+
+
+def _items(message: ServerEvent) -> str:
+    return ITEMS
+
+
+def _response(message: ServerEvent) -> str:
+    return "response:" + message.response_id
+
+
+def _response_payload(message: ServerEvent) -> str:
+    return "response:" + message.response.id
+
+
+def _item(message: ServerEvent) -> str:
+    return "item:" + message.item_id
+
+
+def _item_payload(message: ServerEvent) -> str:
+    return "item:" + message.item.id
+
+
+ROUTES: dict[str, Callable[[ServerEvent], str]] = {
+    "session.created": _control,
+    "session.updated": _control,
+    "input_audio_buffer.cleared": _control,
+    "rate_limits.updated": _control,
+    "error": _control,
+    "input_audio_buffer.speech_started": _items,
+    "response.created": _items,
+    "response.output_item.added": _response,
+    "response.done": _response_payload,
+    "input_audio_buffer.speech_stopped": _item,
+    "input_audio_buffer.committed": _item,
+    "conversation.item.created": _item_payload,
+    "conversation.item.truncated": _item,
+    "conversation.item.deleted": _item,
+    "conversation.item.input_audio_transcription.completed": _item,
+    "conversation.item.input_audio_transcription.failed": _item,
+    "conversation.item.input_audio_transcription.delta": _item,
+    "response.output_item.done": _item_payload,
+    "response.content_part.added": _item,
+    "response.content_part.done": _item,
+    "response.text.delta": _item,
+    "response.text.done": _item,
+    "response.audio_transcript.delta": _item,
+    "response.audio_transcript.done": _item,
+    "response.audio.delta": _item,
+    "response.audio.done": _item,
+    "response.function_call_arguments.delta": _item,
+    "response.function_call_arguments.done": _item,
+}
+
+# Events after which nothing more is routed to their response or item.
+TERMINAL_TYPES = frozenset(
+    {
+        "response.done",
+        "response.output_item.done",
+        "conversation.item.input_audio_transcription.completed",
+        "conversation.item.input_audio_transcription.failed",
+    }
+)
+
+
+def route_event(message: ServerEvent) -> Optional[str]:
+    route = ROUTES.get(message.type)
+    if route is None:
+        return None
+    return route(message)
+
+
+def is_terminal(message: ServerEvent) -> bool:
+    return message.type in TERMINAL_TYPES
@@ -0,0 +1,98 @@
+import pytest
+
+from benchmarks.events import EVENT_ID, ITEM_ID, RESPONSE_ID, sample_events
+from rtclient import RTClient, RTResponse, create_server_message_from_dict
+from rtclient.router import CONTROL, ITEMS, item_route, response_route, route_event
+
+EXPECTED_ROUTES = {
+    "session.created": CONTROL,
+    "rate_limits.updated": CONTROL,
+    "input_audio_buffer.speech_started": ITEMS,
+    "response.created": ITEMS,
+    "response.output_item.added": response_route(RESPONSE_ID),
+    "response.done": response_route(RESPONSE_ID),
+}
+
+
+@pytest.mark.parametrize("event_type", list(sample_events()))
+def test_route_event(event_type):
+    message = create_server_message_from_dict(sample_events()[event_type], "trusted")
+    assert route_event(message) == EXPECTED_ROUTES.get(event_type, item_route(ITEM_ID))
+
+
+class ScriptedClient:
+    """Stands in for RTLowLevelClient, yields the given events and then ends the stream."""
+
+    def __init__(self, events: list[dict]):
+        self._messages = [create_server_message_from_dict(event, "trusted") for event in reversed(events)]
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self._messages:
+            raise StopAsyncIteration
+        return self._messages.pop()
+
+
+def item_events(item_id: str, output_index: int, deltas: list[str]) -> list[dict]:
+    ids = {"event_id": EVENT_ID, "response_id": RESPONSE_ID, "item_id": item_id, "output_index": output_index, "content_index": 0}
+    item = {"id": item_id, "object": "realtime.item", "type": "message", "status": "in_progress", "role": "assistant", "content": []}
+    return [
+        {"type": "response.output_item.added", "event_id": EVENT_ID, "response_id": RESPONSE_ID, "output_index": output_index, "item": item},
+        *({"type": "response.text.delta", **ids, "delta": delta} for delta in deltas),
+        {"type": "response.output_item.done", "event_id": EVENT_ID, "response_id": RESPONSE_ID, "output_index": output_index, "item": item},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_items_of_a_response_are_delivered_independently(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    events = sample_events()
+    first = item_events("item_First", 0, ["a", "b"])
+    second = item_events("item_Second", 1, ["c", "d"])
+    # The second item starts before the first one is done
+    script = [events["response.created"], *first[:2], *second[:2], *first[2:], *second[2:], events["response.done"]]
+
+    client = RTClient()
+    await client._client._session.close()
+    client._client = ScriptedClient(script)
+
+    received = {}
+    async for item in client.items():
+        assert isinstance(item, RTResponse)
+        output_items = [output_item async for output_item in item]
+        # Nothing has been read from the items yet, their deltas were kept for them
+        for output_item in output_items:
+            received[output_item.id] = [chunk.data async for chunk in output_item]
+    assert received == {"item_First": ["a", "b"], "item_Second": ["c", "d"]}
+    assert client.retention_metrics["events"].stored == 0
+
+
+@pytest.mark.asyncio
+async def test_subscriptions_observe_without_taking_events(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    events = sample_events()
+    script = [events["response.created"], *item_events("item_First", 0, ["a", "b"]), events["response.done"], events["rate_limits.updated"]]
+
+    client = RTClient()
+    await client._client._session.close()
+    client._client = ScriptedClient(script)
+    control = client.subscribe()
+
+    played = []
+    async for item in client.items():
+        observer = client.subscribe(item)
+        async for output_item in item:
+            played += [chunk.data async for chunk in output_item]
+    assert played == ["a", "b"]
+
+    observed = [message.type async for message in observer]
+    assert observed == [
+        "response.output_item.added",
+        "response.text.delta",
+        "response.text.delta",
+        "response.output_item.done",
+        "response.done",
+    ]
+    assert [message.type async for message in control] == ["rate_limits.updated"]
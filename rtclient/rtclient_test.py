@@ -0,0 +1,274 @@
+import asyncio
+import base64
+import json
+
+import pytest
+from aiohttp import WSMessage, WSMsgType
+
+from benchmarks.events import sample_events
+from rtclient import (
+    InputAudioBufferAppendMessage,
+    ResponseCreateMessage,
+    RTFunctionCall,
+    RTLowLevelClient,
+    RTOutputItem,
+    RTResponse,
+    create_server_message_from_dict,
+)
+from rtclient.codec import sniff_event_type
+
+
+class FakeWebSocket:
+    def __init__(self, frames: list[str]):
+        self._messages: asyncio.Queue[WSMessage] = asyncio.Queue()
+        for frame in frames:
+            self._messages.put_nowait(WSMessage(WSMsgType.TEXT, frame, None))
+        self.sent: list[str] = []
+        self.closed = False
+
+    def push(self, frame: str):
+        self._messages.put_nowait(WSMessage(WSMsgType.TEXT, frame, None))
+
+    def finish(self):
+        self._messages.put_nowait(WSMessage(WSMsgType.CLOSED, None, None))
+
+    async def receive(self) -> WSMessage:
+        message = await self._messages.get()
+        if message.type == WSMsgType.CLOSED:
+            self.closed = True
+        return message
+
+    async def send_str(self, data: str):
+        self.sent.append(data)
+
+    async def send_frame(self, message: bytes, opcode: WSMsgType):
+        assert opcode == WSMsgType.TEXT
+        self.sent.append(bytes(message).decode("utf-8"))
+
+    async def close(self):
+        self.closed = True
+
+
+def frame(event_type: str) -> str:
+    return json.dumps(sample_events()[event_type])
+
+
+async def connect(ws: FakeWebSocket, monkeypatch, **kwargs) -> RTLowLevelClient:
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    client = RTLowLevelClient(**kwargs)
+
+    async def ws_connect(*args, **kwargs):
+        return ws
+
+    monkeypatch.setattr(client._session, "ws_connect", ws_connect)
+    await client.connect()
+    return client
+
+
+async def receive_all(client: RTLowLevelClient) -> list:
+    return [message async for message in client]
+
+
+@pytest.mark.parametrize("event_type", list(sample_events().keys()))
+def test_sniff_event_type(event_type):
+    assert sniff_event_type(frame(event_type)) == event_type
+
+
+def test_sniff_event_type_ignores_nested_and_value_types():
+    assert sniff_event_type('{"name": "type", "type": "error"}') == "error"
+    assert sniff_event_type('  {"event_id":"event_1","type" : "rate_limits.updated"}') == "rate_limits.updated"
+    assert sniff_event_type('{"item": {"type": "message"}, "type": "conversation.item.created"}') is None
+    assert sniff_event_type('{"delta": "\\"type\\": \\"x\\""}') is None
+    assert sniff_event_type("not json") is None
+
+
+@pytest.mark.asyncio
+async def test_unsubscribed_events_are_dropped(monkeypatch):
+    ws = FakeWebSocket([frame("rate_limits.updated"), frame("response.audio.delta"), frame("response.done")])
+    ws.finish()
+    client = await connect(ws, monkeypatch)
+    client.unsubscribe("rate_limits.updated", "response.audio.delta")
+
+    assert [message.type for message in await receive_all(client)] == ["response.done"]
+    assert client.drain_deferred() == []
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_subscribe_defers_other_events(monkeypatch):
+    ws = FakeWebSocket([frame("rate_limits.updated"), frame("response.audio.delta"), frame("response.done")])
+    ws.finish()
+    client = await connect(ws, monkeypatch, unsubscribed_policy="defer")
+    client.subscribe("response.audio.delta")
+
+    assert [message.type for message in await receive_all(client)] == ["response.audio.delta"]
+    assert [message.type for message in client.drain_deferred()] == ["rate_limits.updated", "response.done"]
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_priority_events_overtake_backlog(monkeypatch):
+    ws = FakeWebSocket([frame("response.audio.delta")] * 5 + [frame("input_audio_buffer.speech_started")])
+    client = await connect(ws, monkeypatch, priority_events={"input_audio_buffer.speech_started"})
+    # Let the pump read everything that's buffered
+    await asyncio.sleep(0)
+
+    first = await client.recv()
+    assert first.type == "input_audio_buffer.speech_started"
+    assert client.discard_pending("response.audio.delta") == 5
+
+    ws.push(frame("response.done"))
+    ws.finish()
+    assert [message.type for message in await receive_all(client)] == ["response.done"]
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_fast_send_paths_match_models(monkeypatch):
+    ws = FakeWebSocket([])
+    client = await connect(ws, monkeypatch)
+    pcm = bytes(range(256)) * 16
+
+    await client.send_audio_append(pcm)
+    await client.send_audio_append(memoryview(pcm)[:100])
+    await client.send_response_create()
+    await client.send_audio_commit()
+
+    assert [json.loads(frame) for frame in ws.sent] == [
+        json.loads(InputAudioBufferAppendMessage(audio=base64.b64encode(pcm).decode()).model_dump_json(exclude_none=True)),
+        {"type": "input_audio_buffer.append", "audio": base64.b64encode(pcm[:100]).decode()},
+        json.loads(ResponseCreateMessage().model_dump_json(exclude_none=True)),
+        {"type": "input_audio_buffer.commit"},
+    ]
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_send_lanes_keep_commit_and_clear_behind_queued_audio(monkeypatch):
+    ws = FakeWebSocket([])
+    client = await connect(ws, monkeypatch, send_lanes=True)
+
+    await client.send_audio_append(b"a0")
+    await client.send_audio_append(b"a1")
+    await client.send_audio_commit()
+    await client.send_audio_append(b"a2")
+    await client.send({"type": "input_audio_buffer.clear"})
+    await client.send_response_create()
+
+    assert [json.loads(frame) for frame in ws.sent] == [
+        {"type": "input_audio_buffer.append", "audio": base64.b64encode(b"a0").decode()},
+        {"type": "input_audio_buffer.append", "audio": base64.b64encode(b"a1").decode()},
+        {"type": "input_audio_buffer.commit"},
+        {"type": "input_audio_buffer.append", "audio": base64.b64encode(b"a2").decode()},
+        {"type": "input_audio_buffer.clear"},
+        {"type": "response.create"},
+    ]
+    await client.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("view", ["memoryview", "int16"])
+async def test_output_item_audio_is_decoded(view):
+    events = sample_events()
+    messages = [
+        create_server_message_from_dict(events[event_type], "fast")
+        for event_type in ("response.audio_transcript.delta", "response.audio.delta", "response.audio.delta")
+    ]
+    pending = iter(messages)
+
+    async def receive():
+        return next(pending, None)
+
+    pcm = base64.b64decode(events["response.audio.delta"]["delta"])
+    chunks = [chunk async for chunk in RTOutputItem("item_1", "resp_1", None, receive).audio(view)]
+    assert len(chunks) == 2
+    for chunk in chunks:
+        assert chunk.tobytes() == pcm
+        if view == "int16":
+            assert chunk.dtype == "int16"
+
+
+def response_events() -> dict[str, list[dict]]:
+    """Routed events of a response with an audio message and a function call, by route."""
+    message = {"id": "item_1", "object": "realtime.item", "type": "message", "status": "in_progress", "role": "assistant", "content": []}
+    call = {"id": "item_2", "object": "realtime.item", "type": "function_call", "status": "in_progress", "name": "get_time", "call_id": "call_1", "arguments": ""}
+    ids = {"event_id": "event_1", "response_id": "resp_1", "output_index": 0}
+    audio = base64.b64encode(bytes(4800)).decode()
+    response = sample_events()["response.done"]["response"]
+    return {
+        "response": [
+            {"type": "response.output_item.added", **ids, "item": message},
+            {"type": "response.output_item.added", **ids, "item": call},
+            {"type": "response.done", "event_id": "event_1", "response": {**response, "id": "resp_1", "status": "completed"}},
+        ],
+        "item_1": [
+            *[{"type": "response.audio.delta", **ids, "item_id": "item_1", "content_index": 0, "delta": audio}] * 3,
+            *[{"type": "response.audio_transcript.delta", **ids, "item_id": "item_1", "content_index": 0, "delta": word} for word in ("It is ", "noon")],
+            {"type": "response.output_item.done", **ids, "item": message},
+        ],
+        "item_2": [
+            *[{"type": "response.function_call_arguments.delta", **ids, "item_id": "item_2", "call_id": "call_1", "delta": part} for part in ('{"tz"', ': "UTC"}')],
+            {"type": "response.output_item.done", **ids, "item": call},
+        ],
+    }
+
+
+def scripted_response() -> RTResponse:
+    routes = {route: iter([create_server_message_from_dict(event) for event in events]) for route, events in response_events().items()}
+
+    async def receive(route: str = "response"):
+        return next(routes[route], None)
+
+    return RTResponse("resp_1", None, receive, receive)
+
+
+@pytest.mark.asyncio
+async def test_response_results_without_iterating():
+    response = scripted_response()
+
+    assert await response.function_calls() == [RTFunctionCall("call_1", "get_time", '{"tz": "UTC"}')]
+    assert await response.transcript() == "It is noon"
+    assert response.audio_ms == 300
+    assert response.status == "completed"
+
+
+@pytest.mark.asyncio
+async def test_response_results_after_streaming():
+    response = scripted_response()
+    streamed = []
+    async for item in response:
+        async for chunk in item:
+            if chunk.type != "audio":
+                streamed.append(chunk.data)
+
+    assert streamed == ["It is ", "noon", '{"tz"', ': "UTC"}']
+    assert await response.output_items[0].transcript() == "It is noon"
+    assert await response.output_items[1].arguments() == '{"tz": "UTC"}'
+    assert await response.text() == ""
+
+
+@pytest.mark.asyncio
+async def test_response_results_after_stopping_early():
+    response = scripted_response()
+    async for item in response:
+        async for chunk in item:
+            # e.g. barge-in
+            break
+        break
+
+    assert await asyncio.wait_for(response.transcript(), 1) == "It is noon"
+    assert await asyncio.wait_for(response.function_calls(), 1) == [RTFunctionCall("call_1", "get_time", '{"tz": "UTC"}')]
+    assert response.status == "completed"
+
+
+@pytest.mark.asyncio
+async def test_iterator_keeps_messages_read_by_awaiting():
+    response = scripted_response()
+    item = await anext(response)
+    chunks = [(await anext(item)).type]
+    assert await item.transcript() == "It is noon"
+    chunks += [chunk.type async for chunk in item]
+    assert chunks == ["audio"] * 3 + ["audio_transcript"] * 2
+
+    assert [call.name for call in await response.function_calls()] == ["get_time"]
+    assert [other.id async for other in response] == ["item_2"]
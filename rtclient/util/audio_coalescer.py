@@ -0,0 +1,58 @@
+import time
+from collections.abc import Callable
+from typing import Optional
+
+
+class AudioCoalescer:
+    """Buffers small captured audio frames into larger appends on a time and size budget.
+
+    Capturing in small frames keeps capture latency low, coalescing keeps the websocket message
+    rate down. Buffered audio is flushed once flush_bytes or flush_interval_ms worth of audio are
+    buffered, or when the oldest buffered frame has waited flush_interval_ms, whichever comes first.
+    A flush_bytes of 0 leaves only the time budget, a flush_interval_ms of 0 sends every frame as is.
+    """
+
+    def __init__(
+        self,
+        flush_interval_ms: float = 40,
+        flush_bytes: int = 4096,
+        clock: Callable[[], float] = time.monotonic,
+        bytes_per_second: int = 24000 * 2,
+    ):
+        self.flush_interval = flush_interval_ms / 1000
+        self.flush_bytes = flush_bytes
+        # Size at which the buffered audio lasts flush_interval_ms, pcm16 mono at 24kHz by default
+        self._flush_size = int(bytes_per_second * self.flush_interval)
+        if flush_bytes:
+            self._flush_size = min(flush_bytes, self._flush_size)
+        self._clock = clock
+        self._buffer = bytearray()
+        self._buffered_at: Optional[float] = None
+
+    @property
+    def buffered_bytes(self) -> int:
+        return len(self._buffer)
+
+    def add(self, pcm: bytes | bytearray | memoryview) -> Optional[bytes]:
+        """Buffer captured audio, returns the audio to send when the budget is exhausted."""
+        if not self._buffer:
+            self._buffered_at = self._clock()
+        self._buffer += pcm
+        if len(self._buffer) >= self._flush_size or self.time_until_flush() == 0:
+            return self.flush()
+        return None
+
+    def time_until_flush(self) -> Optional[float]:
+        """Seconds until the buffered audio is due, None when nothing is buffered."""
+        if self._buffered_at is None:
+            return None
+        return max(0.0, self.flush_interval - (self._clock() - self._buffered_at))
+
+    def flush(self) -> Optional[bytes]:
+        """Take all buffered audio, None when nothing is buffered."""
+        if not self._buffer:
+            return None
+        audio = bytes(self._buffer)
+        self._buffer.clear()
+        self._buffered_at = None
+        return audio
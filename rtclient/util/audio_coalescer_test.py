@@ -0,0 +1,56 @@
+from audio_coalescer import AudioCoalescer
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_flushes_on_buffered_duration():
+    clock = Clock()
+    coalescer = AudioCoalescer(flush_interval_ms=40, flush_bytes=4096, clock=clock)
+    frame = bytes(960)  # 20ms of pcm16 at 24kHz
+
+    assert coalescer.add(frame) is None
+    clock.now += 0.02
+    assert coalescer.add(frame) == frame * 2
+    assert coalescer.buffered_bytes == 0
+    assert coalescer.time_until_flush() is None
+
+
+def test_flushes_on_size_budget():
+    coalescer = AudioCoalescer(flush_interval_ms=100, flush_bytes=1000, clock=Clock())
+
+    assert coalescer.add(bytes(600)) is None
+    assert coalescer.add(bytes(600)) == bytes(1200)
+
+
+def test_zero_flush_bytes_leaves_the_time_budget():
+    coalescer = AudioCoalescer(flush_interval_ms=100, flush_bytes=0, clock=Clock())
+
+    assert coalescer.add(bytes(600)) is None
+    # 100ms of pcm16 at 24kHz
+    assert coalescer.add(bytes(4200)) == bytes(4800)
+
+
+def test_stalled_capture_is_due_after_interval():
+    clock = Clock()
+    coalescer = AudioCoalescer(flush_interval_ms=40, flush_bytes=4096, clock=clock)
+
+    assert coalescer.add(bytes(100)) is None
+    clock.now += 0.03
+    assert abs(coalescer.time_until_flush() - 0.01) < 1e-9
+    clock.now += 0.01
+    assert coalescer.time_until_flush() == 0
+    assert coalescer.flush() == bytes(100)
+    assert coalescer.flush() is None
+
+
+def test_zero_budget_sends_every_frame():
+    coalescer = AudioCoalescer(flush_interval_ms=0, flush_bytes=0, clock=Clock())
+
+    assert coalescer.add(b"ab") == b"ab"
+    assert coalescer.add(b"cd") == b"cd"
@@ -0,0 +1,165 @@
+import asyncio
+from collections import deque
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Generic, Literal, Optional, TypeVar
+
+T = TypeVar("T")
+
+# What a subscription does with a message that arrives while its buffer is full.
+#   drop_oldest - the oldest buffered message makes room, the subscriber always sees the latest
+#   drop_newest - the new message is dropped, the subscriber sees what it had buffered
+#   disconnect  - the subscription is closed, its iteration ends after the buffered messages
+SlowConsumerPolicy = Literal["drop_oldest", "drop_newest", "disconnect"]
+
+
+@dataclass
+class SubscriptionMetrics:
+    delivered: int = 0
+    dropped: int = 0
+    max_buffered: int = 0
+    disconnected: bool = False
+
+
+class Subscription(Generic[T]):
+    """Async iterator over copies of the messages published to the routes it is subscribed to.
+
+    Publishing never waits for a subscription: it buffers up to max_buffered messages and its
+    policy decides what gives when it falls behind. Iteration ends once every route it is
+    subscribed to is done, when it is closed, or at the end of the stream.
+    """
+
+    def __init__(self, broadcaster: "Broadcaster[T]", max_buffered: int, policy: SlowConsumerPolicy):
+        if max_buffered < 1:
+            raise ValueError("max_buffered must be at least 1")
+        self._broadcaster = broadcaster
+        self.max_buffered = max_buffered
+        self.policy = policy
+        self.metrics = SubscriptionMetrics()
+        self.closed = False
+        self._buffer: deque[T] = deque()
+        self._routes: set[str] = set()
+        self._waiter: Optional[asyncio.Future] = None
+
+    def _offer(self, message: T):
+        if self.closed:
+            return
+        buffer = self._buffer
+        metrics = self.metrics
+        if len(buffer) >= self.max_buffered:
+            metrics.dropped += 1
+            if self.policy == "drop_newest":
+                return
+            if self.policy == "disconnect":
+                metrics.disconnected = True
+                self.close()
+                return
+            buffer.popleft()
+        buffer.append(message)
+        metrics.max_buffered = max(metrics.max_buffered, len(buffer))
+        self._wake()
+
+    def _wake(self):
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    def close(self):
+        """Stop receiving messages, iteration ends after the ones already buffered."""
+        if self.closed:
+            return
+        self.closed = True
+        self._broadcaster._unsubscribe(self)
+        self._wake()
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def __aiter__(self) -> "Subscription[T]":
+        return self
+
+    async def __anext__(self) -> T:
+        while not self._buffer:
+            if self.closed:
+                raise StopAsyncIteration
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        self.metrics.delivered += 1
+        return self._buffer.popleft()
+
+
+class Broadcaster(Generic[T]):
+    """Publishes messages by route to every subscription of that route.
+
+    A route can be linked to a parent route, so that the subscriptions of the parent also get
+    the messages of the route, e.g. a response and its items. A terminal message ends its route.
+    """
+
+    def __init__(self):
+        self._subscriptions: dict[str, list[Subscription[T]]] = {}
+        self._closed = False
+
+    def __bool__(self) -> bool:
+        return bool(self._subscriptions)
+
+    def subscribe(
+        self,
+        routes: Iterable[str],
+        max_buffered: int,
+        policy: SlowConsumerPolicy = "drop_oldest",
+        backlog: Iterable[T] = (),
+    ) -> Subscription[T]:
+        """Subscribe to routes, the backlog is buffered ahead of anything published from now on."""
+        subscription = Subscription(self, max_buffered, policy)
+        for message in backlog:
+            subscription._offer(message)
+        for route in routes:
+            self._add(subscription, route)
+        if not subscription._routes or self._closed:
+            subscription.close()
+        return subscription
+
+    def _add(self, subscription: Subscription[T], route: str):
+        if subscription.closed or route in subscription._routes:
+            return
+        subscription._routes.add(route)
+        self._subscriptions.setdefault(route, []).append(subscription)
+
+    def link(self, route: str, parent_route: str):
+        """Publish the messages of route to the current subscriptions of parent_route as well."""
+        for subscription in self._subscriptions.get(parent_route, ()):
+            self._add(subscription, route)
+
+    def publish(self, route: str, message: T, terminal: bool = False):
+        subscriptions = self._subscriptions.get(route)
+        if subscriptions is None:
+            return
+        for subscription in tuple(subscriptions):
+            subscription._offer(message)
+        if terminal:
+            self._end_route(route)
+
+    def _end_route(self, route: str):
+        for subscription in self._subscriptions.pop(route, ()):
+            subscription._routes.discard(route)
+            if not subscription._routes:
+                subscription.close()
+
+    def _unsubscribe(self, subscription: Subscription[T]):
+        for route in subscription._routes:
+            subscriptions = self._subscriptions.get(route)
+            if subscriptions is None:
+                continue
+            subscriptions.remove(subscription)
+            if not subscriptions:
+                del self._subscriptions[route]
+        subscription._routes.clear()
+
+    def close(self):
+        """End every subscription and any made later, e.g. at the end of the stream."""
+        self._closed = True
+        for subscriptions in list(self._subscriptions.values()):
+            for subscription in tuple(subscriptions):
+                subscription.close()
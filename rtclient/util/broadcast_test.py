@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+from broadcast import Broadcaster
+
+
+async def drain(subscription) -> list:
+    return [message async for message in subscription]
+
+
+@pytest.mark.asyncio
+async def test_every_subscription_gets_every_message():
+    broadcaster = Broadcaster()
+    first = broadcaster.subscribe(["a"], max_buffered=10)
+    second = broadcaster.subscribe(["a"], max_buffered=10)
+    other = broadcaster.subscribe(["b"], max_buffered=10)
+
+    for message in range(3):
+        broadcaster.publish("a", message)
+    broadcaster.publish("a", 3, terminal=True)
+
+    assert await drain(first) == [0, 1, 2, 3]
+    assert await drain(second) == [0, 1, 2, 3]
+    assert not other.closed and len(other) == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "policy, expected, dropped",
+    [("drop_oldest", [7, 8, 9], 7), ("drop_newest", [0, 1, 2], 7), ("disconnect", [0, 1, 2], 1)],
+)
+async def test_slow_consumer_policies(policy, expected, dropped):
+    broadcaster = Broadcaster()
+    subscription = broadcaster.subscribe(["a"], max_buffered=3, policy=policy)
+
+    for message in range(10):
+        broadcaster.publish("a", message)
+    broadcaster.close()
+
+    assert await drain(subscription) == expected
+    assert subscription.metrics.dropped == dropped
+    assert subscription.metrics.max_buffered == 3
+    assert subscription.metrics.disconnected == (policy == "disconnect")
+
+
+@pytest.mark.asyncio
+async def test_linked_routes_end_with_the_parent():
+    broadcaster = Broadcaster()
+    subscription = broadcaster.subscribe(["response"], max_buffered=10, backlog=["created"])
+
+    broadcaster.link("item", "response")
+    broadcaster.publish("response", "added")
+    broadcaster.publish("item", "delta")
+    broadcaster.publish("item", "item done", terminal=True)
+    broadcaster.publish("item", "late")
+    broadcaster.publish("response", "response done", terminal=True)
+
+    assert await drain(subscription) == ["created", "added", "delta", "item done", "response done"]
+    assert not broadcaster
+
+
+@pytest.mark.asyncio
+async def test_waiting_subscriber_is_woken_and_closed():
+    broadcaster = Broadcaster()
+    subscription = broadcaster.subscribe(["a"], max_buffered=10)
+    received = asyncio.create_task(drain(subscription))
+    await asyncio.sleep(0)
+
+    broadcaster.publish("a", 1)
+    await asyncio.sleep(0)
+    subscription.close()
+    broadcaster.publish("a", 2)
+
+    assert await received == [1]
+    assert broadcaster.subscribe(["a"], max_buffered=10).closed is False
+    broadcaster.close()
+    assert broadcaster.subscribe(["a"], max_buffered=10).closed
@@ -0,0 +1,320 @@
+import bisect
+import fnmatch
+import heapq
+import itertools
+import os
+import re
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass
+class FileIndexMetrics:
+    files: int = 0
+    directories: int = 0
+    scans: int = 0
+    refreshes: int = 0
+    # Directories read again because their mtime changed
+    rescanned: int = 0
+    last_scan_seconds: float = 0.0
+    last_refresh_seconds: float = 0.0
+
+
+class _Directory:
+    __slots__ = ("mtime", "files", "subdirs")
+
+    def __init__(self, mtime: int, files: list[str], subdirs: list[str]):
+        self.mtime = mtime
+        self.files = files
+        self.subdirs = subdirs
+
+
+@dataclass
+class _Snapshot:
+    # Sorted paths relative to the root, overall and by lowercase extension
+    paths: list[str] = field(default_factory=list)
+    by_extension: dict[str, list[str]] = field(default_factory=dict)
+
+
+def _is_hidden(name: str) -> bool:
+    return name.startswith(".")
+
+
+def _glob_prefix(pattern: str) -> str:
+    """The literal start of a glob pattern, every match starts with it."""
+    match = re.search(r"[*?\[]", pattern)
+    return pattern if match is None else pattern[: match.start()]
+
+
+def _join(relative: str, name: str) -> str:
+    return os.path.join(relative, name) if relative else name
+
+
+def _normalize_extensions(extensions: Optional[Iterable[str]]) -> Optional[set[str]]:
+    if extensions is None:
+        return None
+    return {("." + extension if extension and not extension.startswith(".") else extension).lower() for extension in extensions}
+
+
+def walk_files(
+    root: str,
+    extensions: Optional[Iterable[str]] = None,
+    pattern: Optional[str] = None,
+    include_hidden: bool = False,
+    limit: Optional[int] = None,
+) -> list[str]:
+    """Paths relative to root like FileIndex.query, read with os.scandir until limit of them matched.
+
+    For trees that aren't indexed, a small limit keeps listing a large tree cheap. Directories
+    are read in order of their names, but unlike a query the result isn't sorted overall.
+    """
+    normalized = _normalize_extensions(extensions)
+    regex = re.compile(fnmatch.translate(pattern)) if pattern is not None else None
+    results: list[str] = []
+    pending = [""]
+    while pending:
+        relative = pending.pop()
+        try:
+            with os.scandir(os.path.join(root, relative) if relative else root) as entries:
+                entries = sorted(entries, key=lambda entry: entry.name)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            if not include_hidden and _is_hidden(entry.name):
+                continue
+            path = _join(relative, entry.name)
+            try:
+                if entry.is_dir():
+                    if not entry.is_symlink():
+                        subdirs.append(path)
+                    continue
+            except OSError:
+                continue
+            if normalized is not None and os.path.splitext(entry.name)[1].lower() not in normalized:
+                continue
+            if regex is not None and not regex.match(path):
+                continue
+            results.append(path)
+            if limit is not None and len(results) >= limit:
+                return results
+        pending.extend(reversed(subdirs))
+    return results
+
+
+def _with_prefix(paths: list[str], prefix: str) -> Iterator[str]:
+    index = bisect.bisect_left(paths, prefix)
+    while index < len(paths) and paths[index].startswith(prefix):
+        yield paths[index]
+        index += 1
+
+
+class FileIndex:
+    """The files below root, scanned once with os.scandir and kept current by comparing directory mtimes.
+
+    Paths are relative to root and kept sorted, so prefix queries are a bisect and extension
+    queries a lookup, answered from an immutable snapshot without touching the file system.
+    Hidden files and directories are left out, so .git, .venv and the like are neither read
+    nor stat'ed again; use walk_files for listings that include them. start scans and then refreshes in a background thread every refresh_interval seconds; a
+    refresh stats every directory and only reads those whose mtime changed, which is how files
+    that were added, removed or renamed show up. Symlinked directories are neither listed nor
+    followed, like os.walk. Once started, only the background thread calls scan and refresh.
+    """
+
+    def __init__(self, root: str, refresh_interval: float = 2.0):
+        self.root = os.path.abspath(root)
+        self.refresh_interval = refresh_interval
+        self.metrics = FileIndexMetrics()
+        # Set once the first scan is published
+        self.ready = threading.Event()
+        self._directories: dict[str, _Directory] = {}
+        self._snapshot = _Snapshot()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="file-index", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        self.scan()
+        while not self._stop.wait(self.refresh_interval):
+            self.refresh()
+
+    def _path(self, relative: str) -> str:
+        return os.path.join(self.root, relative) if relative else self.root
+
+    def _read(self, relative: str) -> Optional[_Directory]:
+        path = self._path(relative)
+        try:
+            # Taken before reading, a change made while reading shows up in the next refresh
+            mtime = os.stat(path).st_mtime_ns
+            files, subdirs = [], []
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if _is_hidden(entry.name):
+                        continue
+                    try:
+                        if not entry.is_dir():
+                            files.append(entry.name)
+                        elif not entry.is_symlink():
+                            subdirs.append(entry.name)
+                    except OSError:
+                        continue
+        except OSError:
+            return None
+        return _Directory(mtime, files, subdirs)
+
+    def _add_tree(self, relative: str) -> list[str]:
+        """Read the directory and everything below it, returns the paths of their files."""
+        pending = [relative]
+        files = []
+        while pending:
+            relative = pending.pop()
+            directory = self._read(relative)
+            if directory is None:
+                continue
+            self._directories[relative] = directory
+            files.extend(_join(relative, name) for name in directory.files)
+            pending.extend(_join(relative, name) for name in directory.subdirs)
+        return files
+
+    def _remove_tree(self, relative: str) -> list[str]:
+        """Forget the directory and everything below it, returns the paths of their files."""
+        prefix = relative + os.sep
+        keys = [key for key in self._directories if key == relative or key.startswith(prefix)]
+        return [_join(key, name) for key in keys for name in self._directories.pop(key).files]
+
+    def scan(self):
+        """Read the whole tree again."""
+        started = time.perf_counter()
+        self._directories = {}
+        self._add_tree("")
+        self._publish()
+        self.metrics.scans += 1
+        self.metrics.last_scan_seconds = time.perf_counter() - started
+        self.ready.set()
+
+    def refresh(self) -> int:
+        """Read the directories whose mtime changed since they were read, returns how many did."""
+        started = time.perf_counter()
+        directories = self._directories
+        changed = 0
+        removed: list[str] = []
+        added: list[str] = []
+        for relative, directory in list(directories.items()):
+            if directories.get(relative) is not directory:
+                # Removed or read again along with its parent
+                continue
+            try:
+                mtime = os.stat(self._path(relative)).st_mtime_ns
+            except OSError:
+                mtime = None
+            if mtime == directory.mtime:
+                continue
+            changed += 1
+            current = self._read(relative) if mtime is not None else None
+            if current is None:
+                removed.extend(self._remove_tree(relative))
+                continue
+            directories[relative] = current
+            self.metrics.rescanned += 1
+            before, after = set(directory.files), set(current.files)
+            removed.extend(_join(relative, name) for name in before - after)
+            added.extend(_join(relative, name) for name in after - before)
+            before, after = set(directory.subdirs), set(current.subdirs)
+            for name in before - after:
+                removed.extend(self._remove_tree(_join(relative, name)))
+            known = len(directories)
+            for name in after - before:
+                added.extend(self._add_tree(_join(relative, name)))
+            self.metrics.rescanned += len(directories) - known
+        # Inserting into the sorted lists moves their tails, past a few paths sorting everything is cheaper
+        if len(removed) + len(added) > self.metrics.files // 100:
+            self._publish()
+        elif removed or added:
+            self._update(removed, added)
+        self.metrics.refreshes += 1
+        self.metrics.last_refresh_seconds = time.perf_counter() - started
+        return changed
+
+    def _publish(self):
+        """Build the snapshot from every directory."""
+        paths = []
+        for relative, directory in self._directories.items():
+            prefix = relative + os.sep if relative else ""
+            paths.extend(prefix + name for name in directory.files)
+        paths.sort()
+        snapshot = _Snapshot(paths)
+        for path in paths:
+            snapshot.by_extension.setdefault(os.path.splitext(path)[1].lower(), []).append(path)
+        # Queries read whichever snapshot is current, replacing it is atomic
+        self._snapshot = snapshot
+        self.metrics.files = len(paths)
+        self.metrics.directories = len(self._directories)
+
+    def _update(self, removed: list[str], added: list[str]):
+        """Build the snapshot from the current one for a few changed paths, copying only the lists they are in."""
+        current = self._snapshot
+        snapshot = _Snapshot(list(current.paths), dict(current.by_extension))
+        copied: set[str] = set()
+
+        def lists(path: str) -> Iterator[list[str]]:
+            extension = os.path.splitext(path)[1].lower()
+            yield snapshot.paths
+            if extension not in copied:
+                copied.add(extension)
+                snapshot.by_extension[extension] = list(snapshot.by_extension.get(extension, []))
+            yield snapshot.by_extension[extension]
+
+        for path in removed:
+            for paths in lists(path):
+                index = bisect.bisect_left(paths, path)
+                if index < len(paths) and paths[index] == path:
+                    del paths[index]
+        for path in added:
+            for paths in lists(path):
+                bisect.insort(paths, path)
+        self._snapshot = snapshot
+        self.metrics.files = len(snapshot.paths)
+        self.metrics.directories = len(self._directories)
+
+    def query(
+        self,
+        prefix: str = "",
+        extensions: Optional[Iterable[str]] = None,
+        pattern: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> list[str]:
+        """Sorted paths relative to root that start with prefix, have one of extensions and match pattern.
+
+        Extensions are case insensitive, with or without their dot. pattern is an fnmatch glob
+        over the whole relative path, where * also matches the separator.
+        """
+        snapshot = self._snapshot
+        regex = None
+        if pattern is not None:
+            regex = re.compile(fnmatch.translate(pattern))
+            literal = _glob_prefix(pattern)
+            if literal.startswith(prefix):
+                prefix = literal
+            elif not prefix.startswith(literal):
+                return []
+        normalized = _normalize_extensions(extensions)
+        if normalized is None:
+            matches: Iterator[str] = _with_prefix(snapshot.paths, prefix)
+        else:
+            matches = heapq.merge(*(_with_prefix(snapshot.by_extension.get(extension, []), prefix) for extension in normalized))
+        if regex is not None:
+            matches = (path for path in matches if regex.match(path))
+        return list(itertools.islice(matches, limit))
@@ -0,0 +1,80 @@
+import os
+import shutil
+
+from file_index import FileIndex, walk_files
+
+
+def make_tree(root, paths):
+    for path in paths:
+        path = root / path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("")
+
+
+def touch_directory(path):
+    # Directory mtimes can be coarser than the time a test takes, make the change visible
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_queries_by_prefix_extension_and_glob(tmp_path):
+    make_tree(tmp_path, ["a.py", "b.TXT", "src/c.py", "src/d_test.py", "src/deep/e.py", "src.md", ".env", ".git/config", "src/.cache/f.py"])
+    index = FileIndex(str(tmp_path))
+    index.scan()
+
+    assert index.query() == ["a.py", "b.TXT", "src.md", "src/c.py", "src/d_test.py", "src/deep/e.py"]
+    assert index.query("src/") == ["src/c.py", "src/d_test.py", "src/deep/e.py"]
+    assert index.query(extensions=["py", ".txt"]) == ["a.py", "b.TXT", "src/c.py", "src/d_test.py", "src/deep/e.py"]
+    assert index.query(pattern="src/*_test.py") == ["src/d_test.py"]
+    assert index.query("src/", pattern="*.md") == []
+    assert index.query(extensions=[".py"], limit=2) == ["a.py", "src/c.py"]
+    # Hidden files and directories aren't read at all
+    assert (index.metrics.files, index.metrics.directories) == (6, 3)
+
+
+def test_refresh_reads_changed_directories_only(tmp_path):
+    # Enough files that a few changes update the snapshot in place
+    make_tree(tmp_path, ["a.py", "src/b.py", "src/deep/c.py", "docs/d.md", ".hidden/h.py"] + [f"bulk/{i}.txt" for i in range(500)])
+    index = FileIndex(str(tmp_path))
+    index.scan()
+    assert index.refresh() == 0
+
+    make_tree(tmp_path, ["src/deep/new.py", "src/added/e.py", ".hidden/i.py"])
+    shutil.rmtree(tmp_path / "docs")
+    for path in (tmp_path, tmp_path / "src", tmp_path / "src" / "deep", tmp_path / ".hidden"):
+        touch_directory(path)
+    # .hidden isn't indexed, so its change isn't one
+    assert index.refresh() == 3
+    assert index.query(extensions=[".py", ".md"]) == ["a.py", "src/added/e.py", "src/b.py", "src/deep/c.py", "src/deep/new.py"]
+    assert index.query(".hidden/") == []
+    assert index.metrics.files == 505
+    # The three changed visible directories and the added one
+    assert index.metrics.rescanned == 4
+
+    shutil.rmtree(tmp_path / "bulk")
+    touch_directory(tmp_path)
+    assert index.refresh() == 1
+    assert index.query() == ["a.py", "src/added/e.py", "src/b.py", "src/deep/c.py", "src/deep/new.py"]
+
+
+def test_background_thread(tmp_path):
+    make_tree(tmp_path, ["a.py"])
+    index = FileIndex(str(tmp_path), refresh_interval=0.01)
+    index.start()
+    try:
+        assert index.ready.wait(5)
+        assert index.query() == ["a.py"]
+    finally:
+        index.stop()
+
+
+def test_walk_stops_at_limit(tmp_path):
+    make_tree(tmp_path, ["a.py", "b.TXT", "src/c.py", "src/d_test.py", "src/deep/e.py", "src.md", ".env", "src/.cache/f.py"])
+    index = FileIndex(str(tmp_path))
+    index.scan()
+
+    for query in (dict(), dict(extensions=["py"]), dict(pattern="src/*.py")):
+        assert sorted(walk_files(str(tmp_path), **query)) == index.query(**query)
+    assert sorted(walk_files(str(tmp_path), extensions=["py"], include_hidden=True)) == ["a.py", "src/.cache/f.py", "src/c.py", "src/d_test.py", "src/deep/e.py"]
+    assert walk_files(str(tmp_path), extensions=[".py"], limit=2) == ["a.py", "src/c.py"]
+    assert walk_files(str(tmp_path / "missing")) == []
@@ -0,0 +1,95 @@
+import json
+from collections.abc import Callable
+from typing import Any, Optional
+
+
+class IncrementalJSONObject:
+    """A JSON object parsed as it streams in, e.g. from response.function_call_arguments.delta.
+
+    Every delta is scanned once. A top-level field is decoded as soon as its value is complete:
+    a string or container at its closing character, a number or literal at the comma or brace
+    after it. complete is set once the closing brace of the object has arrived. Malformed input
+    raises ValueError, whichever error loads raises for it.
+    """
+
+    def __init__(self, loads: Callable[[str], Any] = json.loads):
+        self.loads = loads
+        self.text = ""
+        self.fields: dict[str, Any] = {}
+        self.complete = False
+        self._scanned = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        # At depth 1: whether a key is expected next, the key read and where its value starts
+        self._expect_key = True
+        self._key: Optional[str] = None
+        self._token_start: Optional[int] = None
+
+    def feed(self, delta: str) -> list[str]:
+        """Scan delta, returns the keys of the fields it completed."""
+        self.text += delta
+        text = self.text
+        completed: list[str] = []
+        for index in range(self._scanned, len(text)):
+            char = text[index]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        if self._expect_key:
+                            self._key = self._load(text[self._token_start : index + 1])
+                            self._token_start = None
+                        else:
+                            completed.append(self._complete_value(index + 1))
+                continue
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1:
+                    self._token_start = index
+            elif char in "{[":
+                if self._depth == 1:
+                    self._token_start = index
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 1 and self._token_start is not None:
+                    completed.append(self._complete_value(index))
+                self._depth -= 1
+                if self._depth == 1:
+                    completed.append(self._complete_value(index + 1))
+                elif self._depth == 0:
+                    self.complete = True
+            elif self._depth == 1:
+                if char == ":":
+                    self._expect_key = False
+                elif char == ",":
+                    if self._token_start is not None:
+                        completed.append(self._complete_value(index))
+                    self._expect_key = True
+                elif not char.isspace() and self._token_start is None:
+                    # A number, true, false or null
+                    self._token_start = index
+        self._scanned = len(text)
+        return completed
+
+    def _load(self, token: str) -> Any:
+        try:
+            return self.loads(token)
+        except ValueError:
+            raise
+        except Exception as error:
+            # Codec decoders have errors of their own, e.g. msgspec.DecodeError in older versions
+            raise ValueError(f"Malformed JSON value {token!r}") from error
+
+    def _complete_value(self, end: int) -> str:
+        if self._key is None or self._token_start is None:
+            raise ValueError(f"Unexpected character at {end} in {self.text!r}")
+        key = self._key
+        self.fields[key] = self._load(self.text[self._token_start : end])
+        self._key = None
+        self._token_start = None
+        return key
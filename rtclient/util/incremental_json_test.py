@@ -0,0 +1,70 @@
+import json
+
+import pytest
+from incremental_json import IncrementalJSONObject
+
+from rtclient.codec import JSONCodec, OrjsonCodec
+
+ARGUMENTS = {"root": "src/{a,b}", "quote": 'say "hi"\\n', "max_results": 50, "nested": {"x": [1, {"y": "}"}]}, "extensions": [".py"], "hidden": False}
+
+
+def test_fields_complete_as_they_stream():
+    parser = IncrementalJSONObject()
+    completed = []
+    text = json.dumps(ARGUMENTS)
+    seen = {}
+    for index in range(len(text)):
+        for key in parser.feed(text[index]):
+            completed.append(key)
+            seen[key] = index
+    assert parser.complete
+    assert parser.fields == ARGUMENTS
+    assert completed == list(ARGUMENTS)
+    # Strings and containers complete at their closing character, scalars at the delimiter after them
+    assert text[seen["root"]] == '"'
+    assert text[seen["nested"]] == "}"
+    assert text[seen["max_results"]] == ","
+    assert seen["hidden"] == len(text) - 1
+
+
+def test_whole_deltas_and_whitespace():
+    parser = IncrementalJSONObject()
+    assert parser.feed('{ "a" : 1 , "b"') == ["a"]
+    assert not parser.complete
+    assert parser.feed(" : null }  ") == ["b"]
+    assert parser.complete and parser.fields == {"a": 1, "b": None}
+    assert IncrementalJSONObject().feed("{}") == []
+
+
+def test_malformed_input_raises():
+    with pytest.raises(ValueError):
+        IncrementalJSONObject().feed('{"a": 1, 2}')
+    with pytest.raises(ValueError):
+        IncrementalJSONObject().feed('{"a": tru,')
+
+
+class DecodeError(Exception):
+    """Like the errors of codecs that don't derive from ValueError."""
+
+
+def strict_loads(token: str):
+    try:
+        return json.loads(token)
+    except ValueError as error:
+        raise DecodeError(str(error)) from None
+
+
+@pytest.mark.parametrize("loads", [strict_loads, OrjsonCodec().loads, JSONCodec().loads], ids=["custom", "orjson", "stdlib"])
+def test_codec_errors_raise_value_error(loads):
+    parser = IncrementalJSONObject(loads)
+    assert parser.feed('{"a": [1, 2], "b": "x"') == ["a", "b"]
+    with pytest.raises(ValueError):
+        IncrementalJSONObject(loads).feed('{"a": tru,')
+
+
+def test_msgspec_codec_errors_raise_value_error():
+    pytest.importorskip("msgspec")
+    from rtclient.codec import MsgspecCodec
+
+    with pytest.raises(ValueError):
+        IncrementalJSONObject(MsgspecCodec().loads).feed('{"a": [1, 2}')
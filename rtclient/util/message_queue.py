@@ -2,32 +2,147 @@
 # Licensed under the MIT license.
 
 import asyncio
+import time
+from collections import deque
 from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
 from typing import Generic, Optional, TypeVar
 
 T = TypeVar("T")
 
 
+@dataclass
+class RetentionPolicy:
+    """Limits on the messages stored for ids that no receiver is waiting for, None is unlimited.
+
+    max_per_id drops the oldest message of an id, max_total the oldest message of the id that has
+    been stored the longest, ttl drops messages stored for longer than that many seconds. With
+    evict_terminated the backlog of an id that was never received from is dropped as soon as its
+    terminal message (see MessageQueue's is_terminal) arrives, e.g. a response that is never iterated.
+    """
+
+    max_per_id: Optional[int] = None
+    max_total: Optional[int] = None
+    ttl: Optional[float] = None
+    evict_terminated: bool = False
+
+
+@dataclass
+class RetentionMetrics:
+    stored: int = 0
+    max_stored: int = 0
+    evicted_per_id: int = 0
+    evicted_total: int = 0
+    evicted_ttl: int = 0
+    evicted_terminated: int = 0
+
+    @property
+    def evicted(self) -> int:
+        return self.evicted_per_id + self.evicted_total + self.evicted_ttl + self.evicted_terminated
+
+
 class MessageQueue(Generic[T]):
-    def __init__(self, receive_delegate: Callable[[], Awaitable[T]], id_extractor: Callable[[T], Optional[str]]):
-        self._stored_messages: dict[str, list[T]] = {}
-        self.waiting_receivers: dict[str, list[asyncio.Future]] = {}
+    """Routes messages from a single receive delegate to receivers waiting for a given id.
+
+    Messages and receivers are kept in a deque per id and both are counted incrementally, so
+    routing a message is O(1) no matter how many ids or receivers there are. Messages nobody
+    waits for are stored until received, within the limits of the retention policy.
+    """
+
+    def __init__(
+        self,
+        receive_delegate: Callable[[], Awaitable[T]],
+        id_extractor: Callable[[T], Optional[str]],
+        retention: Optional[RetentionPolicy] = None,
+        is_terminal: Optional[Callable[[T], bool]] = None,
+        clock: Callable[[], float] = time.monotonic,
+        observer: Optional[Callable[[str, T], None]] = None,
+    ):
+        # Stored messages with the time they were stored, ids are kept in the order they were first stored
+        self._stored_messages: dict[str, deque[tuple[float, T]]] = {}
+        self._stored_count = 0
+        self.retention = retention or RetentionPolicy()
+        self.metrics = RetentionMetrics()
+        self._is_terminal = is_terminal
+        self._clock = clock
+        self._next_expiry_sweep = 0.0
+        # Ids that have been received from, their backlog is kept when the terminal message arrives
+        self._claimed: set[str] = set()
+        self.waiting_receivers: dict[str, deque[asyncio.Future]] = {}
+        self._waiting_count = 0
         self.is_polling: bool = False
         self.receive_delegate = receive_delegate
         self.id_extractor = id_extractor
+        # Called with the id and every message that has one, before it is routed
+        self.observer = observer
         self.poll_task: Optional[asyncio.Task] = None
 
+    def __len__(self) -> int:
+        """Number of stored messages that no receiver has asked for yet."""
+        return self._stored_count
+
     def _push_back(self, id: str, message: T):
-        if id not in self._stored_messages:
-            self._stored_messages[id] = []
-        self._stored_messages[id].append(message)
+        retention = self.retention
+        now = self._clock() if retention.ttl is not None else 0.0
+        stored = self._stored_messages.get(id)
+        if stored is None:
+            stored = self._stored_messages[id] = deque()
+        stored.append((now, message))
+        self._stored_count += 1
+
+        metrics = self.metrics
+        if retention.max_per_id is not None and len(stored) > retention.max_per_id:
+            self._evict_front(id, stored)
+            metrics.evicted_per_id += 1
+        if retention.max_total is not None and self._stored_count > retention.max_total:
+            oldest = next(iter(self._stored_messages))
+            self._evict_front(oldest, self._stored_messages[oldest])
+            metrics.evicted_total += 1
+        if retention.ttl is not None and now >= self._next_expiry_sweep:
+            self._expire(now, retention.ttl)
+        metrics.stored = self._stored_count
+        metrics.max_stored = max(metrics.max_stored, self._stored_count)
+
+    def _evict_front(self, id: str, stored: deque[tuple[float, T]]):
+        stored.popleft()
+        self._stored_count -= 1
+        if not stored:
+            del self._stored_messages[id]
+
+    def _expire(self, now: float, ttl: float):
+        """Drop messages older than ttl, sweeps at most every quarter ttl so expiry is amortized."""
+        self._next_expiry_sweep = now + ttl / 4
+        cutoff = now - ttl
+        for id in list(self._stored_messages):
+            stored = self._stored_messages[id]
+            while stored and stored[0][0] < cutoff:
+                stored.popleft()
+                self._stored_count -= 1
+                self.metrics.evicted_ttl += 1
+            if not stored:
+                del self._stored_messages[id]
+                self._claimed.discard(id)
+
+    def _evict_terminated(self, id: str):
+        stored = self._stored_messages.pop(id, None)
+        evicted = len(stored) if stored else 0
+        self._stored_count -= evicted
+        self.metrics.evicted_terminated += evicted + 1
+        self.metrics.stored = self._stored_count
+
+    def stored(self, id: str) -> list[T]:
+        """Messages stored for id, oldest first, without receiving them."""
+        return [message for _, message in self._stored_messages.get(id, ())]
 
     def _pop_front(self, id: str) -> Optional[T]:
-        if id not in self._stored_messages:
+        stored = self._stored_messages.get(id)
+        if stored is None:
             return None
-        message = self._stored_messages[id].pop(0)
-        if not self._stored_messages[id]:
+        _, message = stored.popleft()
+        if not stored:
             del self._stored_messages[id]
+        self._stored_count -= 1
+        self.metrics.stored = self._stored_count
         return message
 
     async def poll_receive(self):
@@ -42,7 +157,7 @@ class MessageQueue(Generic[T]):
                     self.notify_end_of_stream()
                     break
                 self.notify_receiver(message)
-                if self.get_all_waiting_receivers_count() == 0:
+                if self._waiting_count == 0:
                     break
         except Exception as error:
             self.notify_error(error)
@@ -50,48 +165,122 @@ class MessageQueue(Generic[T]):
             self.is_polling = False
             self.poll_task = None
 
-    def notify_error(self, error: Exception):
-        for futures in self.waiting_receivers.values():
-            for future in futures:
-                if not future.done():
-                    future.set_exception(error)
+    def _clear_receivers(self) -> list[asyncio.Future]:
+        futures = [future for receivers in self.waiting_receivers.values() for future in receivers if not future.done()]
         self.waiting_receivers.clear()
+        self._waiting_count = 0
+        return futures
+
+    def notify_error(self, error: Exception):
+        for future in self._clear_receivers():
+            future.set_exception(error)
 
     def notify_end_of_stream(self):
-        for futures in self.waiting_receivers.values():
-            for future in futures:
-                if not future.done():
-                    future.set_result(None)
-        self.waiting_receivers.clear()
+        for future in self._clear_receivers():
+            future.set_result(None)
 
     def notify_receiver(self, message: T):
         id = self.id_extractor(message)
         if id is None:
             return
+        if self.observer is not None:
+            self.observer(id, message)
 
-        if id not in self.waiting_receivers:
+        if self._is_terminal is not None and self._is_terminal(message):
+            if id in self._claimed:
+                self._claimed.discard(id)
+            elif self.retention.evict_terminated and id not in self.waiting_receivers:
+                self._evict_terminated(id)
+                return
+
+        if not self._hand_off(id, message):
             self._push_back(id, message)
-            return
 
-        future = self.waiting_receivers[id].pop(0)
-        if not self.waiting_receivers[id]:
-            del self.waiting_receivers[id]
-        future.set_result(message)
+    def _hand_off(self, id: str, message: T) -> bool:
+        """Give the message to the first receiver waiting for id, False when there is none."""
+        receivers = self.waiting_receivers.get(id)
+        while receivers:
+            future = receivers.popleft()
+            self._waiting_count -= 1
+            if not receivers:
+                del self.waiting_receivers[id]
+                receivers = None
+            # Receivers that timed out or were cancelled while waiting don't get messages
+            if not future.done():
+                future.set_result(message)
+                return True
+        return False
 
     def get_all_waiting_receivers_count(self) -> int:
-        return sum(len(futures) for futures in self.waiting_receivers.values())
+        return self._waiting_count
 
-    async def receive(self, receiver_id: str) -> Optional[T]:
+    async def receive(self, receiver_id: str, timeout: Optional[float] = None, requeue: bool = True) -> Optional[T]:
+        """Next message for receiver_id, None at the end of the stream.
+
+        Raises TimeoutError when no message arrives within timeout seconds. A receiver that is
+        cancelled or times out stops waiting; with requeue a message that was handed to it but
+        not yet returned is stored again for the next receiver, so it isn't lost.
+        """
+        if self._is_terminal is not None:
+            self._claimed.add(receiver_id)
         found_message = self._pop_front(receiver_id)
         if found_message is not None:
             return found_message
 
-        future = asyncio.Future()
-        if receiver_id not in self.waiting_receivers:
-            self.waiting_receivers[receiver_id] = []
-        self.waiting_receivers[receiver_id].append(future)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        receivers = self.waiting_receivers.get(receiver_id)
+        if receivers is None:
+            receivers = self.waiting_receivers[receiver_id] = deque()
+        receivers.append(future)
+        self._waiting_count += 1
 
         if not self.is_polling and self.poll_task is None:
             self.poll_task = asyncio.create_task(self.poll_receive())
 
-        return await future
+        timer = loop.call_later(timeout, self._time_out, receiver_id, future) if timeout is not None else None
+        try:
+            return await future
+        except (asyncio.CancelledError, TimeoutError):
+            self._abandon(receiver_id, future, requeue)
+            raise
+        finally:
+            if timer is not None:
+                timer.cancel()
+
+    def _time_out(self, receiver_id: str, future: asyncio.Future):
+        if not future.done():
+            future.set_exception(TimeoutError(f"No message for {receiver_id}"))
+
+    def _remove_receiver(self, receiver_id: str, future: asyncio.Future) -> bool:
+        receivers = self.waiting_receivers.get(receiver_id)
+        if receivers is None:
+            return False
+        try:
+            receivers.remove(future)
+        except ValueError:
+            return False
+        self._waiting_count -= 1
+        if not receivers:
+            del self.waiting_receivers[receiver_id]
+        return True
+
+    def _abandon(self, receiver_id: str, future: asyncio.Future, requeue: bool):
+        if self._remove_receiver(receiver_id, future):
+            return
+        # The message was handed over but the receiver was cancelled before it could return it
+        if requeue and future.done() and not future.cancelled() and future.exception() is None:
+            message = future.result()
+            if message is not None:
+                self._requeue(receiver_id, message)
+
+    def _requeue(self, id: str, message: T):
+        if self._hand_off(id, message):
+            return
+        now = self._clock() if self.retention.ttl is not None else 0.0
+        stored = self._stored_messages.get(id)
+        if stored is None:
+            stored = self._stored_messages[id] = deque()
+        stored.appendleft((now, message))
+        self._stored_count += 1
+        self.metrics.stored = self._stored_count
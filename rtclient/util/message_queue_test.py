@@ -1,7 +1,7 @@
 import asyncio
 
 import pytest
-from message_queue import MessageQueue
+from message_queue import MessageQueue, RetentionPolicy
 
 
 class Message:
@@ -25,11 +25,11 @@ def message_queue():
 @pytest.mark.asyncio
 async def test_receive_existing_message(message_queue):
     message = Message("1", "Hello")
-    message_queue.messages.append(message)
+    message_queue.notify_receiver(message)
 
     result = await message_queue.receive("1")
     assert result == message
-    assert len(message_queue.messages) == 0
+    assert len(message_queue) == 0
 
 
 @pytest.mark.asyncio
@@ -46,7 +46,9 @@ async def test_receive_non_existing_message(message_queue):
 @pytest.mark.asyncio
 async def test_receive_multiple_messages(message_queue):
     messages = [Message("1", "First"), Message("2", "Second"), Message("3", "Third")]
-    message_queue.messages.extend(messages)
+    for message in messages:
+        message_queue.notify_receiver(message)
+    assert len(message_queue) == 3
 
     result1 = await message_queue.receive("2")
     result2 = await message_queue.receive("1")
@@ -55,7 +57,7 @@ async def test_receive_multiple_messages(message_queue):
     assert result1 == messages[1]
     assert result2 == messages[0]
     assert result3 == messages[2]
-    assert len(message_queue.messages) == 0
+    assert len(message_queue) == 0
 
 
 @pytest.mark.asyncio
@@ -92,16 +94,16 @@ async def test_multiple_receivers_same_id(message_queue):
 @pytest.mark.asyncio
 async def test_id_extractor_returns_none(message_queue):
     message = Message("1", "Ignored")
-    message_queue.messages.append(message)
 
     def id_extractor(msg):
         return None
 
     message_queue.id_extractor = id_extractor
+    message_queue.notify_receiver(message)
 
     result = await message_queue.receive("1")
     assert result is None
-    assert len(message_queue.messages) == 1
+    assert len(message_queue) == 0
 
 
 @pytest.mark.asyncio
@@ -169,3 +171,191 @@ async def test_concurrent_receive_calls(message_queue):
     assert [msg.content if msg else None for msg in results] == ["First", "Second", "Third", None]
     assert not message_queue.is_polling
     assert message_queue.poll_task is None
+
+
+@pytest.mark.asyncio
+async def test_receiver_counts_are_incremental(message_queue):
+    messages = [Message("1", "First")]
+    message_queue.receive_delegate = lambda: asyncio.sleep(0, messages.pop(0) if messages else None)
+
+    tasks = [asyncio.create_task(message_queue.receive(id)) for id in ("1", "1", "2")]
+    await asyncio.sleep(0)
+    assert message_queue.get_all_waiting_receivers_count() == 3
+
+    results = await asyncio.gather(*tasks)
+    assert [result.content if result else None for result in results] == ["First", None, None]
+    assert message_queue.get_all_waiting_receivers_count() == 0
+    assert message_queue.waiting_receivers == {}
+
+
+@pytest.mark.asyncio
+async def test_cancelled_receiver_is_skipped(message_queue):
+    cancelled = asyncio.create_task(message_queue.receive("1"))
+    waiting = asyncio.create_task(message_queue.receive("1"))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    await asyncio.sleep(0)
+
+    message = Message("1", "Hello")
+    message_queue.notify_receiver(message)
+    assert await waiting == message
+    assert message_queue.get_all_waiting_receivers_count() == 0
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def retained_queue(retention: RetentionPolicy, **kwargs) -> MessageQueue:
+    async def receive_delegate():
+        return None
+
+    return MessageQueue(receive_delegate, lambda message: message.id, retention, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_per_id_and_total_limits_drop_oldest():
+    queue = retained_queue(RetentionPolicy(max_per_id=2, max_total=3))
+    for id, content in [("a", "a1"), ("a", "a2"), ("a", "a3"), ("b", "b1"), ("b", "b2")]:
+        queue.notify_receiver(Message(id, content))
+
+    assert len(queue) == 3
+    assert queue.metrics.evicted_per_id == 1
+    assert queue.metrics.evicted_total == 1
+    assert queue.metrics.max_stored == 3
+    assert (await queue.receive("a")).content == "a3"
+    assert [(await queue.receive("b")).content for _ in range(2)] == ["b1", "b2"]
+    assert queue.metrics.stored == 0
+
+
+@pytest.mark.asyncio
+async def test_ttl_expires_stored_messages():
+    clock = Clock()
+    queue = retained_queue(RetentionPolicy(ttl=10), clock=clock)
+    queue.notify_receiver(Message("a", "old"))
+    clock.now = 8
+    queue.notify_receiver(Message("b", "new"))
+    clock.now = 12
+    queue.notify_receiver(Message("c", "newest"))
+
+    assert queue.metrics.evicted_ttl == 1
+    assert await queue.receive("a") is None
+    assert (await queue.receive("b")).content == "new"
+
+
+@pytest.mark.asyncio
+async def test_terminal_message_evicts_unclaimed_backlog():
+    queue = retained_queue(RetentionPolicy(evict_terminated=True), is_terminal=lambda message: message.content == "done")
+    for content in ["delta", "delta", "done"]:
+        queue.notify_receiver(Message("ignored", content))
+    assert len(queue) == 0
+    assert queue.metrics.evicted_terminated == 3
+
+    queue.notify_receiver(Message("claimed", "delta"))
+    assert (await queue.receive("claimed")).content == "delta"
+    queue.notify_receiver(Message("claimed", "delta"))
+    queue.notify_receiver(Message("claimed", "done"))
+    assert [(await queue.receive("claimed")).content for _ in range(2)] == ["delta", "done"]
+
+
+def idle_queue() -> MessageQueue:
+    """Queue whose delegate never returns, so only notify_receiver delivers messages."""
+
+    async def receive_delegate():
+        await asyncio.Event().wait()
+
+    return MessageQueue(receive_delegate, lambda message: message.id)
+
+
+async def stop_polling(queue: MessageQueue):
+    if queue.poll_task is not None:
+        queue.poll_task.cancel()
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_receivers_are_removed():
+    queue = idle_queue()
+    for _ in range(5000):
+        receiver = asyncio.create_task(queue.receive("1"))
+        await asyncio.sleep(0)
+        assert queue.get_all_waiting_receivers_count() == 1
+        receiver.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await receiver
+        assert queue.get_all_waiting_receivers_count() == 0
+        assert queue.waiting_receivers == {}
+
+    message = Message("1", "Kept")
+    queue.notify_receiver(message)
+    assert len(queue) == 1
+    assert await queue.receive("1") == message
+    await stop_polling(queue)
+
+
+@pytest.mark.asyncio
+async def test_messages_handed_to_cancelled_receivers_are_requeued():
+    queue = idle_queue()
+    received = []
+    for index in range(5000):
+        receiver = asyncio.create_task(queue.receive("1"))
+        await asyncio.sleep(0)
+        queue.notify_receiver(Message("1", index))
+        if index % 2:
+            # Cancelled after the message was handed over but before the receiver returned it
+            receiver.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await receiver
+            received.append((await queue.receive("1")).content)
+        else:
+            received.append((await receiver).content)
+
+    assert received == list(range(5000))
+    assert len(queue) == 0
+    assert queue.get_all_waiting_receivers_count() == 0
+    await stop_polling(queue)
+
+
+@pytest.mark.asyncio
+async def test_requeued_message_goes_to_next_waiting_receiver():
+    queue = idle_queue()
+    first = asyncio.create_task(queue.receive("1"))
+    second = asyncio.create_task(queue.receive("1"))
+    await asyncio.sleep(0)
+    queue.notify_receiver(Message("1", "Hello"))
+    first.cancel()
+
+    assert (await second).content == "Hello"
+    assert len(queue) == 0
+
+    third = asyncio.create_task(queue.receive("1", requeue=False))
+    await asyncio.sleep(0)
+    queue.notify_receiver(Message("1", "Dropped"))
+    third.cancel()
+    await asyncio.sleep(0)
+    assert len(queue) == 0
+    await stop_polling(queue)
+
+
+@pytest.mark.asyncio
+async def test_receive_timeout():
+    queue = idle_queue()
+    with pytest.raises(TimeoutError):
+        await queue.receive("1", timeout=0.01)
+    assert queue.get_all_waiting_receivers_count() == 0
+
+    results = await asyncio.gather(
+        *(queue.receive("1", timeout=0.001) for _ in range(1000)), return_exceptions=True
+    )
+    assert all(isinstance(result, TimeoutError) for result in results)
+    assert queue.waiting_receivers == {}
+
+    receiver = asyncio.create_task(queue.receive("1", timeout=5))
+    await asyncio.sleep(0)
+    queue.notify_receiver(Message("1", "In time"))
+    assert (await receiver).content == "In time"
+    await stop_polling(queue)
@@ -0,0 +1,592 @@
+"""Local stand-in for the Realtime API websocket, for offline tests, load tests and latency benchmarks.
+
+Speaks the beta event protocol modelled in rtclient.models: session.created/updated, server VAD
+driven by the energy of the appended audio, scripted responses that stream audio and transcript
+deltas at realtime or accelerated rates, function calls, conversation item create/truncate/delete
+and rate_limits.updated after every response. Usage on response.done counts the input tokens of
+the conversation the response was generated from.
+
+Usage: uv run python -m rtclient.util.mock_server [--port 8765] [--speed 1]
+then point realtime.py at it with OPENAI_REALTIME_URL=ws://127.0.0.1:8765
+"""
+
+import argparse
+import asyncio
+import base64
+import itertools
+from collections import Counter
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
+from typing import Any, Optional, Union
+
+import numpy as np
+from aiohttp import WSMsgType, web
+
+from rtclient.codec import get_codec
+
+SAMPLE_RATE = 24000
+SAMPLE_WIDTH = 2
+VAD_WINDOW_MS = 10
+# Input token costs: about 4 characters of text per token, user audio at 10 tokens and assistant
+# audio at 20 tokens per second
+CHARS_PER_TOKEN = 4
+USER_AUDIO_MS_PER_TOKEN = 100
+ASSISTANT_AUDIO_MS_PER_TOKEN = 50
+
+
+@dataclass
+class MockFunctionCall:
+    name: str
+    arguments: str = "{}"
+    # Simulated time between the deltas of the arguments, streamed 8 characters at a time
+    delta_ms: float = 0
+
+
+@dataclass
+class MockResponse:
+    """What the mock model answers with, an assistant message and/or function calls."""
+
+    transcript: str = "This is a response from the mock realtime server."
+    audio_ms: int = 1000
+    function_calls: list[MockFunctionCall] = field(default_factory=list)
+    # Simulated model latency before the first output of the response
+    latency_ms: float = 0
+
+
+# Scripted responses are used in order and repeat, or chosen by a callable from the conversation items so far.
+Script = Union[Sequence[MockResponse], Callable[[list[dict]], MockResponse]]
+
+
+def default_script(conversation: list[dict]) -> MockResponse:
+    """Answer tool outputs with a short message and everything else with one second of audio."""
+    if conversation and conversation[-1]["type"] == "function_call_output":
+        return MockResponse(transcript="Here is the result of the tool call.", audio_ms=500)
+    return MockResponse()
+
+
+def tone(ms: int, frequency: float = 440.0, amplitude: float = 0.2) -> bytes:
+    """Pcm16 mono sine tone at 24kHz, used as response audio and as speech by benchmarks."""
+    t = np.arange(SAMPLE_RATE * ms // 1000) / SAMPLE_RATE
+    return (np.sin(2 * np.pi * frequency * t) * amplitude * 32767).astype("<i2").tobytes()
+
+
+def silence(ms: int) -> bytes:
+    return bytes(SAMPLE_RATE * SAMPLE_WIDTH * ms // 1000)
+
+
+class _Connection:
+    """State of one websocket session: the session config, input buffer, VAD and conversation."""
+
+    def __init__(self, server: "MockRealtimeServer", ws: web.WebSocketResponse, model: str):
+        self.server = server
+        self.ws = ws
+        self._codec = server.codec
+        self._send_lock = asyncio.Lock()
+        self._ids = itertools.count(1)
+        self.session: dict[str, Any] = {
+            "id": self._new_id("sess"),
+            "object": "realtime.session",
+            "model": model,
+            "modalities": ["audio", "text"],
+            "instructions": "",
+            "voice": "alloy",
+            "input_audio_format": "pcm16",
+            "output_audio_format": "pcm16",
+            "input_audio_transcription": None,
+            "turn_detection": {"type": "server_vad", "threshold": 0.5, "prefix_padding_ms": 300, "silence_duration_ms": 500},
+            "tools": [],
+            "tool_choice": "auto",
+            "temperature": 0.8,
+            "max_response_output_tokens": "inf",
+        }
+        self.conversation_id = self._new_id("conv")
+        self.items: list[dict] = []
+        self._script_position = 0
+        # Audio duration of the items by id, for their input tokens
+        self._item_audio_ms: dict[str, float] = {}
+
+        # Input audio buffer and VAD state
+        self._buffered_ms = 0.0
+        self._audio_ms = 0.0
+        self._vad_carry = b""
+        self._speech_item_id: Optional[str] = None
+        self._silence_ms = 0.0
+
+        self._response_task: Optional[asyncio.Task] = None
+        self._response: Optional[dict] = None
+        # Text and audio input tokens of the active response
+        self._response_input_tokens = (0, 0)
+
+        self._handlers: dict[str, Callable[[dict], Any]] = {
+            "session.update": self._session_update,
+            "input_audio_buffer.append": self._audio_append,
+            "input_audio_buffer.commit": self._audio_commit,
+            "input_audio_buffer.clear": self._audio_clear,
+            "conversation.item.create": self._item_create,
+            "conversation.item.truncate": self._item_truncate,
+            "conversation.item.delete": self._item_delete,
+            "response.create": self._response_create,
+            "response.cancel": self._response_cancel,
+        }
+
+    def _new_id(self, prefix: str) -> str:
+        return f"{prefix}_Mock{next(self._ids):016d}"
+
+    async def emit(self, event_type: str, **fields):
+        event = {"type": event_type, "event_id": self._new_id("event"), **fields}
+        async with self._send_lock:
+            if not self.ws.closed:
+                await self.ws.send_str(self._codec.dumps(event))
+        self.server.sent[event_type] += 1
+
+    async def error(self, message: str, code: str, event_id: Optional[str] = None):
+        await self.emit(
+            "error",
+            error={"type": "invalid_request_error", "code": code, "message": message, "param": None, "event_id": event_id},
+        )
+
+    async def run(self):
+        await self.emit("session.created", session=self.session)
+        try:
+            async for message in self.ws:
+                if message.type != WSMsgType.TEXT:
+                    break
+                event = self._codec.loads(message.data)
+                event_type = event.get("type")
+                self.server.received[event_type] += 1
+                handler = self._handlers.get(event_type)
+                if handler is None:
+                    await self.error(f"Invalid value: '{event_type}'", "invalid_value", event.get("event_id"))
+                    continue
+                await handler(event)
+        finally:
+            if self._response_task is not None:
+                self._response_task.cancel()
+
+    # Session and input audio
+
+    async def _session_update(self, event: dict):
+        self.session.update({key: value for key, value in event.get("session", {}).items() if value is not None})
+        await self.emit("session.updated", session=self.session)
+
+    async def _audio_append(self, event: dict):
+        pcm = base64.b64decode(event["audio"])
+        self._buffered_ms += len(pcm) / (SAMPLE_RATE * SAMPLE_WIDTH) * 1000
+        turn_detection = self.session.get("turn_detection")
+        if turn_detection and turn_detection.get("type") == "server_vad":
+            await self._detect_speech(pcm, turn_detection)
+        else:
+            self._audio_ms += len(pcm) / (SAMPLE_RATE * SAMPLE_WIDTH) * 1000
+
+    async def _detect_speech(self, pcm: bytes, turn_detection: dict):
+        """Energy VAD over fixed windows, the window RMS relative to full scale is compared to vad_threshold."""
+        window = SAMPLE_RATE * SAMPLE_WIDTH * VAD_WINDOW_MS // 1000
+        data = self._vad_carry + pcm
+        usable = len(data) - len(data) % window
+        self._vad_carry = data[usable:]
+        if not usable:
+            return
+        samples = np.frombuffer(data[:usable], dtype="<i2").astype(np.float32).reshape(-1, window // SAMPLE_WIDTH)
+        energies = np.sqrt(np.mean(samples * samples, axis=1)) / 32768
+        silence_duration_ms = turn_detection.get("silence_duration_ms") or 500
+        prefix_padding_ms = turn_detection.get("prefix_padding_ms") or 0
+        for energy in energies:
+            self._audio_ms += VAD_WINDOW_MS
+            speaking = energy >= self.server.vad_threshold
+            if self._speech_item_id is None:
+                if speaking:
+                    self._speech_item_id = self._new_id("item")
+                    self._silence_ms = 0
+                    if turn_detection.get("interrupt_response", True):
+                        await self._cancel_response("turn_detected")
+                    await self.emit(
+                        "input_audio_buffer.speech_started",
+                        audio_start_ms=int(max(0, self._audio_ms - VAD_WINDOW_MS - prefix_padding_ms)),
+                        item_id=self._speech_item_id,
+                    )
+            elif speaking:
+                self._silence_ms = 0
+            else:
+                self._silence_ms += VAD_WINDOW_MS
+                if self._silence_ms >= silence_duration_ms:
+                    item_id, self._speech_item_id = self._speech_item_id, None
+                    await self.emit("input_audio_buffer.speech_stopped", audio_end_ms=int(self._audio_ms), item_id=item_id)
+                    await self._commit(item_id)
+                    if turn_detection.get("create_response", True):
+                        await self._response_create({})
+
+    async def _audio_commit(self, event: dict):
+        if self._buffered_ms < 100:
+            await self.error(
+                f"Error committing input audio buffer: buffer too small. Expected at least 100ms of audio, but buffer only has {self._buffered_ms:.2f}ms of audio.",
+                "input_audio_buffer_commit_empty",
+                event.get("event_id"),
+            )
+            return
+        await self._commit(self._speech_item_id or self._new_id("item"))
+        self._speech_item_id = None
+
+    async def _commit(self, item_id: str):
+        previous_item_id = self.items[-1]["id"] if self.items else None
+        self._item_audio_ms[item_id] = self._buffered_ms
+        self._buffered_ms = 0
+        await self.emit("input_audio_buffer.committed", previous_item_id=previous_item_id, item_id=item_id)
+        transcription = self.session.get("input_audio_transcription")
+        item = {
+            "id": item_id,
+            "object": "realtime.item",
+            "type": "message",
+            "status": "completed",
+            "role": "user",
+            "content": [{"type": "input_audio", "transcript": None}],
+        }
+        await self._add_item(item, previous_item_id)
+        if transcription:
+            transcript = self.server.user_transcript
+            item["content"][0]["transcript"] = transcript
+            await self.emit(
+                "conversation.item.input_audio_transcription.completed",
+                item_id=item_id,
+                content_index=0,
+                transcript=transcript,
+            )
+
+    async def _audio_clear(self, event: dict):
+        self._buffered_ms = 0
+        self._vad_carry = b""
+        self._speech_item_id = None
+        await self.emit("input_audio_buffer.cleared")
+
+    # Conversation items
+
+    def _find_item(self, item_id: Optional[str]) -> int:
+        for index, item in enumerate(self.items):
+            if item["id"] == item_id:
+                return index
+        return -1
+
+    async def _add_item(self, item: dict, previous_item_id: Optional[str]):
+        index = self._find_item(previous_item_id) + 1 if previous_item_id else len(self.items)
+        self.items.insert(index, item)
+        previous = self.items[index - 1]["id"] if index else None
+        await self.emit("conversation.item.created", previous_item_id=previous, item=item)
+
+    async def _item_create(self, event: dict):
+        previous_item_id = event.get("previous_item_id")
+        if previous_item_id and self._find_item(previous_item_id) < 0:
+            await self.error(
+                f"Previous item with id '{previous_item_id}' not found", "item_not_found", event.get("event_id")
+            )
+            return
+        item = {"id": self._new_id("item"), "object": "realtime.item", "status": "completed", **event["item"]}
+        await self._add_item(item, previous_item_id)
+
+    async def _item_truncate(self, event: dict):
+        index = self._find_item(event.get("item_id"))
+        if index < 0 or self.items[index].get("role") != "assistant":
+            await self.error(
+                f"Assistant item with id '{event.get('item_id')}' not found", "item_not_found", event.get("event_id")
+            )
+            return
+        # Like the real API, truncating the audio drops the transcript of the unplayed part, here all of it
+        for part in self.items[index]["content"]:
+            if part.get("type") == "audio":
+                part["transcript"] = None
+        self._item_audio_ms[event["item_id"]] = event["audio_end_ms"]
+        await self.emit(
+            "conversation.item.truncated",
+            item_id=event["item_id"],
+            content_index=event.get("content_index", 0),
+            audio_end_ms=event["audio_end_ms"],
+        )
+
+    async def _item_delete(self, event: dict):
+        index = self._find_item(event.get("item_id"))
+        if index < 0:
+            await self.error(f"Item with id '{event.get('item_id')}' not found", "item_not_found", event.get("event_id"))
+            return
+        del self.items[index]
+        self._item_audio_ms.pop(event["item_id"], None)
+        await self.emit("conversation.item.deleted", item_id=event["item_id"])
+
+    # Responses
+
+    def _input_tokens(self) -> tuple[int, int]:
+        """Text and audio tokens of the instructions and conversation items."""
+        chars = len(self.session.get("instructions") or "")
+        audio_tokens = 0
+        for item in self.items:
+            chars += len(item.get("name", "")) + len(item.get("arguments", "")) + len(item.get("output", ""))
+            for part in item.get("content", []):
+                chars += len(part.get("text") or "")
+            ms_per_token = ASSISTANT_AUDIO_MS_PER_TOKEN if item.get("role") == "assistant" else USER_AUDIO_MS_PER_TOKEN
+            audio_tokens += -(-int(self._item_audio_ms.get(item["id"], 0)) // ms_per_token)
+        return -(-chars // CHARS_PER_TOKEN), audio_tokens
+
+    def _next_scripted(self) -> MockResponse:
+        script = self.server.script
+        if callable(script):
+            return script(self.items)
+        scripted = script[self._script_position % len(script)]
+        self._script_position += 1
+        return scripted
+
+    async def _response_create(self, event: dict):
+        if self._response_task is not None:
+            await self.error(
+                "Conversation already has an active response", "conversation_already_has_active_response", event.get("event_id")
+            )
+            return
+        self._response = {
+            "object": "realtime.response",
+            "id": self._new_id("resp"),
+            "status": "in_progress",
+            "status_details": None,
+            "output": [],
+            "conversation_id": self.conversation_id,
+            "usage": None,
+        }
+        self._response_input_tokens = self._input_tokens()
+        await self.emit("response.created", response=self._response)
+        self._response_task = asyncio.create_task(self._stream_response(self._response, self._next_scripted()))
+
+    async def _response_cancel(self, event: dict):
+        if not await self._cancel_response("client_cancelled"):
+            await self.error("Cancellation failed: no active response found", "response_cancel_not_active", event.get("event_id"))
+
+    async def _cancel_response(self, reason: str) -> bool:
+        task, response = self._response_task, self._response
+        if task is None:
+            return False
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        for item in response["output"]:
+            if item["status"] == "in_progress":
+                item["status"] = "incomplete"
+        response["status"] = "cancelled"
+        response["status_details"] = {"type": "cancelled", "reason": reason}
+        await self._finish_response(response)
+        return True
+
+    async def _finish_response(self, response: dict):
+        self._response_task = None
+        self._response = None
+        # Roughly four characters per token
+        output_tokens = sum(
+            len(item.get("arguments", "")) + sum(len(part.get("transcript") or part.get("text") or "") for part in item.get("content", []))
+            for item in response["output"]
+        ) // CHARS_PER_TOKEN
+        text_tokens, audio_tokens = self._response_input_tokens
+        input_tokens = text_tokens + audio_tokens
+        response["usage"] = {
+            "total_tokens": input_tokens + output_tokens,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "input_token_details": {"text_tokens": text_tokens, "audio_tokens": audio_tokens, "image_tokens": 0, "cached_tokens": 0, "cached_tokens_details": None},
+            "output_token_details": {"text_tokens": output_tokens, "audio_tokens": 0},
+        }
+        await self.emit("response.done", response=response)
+        await self.emit(
+            "rate_limits.updated",
+            rate_limits=[
+                {"name": "requests", "limit": 5000, "remaining": 4999, "reset_seconds": 0.012},
+                {"name": "tokens", "limit": 20000, "remaining": max(20000 - response["usage"]["total_tokens"], 0), "reset_seconds": 0.3},
+            ],
+        )
+
+    async def _sleep_until(self, at: float):
+        delay = at - asyncio.get_running_loop().time()
+        await asyncio.sleep(delay if delay > 0 else 0)
+
+    async def _stream_response(self, response: dict, scripted: MockResponse):
+        loop = asyncio.get_running_loop()
+        speed = self.server.speed
+        prefill_ms = sum(self._response_input_tokens) * self.server.prefill_ms_per_1k_tokens / 1000
+        await asyncio.sleep((scripted.latency_ms + prefill_ms) / 1000)
+        if scripted.transcript or scripted.audio_ms:
+            await self._stream_message(response, scripted, loop.time(), speed)
+        for call in scripted.function_calls:
+            await self._stream_function_call(response, call)
+        response["status"] = "completed"
+        await self._finish_response(response)
+
+    async def _add_output_item(self, response: dict, item: dict) -> int:
+        output_index = len(response["output"])
+        response["output"].append(item)
+        previous_item_id = self.items[-1]["id"] if self.items else None
+        self.items.append(item)
+        await self.emit("response.output_item.added", response_id=response["id"], output_index=output_index, item=item)
+        await self.emit("conversation.item.created", previous_item_id=previous_item_id, item=item)
+        return output_index
+
+    async def _stream_message(self, response: dict, scripted: MockResponse, started_at: float, speed: float):
+        with_audio = "audio" in self.session.get("modalities", ["audio"]) and scripted.audio_ms > 0
+        item = {
+            "id": self._new_id("item"),
+            "object": "realtime.item",
+            "type": "message",
+            "status": "in_progress",
+            "role": "assistant",
+            "content": [],
+        }
+        output_index = await self._add_output_item(response, item)
+        part = {"type": "audio", "transcript": ""} if with_audio else {"type": "text", "text": ""}
+        ids = {"response_id": response["id"], "item_id": item["id"], "output_index": output_index, "content_index": 0}
+        await self.emit("response.content_part.added", **ids, part=part)
+
+        words = scripted.transcript.split(" ") if scripted.transcript else []
+        chunk_ms = self.server.chunk_ms
+        chunks = max(1, -(-scripted.audio_ms // chunk_ms)) if with_audio else max(1, len(words))
+        text_key, delta_type = ("transcript", "response.audio_transcript.delta") if with_audio else ("text", "response.text.delta")
+        for index in range(chunks):
+            if with_audio and speed > 0:
+                await self._sleep_until(started_at + index * chunk_ms / 1000 / speed)
+            else:
+                await asyncio.sleep(0)
+            # Spread the words evenly over the audio chunks
+            chunk_words = words[len(words) * index // chunks : len(words) * (index + 1) // chunks]
+            if chunk_words:
+                delta = (" " if part[text_key] else "") + " ".join(chunk_words)
+                part[text_key] += delta
+                await self.emit(delta_type, **ids, delta=delta)
+            if with_audio:
+                ms = min(chunk_ms, scripted.audio_ms - index * chunk_ms)
+                self._item_audio_ms[item["id"]] = self._item_audio_ms.get(item["id"], 0) + ms
+                await self.emit("response.audio.delta", **ids, delta=self.server.audio_chunk(ms))
+
+        if with_audio:
+            await self.emit("response.audio.done", **ids)
+            await self.emit("response.audio_transcript.done", **ids, transcript=part["transcript"])
+        else:
+            await self.emit("response.text.done", **ids, text=part["text"])
+        await self.emit("response.content_part.done", **ids, part=part)
+        item["content"].append(part)
+        item["status"] = "completed"
+        await self.emit("response.output_item.done", response_id=response["id"], output_index=output_index, item=item)
+
+    async def _stream_function_call(self, response: dict, call: MockFunctionCall):
+        item = {
+            "id": self._new_id("item"),
+            "object": "realtime.item",
+            "type": "function_call",
+            "status": "in_progress",
+            "name": call.name,
+            "call_id": self._new_id("call"),
+            "arguments": "",
+        }
+        output_index = await self._add_output_item(response, item)
+        ids = {"response_id": response["id"], "item_id": item["id"], "output_index": output_index, "call_id": item["call_id"]}
+        for start in range(0, len(call.arguments), 8):
+            await asyncio.sleep(call.delta_ms / 1000)
+            delta = call.arguments[start : start + 8]
+            item["arguments"] += delta
+            await self.emit("response.function_call_arguments.delta", **ids, delta=delta)
+        await self.emit("response.function_call_arguments.done", **ids, name=call.name, arguments=item["arguments"])
+        item["status"] = "completed"
+        await self.emit("response.output_item.done", response_id=response["id"], output_index=output_index, item=item)
+
+
+class MockRealtimeServer:
+    """aiohttp server that plays the part of the Realtime API on /v1/realtime.
+
+    speed paces response audio, 1 streams it in realtime, 10 ten times faster and 0 as fast as
+    possible. Input speech is detected when the RMS of a 10ms window relative to full scale reaches
+    vad_threshold, the session's own threshold is a model probability and is not used.
+    prefill_ms_per_1k_tokens adds latency before the first output that grows with the input tokens
+    of the conversation, like the time a model takes to read its context.
+    """
+
+    def __init__(
+        self,
+        script: Optional[Script] = None,
+        speed: float = 1.0,
+        chunk_ms: int = 100,
+        vad_threshold: float = 0.02,
+        user_transcript: str = "This is what the user said.",
+        prefill_ms_per_1k_tokens: float = 0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.script: Script = script if script is not None else default_script
+        self.speed = speed
+        self.chunk_ms = chunk_ms
+        self.vad_threshold = vad_threshold
+        self.user_transcript = user_transcript
+        self.prefill_ms_per_1k_tokens = prefill_ms_per_1k_tokens
+        self.codec = get_codec()
+        self.received: Counter[str] = Counter()
+        self.sent: Counter[str] = Counter()
+        self.connections: list[_Connection] = []
+        self._host = host
+        self._port = port
+        self._runner: Optional[web.AppRunner] = None
+        self._audio_chunks: dict[int, str] = {}
+        self.url = ""
+
+    def audio_chunk(self, ms: int) -> str:
+        """Base64 response audio of the given duration, encoded once per duration."""
+        if ms not in self._audio_chunks:
+            self._audio_chunks[ms] = base64.b64encode(tone(ms)).decode("utf-8")
+        return self._audio_chunks[ms]
+
+    async def _handle(self, request: web.Request) -> web.WebSocketResponse:
+        if not request.headers.get("Authorization", "").startswith("Bearer "):
+            raise web.HTTPUnauthorized(text="Missing bearer token")
+        ws = web.WebSocketResponse(max_msg_size=0)
+        await ws.prepare(request)
+        connection = _Connection(self, ws, request.query.get("model", "gpt-realtime"))
+        self.connections.append(connection)
+        try:
+            await connection.run()
+        finally:
+            self.connections.remove(connection)
+        return ws
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/v1/realtime", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self._host, self._port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"ws://{self._host}:{port}"
+
+    async def stop(self):
+        for connection in list(self.connections):
+            await connection.ws.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.stop()
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--speed", type=float, default=1.0, help="Response audio pacing, 0 is unpaced")
+    parser.add_argument("--latency-ms", type=float, default=300, help="Simulated time to first output")
+    args = parser.parse_args()
+
+    def script(conversation: list[dict]) -> MockResponse:
+        response = default_script(conversation)
+        response.latency_ms = args.latency_ms
+        return response
+
+    async with MockRealtimeServer(script, speed=args.speed, host=args.host, port=args.port) as server:
+        print(f"Mock realtime server listening on {server.url}")
+        await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
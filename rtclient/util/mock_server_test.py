@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+from mock_server import MockFunctionCall, MockRealtimeServer, MockResponse, silence, tone
+
+from rtclient import RTClient, RTInputItem, RTLowLevelClient, RTResponse, ServerVAD
+
+
+async def receive_until(client: RTLowLevelClient, event_type: str) -> list:
+    messages = []
+    while True:
+        message = await asyncio.wait_for(client.recv(), 5)
+        assert message is not None, "every event of the mock must decode strictly"
+        messages.append(message)
+        if message.type == event_type:
+            return messages
+
+
+@pytest.fixture(autouse=True)
+def api_key(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+
+
+@pytest.mark.asyncio
+async def test_server_vad_turn_streams_response():
+    async with MockRealtimeServer(speed=0) as server:
+        async with RTLowLevelClient(url=server.url, model="gpt-realtime-mini") as client:
+            created = await receive_until(client, "session.created")
+            assert created[-1].session.model == "gpt-realtime-mini"
+
+            await client.send({"type": "session.update", "session": {"turn_detection": {"type": "server_vad", "prefix_padding_ms": 50, "silence_duration_ms": 200}}})
+            await client.send_audio_append(silence(100))
+            await client.send_audio_append(tone(300))
+            await client.send_audio_append(silence(300))
+            messages = await receive_until(client, "rate_limits.updated")
+
+    types = [message.type for message in messages]
+    assert types[:7] == [
+        "session.updated",
+        "input_audio_buffer.speech_started",
+        "input_audio_buffer.speech_stopped",
+        "input_audio_buffer.committed",
+        "conversation.item.created",
+        "response.created",
+        "response.output_item.added",
+    ]
+    assert types[-2:] == ["response.done", "rate_limits.updated"]
+    assert types.count("response.audio.delta") == 10
+    assert messages[1].audio_start_ms == 50
+    assert messages[2].audio_end_ms == 600
+    done = messages[-2].response
+    assert done.status == "completed"
+    assert done.output[0].content[0].transcript == MockResponse().transcript
+    # Only the user audio was input
+    assert done.usage.input_tokens == done.usage.input_token_details.audio_tokens > 0
+
+
+@pytest.mark.asyncio
+async def test_function_calls_and_item_operations():
+    script = [MockResponse(transcript="", audio_ms=0, function_calls=[MockFunctionCall("add_numbers", '{"a": 1, "b": 2}')])]
+    async with MockRealtimeServer(script, speed=0) as server:
+        async with RTLowLevelClient(url=server.url) as client:
+            await client.send_response_create()
+            messages = await receive_until(client, "response.done")
+            arguments = next(message for message in messages if message.type == "response.function_call_arguments.done")
+            assert (arguments.name, arguments.arguments) == ("add_numbers", '{"a": 1, "b": 2}')
+
+            output = {"type": "function_call_output", "call_id": arguments.call_id, "output": "3"}
+            await client.send({"type": "conversation.item.create", "item": output})
+            created = (await receive_until(client, "conversation.item.created"))[-1]
+            assert created.previous_item_id == arguments.item_id
+
+            await client.send({"type": "conversation.item.delete", "item_id": created.item.id})
+            assert (await receive_until(client, "conversation.item.deleted"))[-1].item_id == created.item.id
+            await client.send({"type": "conversation.item.delete", "item_id": created.item.id})
+            assert (await receive_until(client, "error"))[-1].error.code == "item_not_found"
+            await client.send_response_cancel()
+            assert (await receive_until(client, "error"))[-1].error.code == "response_cancel_not_active"
+
+
+@pytest.mark.asyncio
+async def test_speech_cancels_and_truncation():
+    async with MockRealtimeServer([MockResponse(audio_ms=5000)], speed=1) as server:
+        async with RTLowLevelClient(url=server.url) as client:
+            await client.send_response_create()
+            added = (await receive_until(client, "response.audio.delta"))[-1]
+            await client.send_audio_append(tone(50))
+            messages = await receive_until(client, "input_audio_buffer.speech_started")
+            done = next(message for message in messages if message.type == "response.done")
+            assert done.response.status == "cancelled"
+            assert done.response.status_details.reason == "turn_detected"
+
+            await client.send({"type": "conversation.item.truncate", "item_id": added.item_id, "content_index": 0, "audio_end_ms": 80})
+            truncated = (await receive_until(client, "conversation.item.truncated"))[-1]
+            assert truncated.audio_end_ms == 80
+
+
+@pytest.mark.asyncio
+async def test_rt_client_turn():
+    async with MockRealtimeServer(speed=0) as server:
+        async with RTClient(url=server.url) as client:
+            await client.configure(turn_detection=ServerVAD(silence_duration_ms=200))
+            for chunk in (tone(300), silence(300)):
+                await client.send_audio(chunk)
+
+            items = client.items()
+            input_item = await asyncio.wait_for(anext(items), 5)
+            assert isinstance(input_item, RTInputItem)
+            await input_item
+            assert input_item.commited
+
+            response = await asyncio.wait_for(anext(items), 5)
+            assert isinstance(response, RTResponse)
+            chunks = [chunk.type async for item in response async for chunk in item]
+            assert chunks.count("audio") == 10
@@ -0,0 +1,151 @@
+import binascii
+import queue
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Optional
+
+from rtclient.models import ItemTruncateMessage, ServerEvent
+
+if TYPE_CHECKING:
+    from rtclient import RTLowLevelClient
+
+
+@dataclass
+class PlaybackPosition:
+    item_id: str
+    content_index: int
+    audio_end_ms: int
+
+
+class PlaybackTracker:
+    """Queue of output audio frames for a playback thread that tracks how much of each item was played.
+
+    Audio is enqueued by item from the event loop and played with play_next from the playback
+    thread. A frame counts as played once it is handed to the output, since nothing can take it
+    back from the device after that. interrupt flushes everything that is still queued.
+    """
+
+    def __init__(self, frame_bytes: int = 2048, bytes_per_ms: int = 48):
+        self.frame_bytes = frame_bytes
+        self.bytes_per_ms = bytes_per_ms
+        self._frames: queue.Queue[tuple[int, str, bytes]] = queue.Queue()
+        self._lock = threading.Lock()
+        # Bumped by interrupt, frames queued before that are skipped by the playback thread
+        self._generation = 0
+        self._queued_bytes = 0
+        self._played: dict[str, int] = {}
+        self._current: Optional[tuple[str, int]] = None
+
+    @property
+    def queued_ms(self) -> float:
+        """Audio waiting to be played."""
+        return self._queued_bytes / self.bytes_per_ms
+
+    def played_ms(self, item_id: str) -> float:
+        return self._played.get(item_id, 0) / self.bytes_per_ms
+
+    def enqueue(self, item_id: str, content_index: int, pcm: bytes):
+        with self._lock:
+            if self._current is None or self._current[0] != item_id:
+                # Only the latest item can be interrupted, forget the others
+                self._played = {item_id: self._played.get(item_id, 0)}
+                self._current = (item_id, content_index)
+            generation = self._generation
+            self._queued_bytes += len(pcm)
+        for start in range(0, len(pcm), self.frame_bytes):
+            self._frames.put((generation, item_id, pcm[start : start + self.frame_bytes]))
+
+    def play_next(self, write: Callable[[bytes], Any], timeout: Optional[float] = None) -> bool:
+        """Write the next queued frame, False when none was queued within timeout."""
+        try:
+            generation, item_id, frame = self._frames.get(timeout=timeout)
+        except queue.Empty:
+            return False
+        with self._lock:
+            if generation != self._generation:
+                return True
+            self._queued_bytes -= len(frame)
+            if item_id in self._played:
+                self._played[item_id] += len(frame)
+        write(frame)
+        return True
+
+    def interrupt(self) -> tuple[Optional[PlaybackPosition], float]:
+        """Flush the queued audio, returns how far the latest item was played and the ms dropped."""
+        with self._lock:
+            self._generation += 1
+            dropped = self._queued_bytes / self.bytes_per_ms
+            self._queued_bytes = 0
+            while True:
+                try:
+                    self._frames.get_nowait()
+                except queue.Empty:
+                    break
+            current, self._current = self._current, None
+            if current is None:
+                return None, dropped
+            item_id, content_index = current
+            return PlaybackPosition(item_id, content_index, int(self._played.get(item_id, 0) // self.bytes_per_ms)), dropped
+
+
+@dataclass
+class BargeInMetrics:
+    interruptions: int = 0
+    cancelled: int = 0
+    truncated: int = 0
+    dropped_ms: float = 0
+
+
+class BargeIn:
+    """Stops the assistant as soon as the user speaks over it.
+
+    Every server event is passed to observe, output audio goes to the tracker. On
+    input_audio_buffer.speech_started the queued audio is flushed, including deltas the client
+    read ahead, the response in progress is cancelled and the interrupted item is truncated to
+    the audio that was played, so the conversation holds what the user actually heard. Set
+    cancel_response to False when the server cancels on its own, see turn_detection's
+    interrupt_response.
+    """
+
+    def __init__(self, client: "RTLowLevelClient", tracker: PlaybackTracker, cancel_response: bool = True):
+        self.client = client
+        self.tracker = tracker
+        self.cancel_response = cancel_response
+        self.metrics = BargeInMetrics()
+        self._active_response: Optional[str] = None
+        self._interrupted_response: Optional[str] = None
+
+    async def observe(self, message: ServerEvent):
+        match message.type:
+            case "response.created":
+                self._active_response = message.response.id
+            case "response.done":
+                if message.response.id == self._active_response:
+                    self._active_response = None
+            case "response.audio.delta":
+                if message.response_id != self._interrupted_response:
+                    self.tracker.enqueue(message.item_id, message.content_index, binascii.a2b_base64(message.delta))
+            case "input_audio_buffer.speech_started":
+                await self.interrupt()
+
+    async def interrupt(self):
+        self.client.discard_pending("response.audio.delta")
+        position, dropped_ms = self.tracker.interrupt()
+        metrics = self.metrics
+        metrics.interruptions += 1
+        metrics.dropped_ms += dropped_ms
+
+        response_id, self._active_response = self._active_response, None
+        if response_id is not None:
+            self._interrupted_response = response_id
+            if self.cancel_response:
+                await self.client.send_response_cancel()
+                metrics.cancelled += 1
+        if position is not None and (dropped_ms > 0 or response_id is not None):
+            await self.client.send(
+                ItemTruncateMessage(
+                    item_id=position.item_id, content_index=position.content_index, audio_end_ms=position.audio_end_ms
+                )
+            )
+            metrics.truncated += 1
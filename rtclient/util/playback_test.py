@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+from mock_server import MockRealtimeServer, MockResponse, silence, tone
+from playback import BargeIn, PlaybackPosition, PlaybackTracker
+
+from rtclient import RTLowLevelClient
+
+
+def test_tracker_counts_played_audio_per_item():
+    tracker = PlaybackTracker(frame_bytes=480)
+    played = []
+    tracker.enqueue("item_1", 0, bytes(960))
+    tracker.enqueue("item_2", 0, bytes(2400))
+    for _ in range(3):
+        assert tracker.play_next(played.append, timeout=0)
+
+    assert tracker.played_ms("item_2") == 10
+    assert tracker.queued_ms == 40
+    assert tracker.interrupt() == (PlaybackPosition("item_2", 0, 10), 40)
+    # Frames queued before the interrupt are skipped
+    assert not tracker.play_next(played.append, timeout=0)
+    assert [len(frame) for frame in played] == [480, 480, 480]
+    assert tracker.interrupt() == (None, 0)
+
+
+@pytest.mark.asyncio
+async def test_barge_in_cancels_and_truncates_to_played_audio(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    tracker = PlaybackTracker()
+    played = []
+    async with MockRealtimeServer([MockResponse(audio_ms=5000)], speed=1, chunk_ms=100) as server:
+        async with RTLowLevelClient(url=server.url) as client:
+            barge_in = BargeIn(client, tracker)
+            turn_detection = {"type": "server_vad", "silence_duration_ms": 100, "interrupt_response": False}
+            await client.send({"type": "session.update", "session": {"turn_detection": turn_detection}})
+            await client.send_audio_append(tone(200) + silence(200))
+
+            audio_deltas = 0
+            messages = []
+            while True:
+                message = await asyncio.wait_for(client.recv(), 5)
+                await barge_in.observe(message)
+                messages.append(message)
+                if message.type == "response.audio.delta":
+                    audio_deltas += 1
+                    if audio_deltas == 3:
+                        for _ in range(4):
+                            tracker.play_next(played.append, timeout=0)
+                        await client.send_audio_append(tone(100))
+                if message.type == "conversation.item.truncated":
+                    break
+
+    done = next(message for message in messages if message.type == "response.done")
+    assert done.response.status_details.reason == "client_cancelled"
+    # Each 100ms delta is played as frames of 2048, 2048 and 704 bytes
+    assert sum(map(len, played)) == 6848
+    assert message.audio_end_ms == 6848 // 48
+    assert barge_in.metrics.cancelled == barge_in.metrics.truncated == 1
+    assert barge_in.metrics.dropped_ms == pytest.approx((3 * 4800 - 6848) / 48)
+    assert tracker.queued_ms == 0
@@ -0,0 +1,315 @@
+"""Wire-level session recordings: every websocket frame with its direction and a monotonic timestamp.
+
+File layout, all little endian:
+    header  MAGIC, wall clock start time (float64)
+    records kind (u8), direction (u8), 2 pad bytes, splice (u32), envelope length (u32),
+            payload length (u32), seconds since start (float64), payload
+
+Text records store the utf-8 frame as is. Audio records (response.audio.delta received and
+input_audio_buffer.append sent) store the frame without its base64 audio, the envelope, followed
+by the raw pcm; the base64 belongs at byte offset splice of the envelope. An index of record
+offsets by response and item ID is written next to the recording as <path>.idx when it's closed,
+and rebuilt by scanning when it's missing, e.g. after a crash.
+
+Recordings are read through mmap so multi-hour recordings can be scanned without loading them.
+
+Usage: uv run python -m rtclient.util.recording <path>
+"""
+
+import argparse
+import asyncio
+import binascii
+import json
+import mmap
+import re
+import struct
+import time
+from collections import Counter, defaultdict
+from collections.abc import Iterator
+from typing import Literal, Optional
+
+from aiohttp import WSMsgType, web
+
+from rtclient.codec import _AUDIO_APPEND_PREFIX, _AUDIO_APPEND_SUFFIX, sniff_event_type
+
+MAGIC = b"RTREC\x00\x01\x00"
+_HEADER = struct.Struct("<8sd")
+_RECORD = struct.Struct("<BBxxIIId")
+
+KIND_TEXT = 0
+KIND_AUDIO = 1
+
+Direction = Literal["in", "out"]
+_DIRECTIONS: tuple[Direction, Direction] = ("in", "out")
+
+_AUDIO_DELTA = re.compile(rb'"delta"\s*:\s*"')
+_IDS = re.compile(rb'"(?:id|item_id|response_id|previous_item_id)"\s*:\s*"((?:resp|item)_[^"]+)"')
+
+
+def index_path(path: str) -> str:
+    return path + ".idx"
+
+
+class SessionRecorder:
+    """Appends frames to a recording, see the module docstring for the format."""
+
+    def __init__(self, path: str, buffer_size: int = 1 << 20):
+        self.path = path
+        self._file = open(path, "wb", buffering=buffer_size)
+        self._file.write(_HEADER.pack(MAGIC, time.time()))
+        self._offset = _HEADER.size
+        self._started = time.monotonic()
+        self._index: defaultdict[str, list[int]] = defaultdict(list)
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+    def _write(self, kind: int, direction: Direction, envelope: bytes, pcm: bytes = b"", splice: int = 0):
+        if self._file.closed:
+            return
+        for match in _IDS.finditer(envelope):
+            self._index[match.group(1).decode("ascii")].append(self._offset)
+        header = _RECORD.pack(
+            kind,
+            _DIRECTIONS.index(direction),
+            splice,
+            len(envelope),
+            len(envelope) + len(pcm),
+            time.monotonic() - self._started,
+        )
+        self._file.write(header)
+        self._file.write(envelope)
+        if pcm:
+            self._file.write(pcm)
+        self._offset += len(header) + len(envelope) + len(pcm)
+
+    def record_received(self, frame: str):
+        data = frame.encode("utf-8")
+        if sniff_event_type(frame) == "response.audio.delta":
+            match = _AUDIO_DELTA.search(data)
+            if match is not None:
+                start = match.end()
+                end = data.index(b'"', start)
+                self._write(KIND_AUDIO, "in", data[:start] + data[end:], binascii.a2b_base64(data[start:end]), start)
+                return
+        self._write(KIND_TEXT, "in", data)
+
+    def record_sent(self, frame: str | bytes | bytearray):
+        self._write(KIND_TEXT, "out", frame.encode("utf-8") if isinstance(frame, str) else bytes(frame))
+
+    def record_audio_sent(self, pcm: bytes | bytearray | memoryview):
+        self._write(KIND_AUDIO, "out", _AUDIO_APPEND_PREFIX + _AUDIO_APPEND_SUFFIX, bytes(pcm), len(_AUDIO_APPEND_PREFIX))
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._file.close()
+        with open(index_path(self.path), "w") as index_file:
+            json.dump(self._index, index_file)
+
+
+class RecordedFrame:
+    __slots__ = ("_recording", "offset", "kind", "direction", "timestamp", "_splice", "_envelope_length", "_payload_length")
+
+    def __init__(self, recording: "SessionRecording", offset: int):
+        kind, direction, splice, envelope_length, payload_length, timestamp = _RECORD.unpack_from(recording._map, offset)
+        self._recording = recording
+        self.offset = offset
+        self.kind = kind
+        self.direction: Direction = _DIRECTIONS[direction]
+        self.timestamp: float = timestamp
+        self._splice = splice
+        self._envelope_length = envelope_length
+        self._payload_length = payload_length
+
+    @property
+    def size(self) -> int:
+        return _RECORD.size + self._payload_length
+
+    @property
+    def _payload_start(self) -> int:
+        return self.offset + _RECORD.size
+
+    @property
+    def pcm(self) -> memoryview:
+        """Raw audio of an audio record, a view into the recording, empty for text records."""
+        start = self._payload_start + self._envelope_length
+        return self._recording._view[start : self._payload_start + self._payload_length]
+
+    @property
+    def event_type(self) -> Optional[str]:
+        start = self._payload_start
+        return sniff_event_type(bytes(self._recording._view[start : start + self._envelope_length]).decode("utf-8"))
+
+    def data(self) -> bytes:
+        """The frame as it was sent over the websocket."""
+        start = self._payload_start
+        envelope = self._recording._view[start : start + self._envelope_length]
+        if self.kind == KIND_TEXT:
+            return bytes(envelope)
+        return b"".join(
+            (envelope[: self._splice], binascii.b2a_base64(self.pcm, newline=False), envelope[self._splice :])
+        )
+
+    def text(self) -> str:
+        return self.data().decode("utf-8")
+
+
+class SessionRecording:
+    """Memory mapped reader for a recording written by SessionRecorder."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        magic, self.started_at = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a session recording")
+        self._index: Optional[dict[str, list[int]]] = None
+
+    def __iter__(self) -> Iterator[RecordedFrame]:
+        return self.frames()
+
+    def frames(self, direction: Optional[Direction] = None) -> Iterator[RecordedFrame]:
+        """Frames in recording order, a truncated last record (e.g. after a crash) is skipped."""
+        offset = _HEADER.size
+        end = len(self._map)
+        while offset + _RECORD.size <= end:
+            frame = RecordedFrame(self, offset)
+            if offset + frame.size > end:
+                break
+            if direction is None or frame.direction == direction:
+                yield frame
+            offset += frame.size
+
+    @property
+    def index(self) -> dict[str, list[int]]:
+        """Record offsets by response and item ID."""
+        if self._index is None:
+            try:
+                with open(index_path(self.path)) as index_file:
+                    self._index = json.load(index_file)
+            except FileNotFoundError:
+                self._index = self._build_index()
+        return self._index
+
+    def _build_index(self) -> dict[str, list[int]]:
+        index: defaultdict[str, list[int]] = defaultdict(list)
+        for frame in self.frames():
+            start = frame._payload_start
+            for match in _IDS.finditer(self._map, start, start + frame._envelope_length):
+                index[match.group(1).decode("ascii")].append(frame.offset)
+        return dict(index)
+
+    def frames_for(self, id: str) -> list[RecordedFrame]:
+        """Frames that mention a response or item ID."""
+        return [RecordedFrame(self, offset) for offset in self.index.get(id, [])]
+
+    @property
+    def duration(self) -> float:
+        last = 0.0
+        for frame in self.frames():
+            last = frame.timestamp
+        return last
+
+    def close(self):
+        self._view.release()
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class ReplayServer:
+    """Websocket server on /v1/realtime that plays back the frames a recording received.
+
+    Point RTClient or RTLowLevelClient at url. speed 1 keeps the original timing, 2 replays twice
+    as fast and 0 as fast as possible. Frames the client sends are counted and otherwise ignored.
+    """
+
+    def __init__(self, path: str, speed: float = 1.0, host: str = "127.0.0.1", port: int = 0):
+        self.path = path
+        self.speed = speed
+        self.received: Counter[str] = Counter()
+        self._host = host
+        self._port = port
+        self._runner: Optional[web.AppRunner] = None
+        self.url = ""
+
+    async def _play(self, ws: web.WebSocketResponse):
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        with SessionRecording(self.path) as recording:
+            for frame in recording.frames("in"):
+                if self.speed > 0:
+                    delay = started + frame.timestamp / self.speed - loop.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                if ws.closed:
+                    return
+                await ws.send_str(frame.text())
+        await ws.close()
+
+    async def _handle(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse(max_msg_size=0)
+        await ws.prepare(request)
+        player = asyncio.create_task(self._play(ws))
+        try:
+            async for message in ws:
+                if message.type == WSMsgType.TEXT:
+                    self.received[sniff_event_type(message.data)] += 1
+        finally:
+            player.cancel()
+        return ws
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/v1/realtime", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self._host, self._port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"ws://{self._host}:{port}"
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize a session recording")
+    parser.add_argument("path")
+    args = parser.parse_args()
+
+    counts: Counter[tuple[Direction, Optional[str]]] = Counter()
+    audio_bytes: Counter[Direction] = Counter()
+    with SessionRecording(args.path) as recording:
+        for frame in recording:
+            counts[frame.direction, frame.event_type] += 1
+            if frame.kind == KIND_AUDIO:
+                audio_bytes[frame.direction] += len(frame.pcm)
+        print(f"{recording.duration:.1f}s, {len(recording.index)} response and item IDs")
+    for direction in _DIRECTIONS:
+        print(f"{direction}: {audio_bytes[direction] / 48000:.1f}s of audio")
+        for (frame_direction, event_type), count in sorted(counts.items(), key=lambda entry: -entry[1]):
+            if frame_direction == direction:
+                print(f"  {count:>8}  {event_type}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import base64
+import json
+import os
+
+import pytest
+from mock_server import MockRealtimeServer, MockResponse, silence, tone
+from recording import KIND_AUDIO, ReplayServer, SessionRecording, index_path
+
+from rtclient import RTLowLevelClient
+
+
+async def record_session(path: str) -> list[str]:
+    """Record one voice turn against the mock server, returns the types of the events received."""
+    received = []
+    async with MockRealtimeServer([MockResponse(audio_ms=300)], speed=0, chunk_ms=100) as server:
+        async with RTLowLevelClient(url=server.url, record_path=path) as client:
+            await client.send({"type": "session.update", "session": {"turn_detection": {"type": "server_vad", "silence_duration_ms": 100}}})
+            await client.send_audio_append(tone(200))
+            await client.send_audio_append(silence(200))
+            async for message in client:
+                received.append(message.type)
+                if message.type == "rate_limits.updated":
+                    break
+    return received
+
+
+@pytest.fixture
+def recording_path(tmp_path, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    return str(tmp_path / "session.rtrec")
+
+
+@pytest.mark.asyncio
+async def test_recording_round_trips_frames(recording_path):
+    received = await record_session(recording_path)
+
+    with SessionRecording(recording_path) as recording:
+        inbound = [json.loads(frame.text()) for frame in recording.frames("in")]
+        assert [event["type"] for event in inbound] == received
+        audio = [frame for frame in recording.frames("in") if frame.kind == KIND_AUDIO]
+        assert len(audio) == 3
+        for frame in audio:
+            assert base64.b64decode(json.loads(frame.text())["delta"]) == frame.pcm
+
+        outbound = list(recording.frames("out"))
+        assert [frame.event_type for frame in outbound] == ["session.update", "input_audio_buffer.append", "input_audio_buffer.append"]
+        assert json.loads(outbound[1].text())["audio"] == base64.b64encode(tone(200)).decode()
+        assert bytes(outbound[1].pcm) == tone(200)
+        timestamps = [frame.timestamp for frame in recording]
+        assert timestamps == sorted(timestamps)
+
+
+@pytest.mark.asyncio
+async def test_index_by_response_and_item(recording_path):
+    await record_session(recording_path)
+
+    with SessionRecording(recording_path) as recording:
+        response_id = next(json.loads(frame.text())["response"]["id"] for frame in recording if frame.event_type == "response.created")
+        types = [frame.event_type for frame in recording.frames_for(response_id)]
+        assert types.count("response.audio.delta") == 3
+        assert types[0] == "response.created" and types[-1] == "response.done"
+        written_index = recording.index
+
+    os.remove(index_path(recording_path))
+    with open(recording_path, "ab") as recording_file:
+        recording_file.write(b"\x00" * 10)  # a record cut short by a crash
+    with SessionRecording(recording_path) as recording:
+        assert recording.index == written_index
+
+
+@pytest.mark.asyncio
+async def test_replay_through_client(recording_path):
+    received = await record_session(recording_path)
+
+    async with ReplayServer(recording_path, speed=0) as server:
+        async with RTLowLevelClient(url=server.url) as client:
+            replayed = [message.type async for message in client]
+    assert replayed == received
@@ -0,0 +1,219 @@
+import asyncio
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Literal, Optional, Union
+
+# Lanes in priority order, a queued control message is always written before tool results and audio.
+# Messages about the input audio buffer, like its commit and clear, go on the audio lane instead,
+# so they are written after the audio queued before them.
+Lane = Literal["control", "tool", "audio"]
+LANES: tuple[Lane, ...] = ("control", "tool", "audio")
+
+# Raw pcm whose base64 stays within the 15 MiB the API accepts per append, coalescing stops there.
+MAX_APPEND_BYTES = 15 * 1024 * 1024 * 3 // 4
+
+# What happens to audio when the audio lane is full.
+#   block       - wait for space, this applies backpressure to the capture loop
+#   drop_oldest - discard the oldest queued chunk
+#   drop_newest - discard the chunk being sent
+#   coalesce    - append the chunk to the newest queued chunk so nothing is lost but fewer frames are sent,
+#                 up to max_append_bytes after which chunks are dropped, as they are when the newest
+#                 entry is a commit or clear
+AudioPolicy = Literal["block", "drop_oldest", "drop_newest", "coalesce"]
+
+Frame = Union[str, bytes, bytearray]
+
+
+@dataclass
+class LaneMetrics:
+    sent: int = 0
+    dropped: int = 0
+    coalesced: int = 0
+    depth: int = 0
+    max_depth: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        """Mean seconds between queueing and having written a message."""
+        return self.total_latency / self.sent if self.sent else 0.0
+
+
+class _Entry:
+    # Entries without a written future are queued audio, everything else is an encoded frame
+    __slots__ = ("payload", "queued_at", "written")
+
+    def __init__(self, payload: Union[Frame, bytearray], queued_at: float, written: Optional[asyncio.Future]):
+        self.payload = payload
+        self.queued_at = queued_at
+        self.written = written
+
+
+class SendScheduler:
+    """Writes outbound messages from a single task, in lane priority order with bounded lanes.
+
+    Control and tool messages are awaited until they've been written, so code that sends a
+    function_call_output and then response.create keeps its order. Audio is raw pcm that is
+    encoded by send_audio when it's written, which is what allows coalescing queued chunks.
+    Frames sent on the audio lane keep their place among the audio and are never dropped or
+    coalesced, nor do they count against max_audio_queue.
+    """
+
+    def __init__(
+        self,
+        send_frame: Callable[[Frame], Awaitable[None]],
+        send_audio: Callable[[bytes | bytearray], Awaitable[None]],
+        audio_policy: AudioPolicy = "coalesce",
+        max_audio_queue: int = 16,
+        max_queue: int = 256,
+        max_append_bytes: int = MAX_APPEND_BYTES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._send_frame = send_frame
+        self._send_audio = send_audio
+        self.audio_policy: AudioPolicy = audio_policy
+        self.max_append_bytes = max_append_bytes
+        self._limits: dict[Lane, int] = {"control": max_queue, "tool": max_queue, "audio": max_audio_queue}
+        self._clock = clock
+        self._lanes: dict[Lane, deque[_Entry]] = {lane: deque() for lane in LANES}
+        self.metrics: dict[Lane, LaneMetrics] = {lane: LaneMetrics() for lane in LANES}
+        self._pending = asyncio.Event()
+        self._space = asyncio.Condition()
+        self._writer: Optional[asyncio.Task] = None
+        self._error: Optional[BaseException] = None
+
+    def start(self):
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._write_loop())
+
+    async def stop(self):
+        if self._writer is not None:
+            self._writer.cancel()
+            try:
+                await self._writer
+            except asyncio.CancelledError:
+                pass
+            self._writer = None
+        for lane in LANES:
+            for entry in self._lanes[lane]:
+                if entry.written is not None and not entry.written.done():
+                    entry.written.cancel()
+            self._lanes[lane].clear()
+            self.metrics[lane].depth = 0
+
+    async def send(self, frame: Frame, lane: Lane = "control"):
+        """Queue an encoded frame and wait until it's written."""
+        written = asyncio.get_running_loop().create_future()
+        if lane == "audio":
+            self._raise_error()
+        else:
+            await self._wait_for_space(lane)
+        self._append(lane, _Entry(frame, self._clock(), written))
+        await written
+
+    async def send_audio(self, pcm: bytes | bytearray | memoryview):
+        """Queue audio according to the audio policy, returns without waiting for it to be written."""
+        self._raise_error()
+        lane: Lane = "audio"
+        queue = self._lanes[lane]
+        metrics = self.metrics[lane]
+        if self._depth(lane) >= self._limits[lane]:
+            if self.audio_policy == "block":
+                await self._wait_for_space(lane)
+            elif self.audio_policy == "drop_newest":
+                metrics.dropped += 1
+                return
+            elif self.audio_policy == "drop_oldest":
+                del queue[next(index for index, entry in enumerate(queue) if entry.written is None)]
+                metrics.dropped += 1
+                metrics.depth = len(queue)
+            else:
+                # Audio after a queued commit or clear belongs to the next buffer, it can't join earlier audio
+                if queue[-1].written is not None or len(queue[-1].payload) + len(pcm) > self.max_append_bytes:
+                    metrics.dropped += 1
+                else:
+                    queue[-1].payload += pcm
+                    metrics.coalesced += 1
+                return
+        self._append(lane, _Entry(bytearray(pcm), self._clock(), None))
+
+    def _depth(self, lane: Lane) -> int:
+        """Queued entries that count against the lane's limit, frames on the audio lane don't."""
+        queue = self._lanes[lane]
+        if lane != "audio":
+            return len(queue)
+        return sum(1 for entry in queue if entry.written is None)
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise ConnectionError("Outbound writer failed") from self._error
+
+    async def _wait_for_space(self, lane: Lane):
+        self._raise_error()
+        if self._depth(lane) < self._limits[lane]:
+            return
+        async with self._space:
+            await self._space.wait_for(lambda: self._depth(lane) < self._limits[lane] or self._error is not None)
+        self._raise_error()
+
+    def _append(self, lane: Lane, entry: _Entry):
+        queue = self._lanes[lane]
+        queue.append(entry)
+        metrics = self.metrics[lane]
+        metrics.depth = len(queue)
+        metrics.max_depth = max(metrics.max_depth, metrics.depth)
+        self._pending.set()
+
+    def _next(self) -> Optional[tuple[Lane, _Entry]]:
+        for lane in LANES:
+            queue = self._lanes[lane]
+            if queue:
+                entry = queue.popleft()
+                self.metrics[lane].depth = len(queue)
+                return lane, entry
+        return None
+
+    async def _write_loop(self):
+        while True:
+            next_entry = self._next()
+            if next_entry is None:
+                self._pending.clear()
+                await self._pending.wait()
+                continue
+            lane, entry = next_entry
+            async with self._space:
+                self._space.notify_all()
+            try:
+                if entry.written is None:
+                    await self._send_audio(entry.payload)
+                else:
+                    await self._send_frame(entry.payload)
+            except asyncio.CancelledError:
+                # stop() only sees the entries still queued, not the one being written
+                if entry.written is not None and not entry.written.done():
+                    entry.written.cancel()
+                raise
+            except Exception as error:
+                await self._fail(error, entry)
+                return
+            latency = self._clock() - entry.queued_at
+            metrics = self.metrics[lane]
+            metrics.sent += 1
+            metrics.total_latency += latency
+            metrics.max_latency = max(metrics.max_latency, latency)
+            if entry.written is not None and not entry.written.done():
+                entry.written.set_result(None)
+
+    async def _fail(self, error: Exception, entry: _Entry):
+        self._error = error
+        for failed in [entry, *(queued for lane in LANES for queued in self._lanes[lane])]:
+            if failed.written is not None and not failed.written.done():
+                failed.written.set_exception(error)
+        for lane in LANES:
+            self._lanes[lane].clear()
+            self.metrics[lane].depth = 0
+        async with self._space:
+            self._space.notify_all()
@@ -0,0 +1,210 @@
+import asyncio
+
+import pytest
+from send_scheduler import SendScheduler
+
+
+class Writer:
+    def __init__(self):
+        self.written: list = []
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def send_frame(self, frame):
+        await self.gate.wait()
+        self.written.append(frame)
+
+    async def send_audio(self, pcm):
+        await self.gate.wait()
+        self.written.append(bytes(pcm))
+
+
+async def settle():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_control_overtakes_queued_audio():
+    writer = Writer()
+    scheduler = SendScheduler(writer.send_frame, writer.send_audio, audio_policy="block")
+    scheduler.start()
+    writer.gate.clear()
+
+    await scheduler.send_audio(b"a1")
+    await settle()  # the writer is now blocked on a1
+    await scheduler.send_audio(b"a2")
+    await scheduler.send_audio(b"a3")
+    tool = asyncio.create_task(scheduler.send('{"type":"conversation.item.create"}', "tool"))
+    control = asyncio.create_task(scheduler.send('{"type":"response.cancel"}', "control"))
+    await settle()
+    writer.gate.set()
+    await asyncio.gather(tool, control)
+    await settle()
+
+    assert writer.written == [
+        b"a1",
+        '{"type":"response.cancel"}',
+        '{"type":"conversation.item.create"}',
+        b"a2",
+        b"a3",
+    ]
+    assert scheduler.metrics["audio"].sent == 3
+    assert scheduler.metrics["audio"].max_depth == 2
+    assert scheduler.metrics["control"].sent == 1
+    assert scheduler.metrics["control"].mean_latency > 0
+    await scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_commit_and_clear_wait_for_queued_audio():
+    writer = Writer()
+    scheduler = SendScheduler(writer.send_frame, writer.send_audio, max_audio_queue=2)
+    scheduler.start()
+    writer.gate.clear()
+
+    await scheduler.send_audio(b"a0")
+    await settle()
+    await scheduler.send_audio(b"a1")
+    commit = asyncio.create_task(scheduler.send('{"type":"input_audio_buffer.commit"}', "audio"))
+    await settle()
+    # The commit doesn't count against max_audio_queue, nor is later audio coalesced into it
+    await scheduler.send_audio(b"a2")
+    await scheduler.send_audio(b"a3")
+    clear = asyncio.create_task(scheduler.send('{"type":"input_audio_buffer.clear"}', "audio"))
+    control = asyncio.create_task(scheduler.send('{"type":"response.create"}', "control"))
+    await settle()
+    writer.gate.set()
+    await asyncio.gather(commit, clear, control)
+
+    assert writer.written == [
+        b"a0",
+        '{"type":"response.create"}',
+        b"a1",
+        '{"type":"input_audio_buffer.commit"}',
+        b"a2a3",
+        '{"type":"input_audio_buffer.clear"}',
+    ]
+    await scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_coalescing_stops_at_max_append_bytes():
+    writer = Writer()
+    scheduler = SendScheduler(writer.send_frame, writer.send_audio, max_audio_queue=1, max_append_bytes=4)
+    scheduler.start()
+    writer.gate.clear()
+
+    await scheduler.send_audio(b"a0")
+    await settle()
+    for index in range(1, 5):
+        await scheduler.send_audio(f"a{index}".encode())
+    writer.gate.set()
+    await settle()
+
+    assert writer.written == [b"a0", b"a1a2"]
+    assert scheduler.metrics["audio"].coalesced == 1
+    assert scheduler.metrics["audio"].dropped == 2
+    await scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_full_lane_ending_in_a_commit_drops_audio():
+    writer = Writer()
+    scheduler = SendScheduler(writer.send_frame, writer.send_audio, max_audio_queue=1)
+    scheduler.start()
+    writer.gate.clear()
+
+    await scheduler.send_audio(b"a0")
+    await settle()
+    await scheduler.send_audio(b"a1")
+    commit = asyncio.create_task(scheduler.send('{"type":"input_audio_buffer.commit"}', "audio"))
+    await settle()
+    await scheduler.send_audio(b"a2")
+    assert len(scheduler._lanes["audio"]) == 2
+    writer.gate.set()
+    await commit
+    await settle()
+
+    assert writer.written == [b"a0", b"a1", '{"type":"input_audio_buffer.commit"}']
+    assert scheduler.metrics["audio"].dropped == 1
+    await scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_stop_cancels_the_frame_being_written():
+    writer = Writer()
+    scheduler = SendScheduler(writer.send_frame, writer.send_audio)
+    scheduler.start()
+    writer.gate.clear()
+
+    sending = asyncio.create_task(scheduler.send('{"type":"response.create"}'))
+    await settle()  # the writer is now blocked on the frame
+    await scheduler.stop()
+
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(sending, 1)
+
+
+@pytest.mark.parametrize(
+    "policy, expected, dropped, coalesced",
+    [
+        ("coalesce", [b"a0", b"a1", b"a2a3a4"], 0, 2),
+        ("drop_oldest", [b"a0", b"a3", b"a4"], 2, 0),
+        ("drop_newest", [b"a0", b"a1", b"a2"], 2, 0),
+    ],
+)
+@pytest.mark.asyncio
+async def test_audio_policies(policy, expected, dropped, coalesced):
+    writer = Writer()
+    scheduler = SendScheduler(writer.send_frame, writer.send_audio, audio_policy=policy, max_audio_queue=2)
+    scheduler.start()
+    writer.gate.clear()
+
+    await scheduler.send_audio(b"a0")
+    await settle()
+    for index in range(1, 5):
+        await scheduler.send_audio(f"a{index}".encode())
+    writer.gate.set()
+    await settle()
+
+    assert writer.written == expected
+    assert scheduler.metrics["audio"].dropped == dropped
+    assert scheduler.metrics["audio"].coalesced == coalesced
+    await scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_block_policy_applies_backpressure():
+    writer = Writer()
+    scheduler = SendScheduler(writer.send_frame, writer.send_audio, audio_policy="block", max_audio_queue=1)
+    scheduler.start()
+    writer.gate.clear()
+
+    await scheduler.send_audio(b"a0")
+    await settle()
+    await scheduler.send_audio(b"a1")
+    blocked = asyncio.create_task(scheduler.send_audio(b"a2"))
+    await settle()
+    assert not blocked.done()
+
+    writer.gate.set()
+    await blocked
+    await settle()
+    assert writer.written == [b"a0", b"a1", b"a2"]
+    await scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_write_errors_reach_senders():
+    async def failing_send(frame):
+        raise OSError("closed")
+
+    scheduler = SendScheduler(failing_send, failing_send)
+    scheduler.start()
+
+    with pytest.raises(OSError):
+        await scheduler.send('{"type":"response.create"}')
+    with pytest.raises(ConnectionError):
+        await scheduler.send_audio(b"a0")
+    await scheduler.stop()
@@ -0,0 +1,179 @@
+import asyncio
+import json
+import logging
+import pickle
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Mapping
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheMetrics:
+    hits: int = 0
+    # Hits that were read from disk, e.g. results cached before a restart
+    disk_hits: int = 0
+    misses: int = 0
+    # Entries dropped on lookup because their TTL passed or they were stale
+    expired: int = 0
+    evicted: int = 0
+    invalidated: int = 0
+    # Results kept in memory only because they pickled to more than max_disk_value_bytes
+    oversized: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+@dataclass
+class CachedResult:
+    value: Any
+    cached_at: float
+    expires_at: float
+
+
+class ToolCache:
+    """Results of tool calls by tool name and arguments, an LRU in memory in front of a diskcache directory.
+
+    Arguments are keyed as canonical JSON, so the order of their fields doesn't matter. Times are
+    wall clock seconds, which keeps the TTLs of results on disk meaningful across restarts. The
+    disk tier is optional, without a directory only the LRU is used. Results that pickle to more
+    than max_disk_value_bytes stay out of it, None lets any size through.
+
+    Disk reads and writes, with the pickling of results, run in a single thread of their own, in
+    the order they were made. Writes are only queued and reads are awaited with aget, so on an
+    event loop only the LRU is touched. close waits for the queued writes.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        directory: Optional[str] = None,
+        max_disk_value_bytes: Optional[int] = 1024 * 1024,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.max_entries = max_entries
+        self.max_disk_value_bytes = max_disk_value_bytes
+        self.metrics = CacheMetrics()
+        self._clock = clock
+        self._memory: OrderedDict[str, CachedResult] = OrderedDict()
+        self._disk = None
+        self._disk_thread: Optional[ThreadPoolExecutor] = None
+        if directory is not None:
+            import diskcache
+
+            self._disk = diskcache.Cache(directory, tag_index=True)
+            self._disk_thread = ThreadPoolExecutor(1, thread_name_prefix="tool-cache")
+
+    @staticmethod
+    def key(name: str, arguments: Mapping[str, Any]) -> str:
+        return f"{name}:{json.dumps(arguments, sort_keys=True, separators=(',', ':'), default=str)}"
+
+    def get(
+        self, name: str, arguments: Mapping[str, Any], stale: Optional[Callable[[float], bool]] = None
+    ) -> Optional[CachedResult]:
+        """The cached result of the call, None when there is none that is current.
+
+        stale is given the time the result was cached and returns True when it is out of date.
+        Blocks while the disk tier is read, see aget.
+        """
+        key = self.key(name, arguments)
+        entry = self._memory.get(key)
+        if entry is None and self._disk is not None:
+            return self._check(key, self._disk_thread.submit(self._disk_get, key).result(), True, stale)
+        return self._check(key, entry, False, stale)
+
+    async def aget(
+        self, name: str, arguments: Mapping[str, Any], stale: Optional[Callable[[float], bool]] = None
+    ) -> Optional[CachedResult]:
+        """get that awaits the disk tier instead of blocking the event loop on it."""
+        key = self.key(name, arguments)
+        entry = self._memory.get(key)
+        if entry is None and self._disk is not None:
+            stored = await asyncio.wrap_future(self._disk_thread.submit(self._disk_get, key))
+            return self._check(key, stored, True, stale)
+        return self._check(key, entry, False, stale)
+
+    def _disk_write(self, function: Callable[..., Any], *args: Any, **kwargs: Any):
+        def report(written: Future):
+            if not written.cancelled() and written.exception() is not None:
+                logger.warning(f"Tool cache write failed - {written.exception()}")
+
+        self._disk_thread.submit(function, *args, **kwargs).add_done_callback(report)
+
+    def _disk_get(self, key: str) -> Optional[CachedResult]:
+        stored = self._disk.get(key)
+        return CachedResult(*pickle.loads(stored)) if stored is not None else None
+
+    def _disk_set(self, key: str, entry: CachedResult, ttl: float, tag: str):
+        # Pickled here rather than by diskcache to know the size before anything is written
+        data = pickle.dumps((entry.value, entry.cached_at, entry.expires_at), protocol=pickle.HIGHEST_PROTOCOL)
+        if self.max_disk_value_bytes is not None and len(data) > self.max_disk_value_bytes:
+            # An older result of the same call mustn't be read in place of this one
+            self._disk.delete(key)
+            self.metrics.oversized += 1
+            return
+        self._disk.set(key, data, expire=ttl if ttl != float("inf") else None, tag=tag)
+
+    def _check(
+        self, key: str, entry: Optional[CachedResult], from_disk: bool, stale: Optional[Callable[[float], bool]]
+    ) -> Optional[CachedResult]:
+        metrics = self.metrics
+        if entry is None:
+            metrics.misses += 1
+            return None
+        if entry.expires_at <= self._clock() or (stale is not None and stale(entry.cached_at)):
+            self._remove(key)
+            metrics.expired += 1
+            metrics.misses += 1
+            return None
+        if from_disk:
+            self._remember(key, entry)
+            metrics.disk_hits += 1
+        else:
+            self._memory.move_to_end(key)
+        metrics.hits += 1
+        return entry
+
+    def set(self, name: str, arguments: Mapping[str, Any], value: Any, ttl: float):
+        key = self.key(name, arguments)
+        now = self._clock()
+        entry = CachedResult(value, now, now + ttl)
+        self._remember(key, entry)
+        if self._disk is not None:
+            self._disk_write(self._disk_set, key, entry, ttl, name)
+
+    def _remember(self, key: str, entry: CachedResult):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.metrics.evicted += 1
+
+    def _remove(self, key: str):
+        self._memory.pop(key, None)
+        if self._disk is not None:
+            self._disk_write(self._disk.delete, key)
+
+    def invalidate(self, name: str) -> int:
+        """Drop every cached result of the tool, returns how many were in memory."""
+        prefix = f"{name}:"
+        keys = [key for key in self._memory if key.startswith(prefix)]
+        for key in keys:
+            del self._memory[key]
+        if self._disk is not None:
+            self._disk_write(self._disk.evict, name)
+        self.metrics.invalidated += len(keys)
+        return len(keys)
+
+    def close(self):
+        if self._disk is not None:
+            self._disk_thread.shutdown(wait=True)
+            self._disk.close()
+            self._disk = None
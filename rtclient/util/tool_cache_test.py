@@ -0,0 +1,110 @@
+import threading
+
+import pytest
+from tool_cache import ToolCache
+from tool_executor import ToolExecutor, ToolSpec
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_lru_ttl_and_stale_results():
+    clock = Clock()
+    cache = ToolCache(max_entries=2, clock=clock)
+    cache.set("list_files", {"root": "a", "max_results": 5}, ["a.py"], ttl=10)
+    cache.set("list_files", {"root": "b"}, ["b.py"], ttl=10)
+    # Field order doesn't matter
+    assert cache.get("list_files", {"max_results": 5, "root": "a"}).value == ["a.py"]
+    cache.set("list_files", {"root": "c"}, ["c.py"], ttl=10)
+    # b was the least recently used
+    assert cache.get("list_files", {"root": "b"}) is None
+    assert cache.get("list_files", {"root": "c"}, stale=lambda cached_at: cached_at < clock.now) is not None
+    clock.now += 1
+    assert cache.get("list_files", {"root": "c"}, stale=lambda cached_at: cached_at < clock.now) is None
+    clock.now += 10
+    assert cache.get("list_files", {"root": "a", "max_results": 5}) is None
+
+    metrics = cache.metrics
+    assert (metrics.hits, metrics.misses, metrics.expired, metrics.evicted) == (2, 3, 2, 1)
+
+
+def test_disk_tier_survives_restarts(tmp_path):
+    cache = ToolCache(directory=str(tmp_path))
+    cache.set("list_files", {"root": "a"}, {"files": ["a.py"]}, ttl=60)
+    cache.set("get_image_file_by_path", {"path": "x.png"}, {"ok": True}, ttl=60)
+    cache.close()
+
+    restarted = ToolCache(directory=str(tmp_path))
+    assert restarted.get("list_files", {"root": "a"}).value == {"files": ["a.py"]}
+    assert restarted.get("list_files", {"root": "a"}) is not None
+    assert (restarted.metrics.hits, restarted.metrics.disk_hits) == (2, 1)
+    assert restarted.invalidate("get_image_file_by_path") == 0
+    assert restarted.get("get_image_file_by_path", {"path": "x.png"}) is None
+    restarted.close()
+
+
+def test_disk_tier_skips_large_results(tmp_path):
+    cache = ToolCache(directory=str(tmp_path), max_disk_value_bytes=1024)
+    cache.set("read_file", {"path": "a"}, "small", ttl=60)
+    cache.set("read_file", {"path": "b"}, "small", ttl=60)
+    cache.set("read_file", {"path": "b"}, "x" * 2048, ttl=60)
+    # Still in memory
+    assert cache.get("read_file", {"path": "b"}).value == "x" * 2048
+    cache.close()
+    assert cache.metrics.oversized == 1
+
+    restarted = ToolCache(directory=str(tmp_path), max_disk_value_bytes=1024)
+    assert restarted.get("read_file", {"path": "a"}).value == "small"
+    # The small result cached before was dropped rather than read back
+    assert restarted.get("read_file", {"path": "b"}) is None
+    restarted.close()
+
+
+@pytest.mark.asyncio
+async def test_executor_reuses_results_until_invalidated():
+    calls = []
+
+    def list_files(root: str = ".", max_results: int = 500) -> list[str]:
+        calls.append(root)
+        return [f"{root}/{len(calls)}"]
+
+    def write_file(path: str) -> bool:
+        return True
+
+    specs = {"list_files": ToolSpec(cache_ttl=60), "write_file": ToolSpec(invalidates=("list_files",))}
+    tools = {"list_files": list_files, "write_file": write_file}
+    async with ToolExecutor(tools, specs, cache=ToolCache()) as executor:
+        first = await executor.run("list_files", {"root": "src"})
+        # Restating a default makes the same call
+        assert await executor.run("list_files", {"root": "src", "max_results": 500}) == first
+        assert await executor.run("list_files", {"root": "src", "max_results": 5}) != first
+        await executor.run("write_file", {"path": "src/new.py"})
+        assert await executor.run("list_files", {"root": "src"}) != first
+
+    assert calls == ["src", "src", "src"]
+    assert executor.cache.metrics.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_stays_off_the_event_loop(tmp_path):
+    cache = ToolCache(directory=str(tmp_path))
+    loop_thread = threading.get_ident()
+    disk_threads = set()
+    disk_get = cache._disk.get
+
+    def recording_get(*args, **kwargs):
+        disk_threads.add(threading.get_ident())
+        return disk_get(*args, **kwargs)
+
+    cache._disk.get = recording_get
+    cache.set("list_files", {"root": "a"}, ["a.py"], ttl=60)
+    cache._memory.clear()
+    assert (await cache.aget("list_files", {"root": "a"})).value == ["a.py"]
+    assert await cache.aget("list_files", {"root": "b"}) is None
+    assert loop_thread not in disk_threads and len(disk_threads) == 1
+    cache.close()
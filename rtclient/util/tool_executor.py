@@ -0,0 +1,319 @@
+import asyncio
+import functools
+import inspect
+import json
+from collections.abc import Awaitable, Callable, Mapping
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Literal, Optional
+
+from rtclient.models import ServerEvent
+from rtclient.util.incremental_json import IncrementalJSONObject
+from rtclient.util.tool_cache import ToolCache
+
+# Where a sync tool runs, async tools are always awaited on the event loop.
+#   thread  - the thread pool, for tools that wait on files, processes or the network
+#   process - the process pool, for CPU bound tools; the tool, its arguments and result must pickle
+ToolPool = Literal["thread", "process"]
+
+
+@dataclass
+class ToolSpec:
+    # Seconds before the call fails with TimeoutError, None waits for as long as it takes
+    timeout: Optional[float] = 30
+    pool: ToolPool = "thread"
+    # Fields after which the call may start while its arguments still stream in, see ToolSpeculator.
+    # Only for tools without side effects, None waits for the complete arguments object.
+    speculate_on: Optional[tuple[str, ...]] = None
+    # Seconds a result is reused for the same arguments when the executor has a cache, None never reuses it
+    cache_ttl: Optional[float] = None
+    # Whether a cached result is out of date, given the arguments of the call and when it was cached
+    stale: Optional[Callable[[Mapping[str, Any], float], bool]] = None
+    # Tools whose cached results a call of this one drops, e.g. file listings after a write
+    invalidates: tuple[str, ...] = ()
+
+
+@dataclass
+class ToolMetrics:
+    calls: int = 0
+    failed: int = 0
+    timed_out: int = 0
+    cancelled: int = 0
+    running: int = 0
+    max_running: int = 0
+
+
+class ToolCancelledError(Exception):
+    """The call was cancelled with ToolExecutor.cancel."""
+
+
+def explicit_arguments(tool: Callable[..., Any], arguments: Mapping[str, Any]) -> dict[str, Any]:
+    """The arguments without those given as the tool's default, which call it the same way as leaving them out."""
+    try:
+        parameters = inspect.signature(tool).parameters.values()
+    except (TypeError, ValueError):
+        return dict(arguments)
+    defaults = {parameter.name: parameter.default for parameter in parameters if parameter.default is not parameter.empty}
+    return {key: value for key, value in arguments.items() if key not in defaults or defaults[key] != value}
+
+
+class ToolExecutor:
+    """Runs tool calls off the event loop, at most max_concurrency at a time.
+
+    Sync tools run in a thread or process pool as their ToolSpec says, async tools are awaited.
+    Calls are grouped, e.g. by response id, so those of an interrupted response can be cancelled
+    together. A sync tool that timed out or was cancelled keeps its worker until it returns, only
+    its result is dropped, so the pools are sized apart from max_concurrency. With a cache, the
+    results of tools with a cache_ttl are reused for calls with the same explicit arguments.
+    """
+
+    def __init__(
+        self,
+        tools: Mapping[str, Callable[..., Any]],
+        specs: Optional[Mapping[str, ToolSpec]] = None,
+        max_concurrency: int = 4,
+        thread_workers: Optional[int] = None,
+        process_workers: Optional[int] = None,
+        cache: Optional[ToolCache] = None,
+    ):
+        self.tools = tools
+        self.specs = specs or {}
+        self.cache = cache
+        self.metrics = ToolMetrics()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._thread_workers = thread_workers
+        self._process_workers = process_workers
+        self._pools: dict[ToolPool, Executor] = {}
+        self._calls: dict[asyncio.Task, Optional[str]] = {}
+        self._cancelled: set[asyncio.Task] = set()
+
+    def spec(self, name: str) -> ToolSpec:
+        return self.specs.get(name) or ToolSpec()
+
+    def _pool(self, pool: ToolPool) -> Executor:
+        if pool not in self._pools:
+            if pool == "process":
+                self._pools[pool] = ProcessPoolExecutor(self._process_workers)
+            else:
+                self._pools[pool] = ThreadPoolExecutor(self._thread_workers, thread_name_prefix="tool")
+        return self._pools[pool]
+
+    async def run(self, name: str, arguments: Mapping[str, Any], group: Optional[str] = None) -> Any:
+        """Call the tool and return its result.
+
+        Raises KeyError for an unknown tool, TimeoutError when the tool's timeout passes,
+        ToolCancelledError when the call is cancelled and whatever the tool raises.
+        """
+        tool = self.tools[name]
+        spec = self.spec(name)
+        metrics = self.metrics
+        metrics.calls += 1
+        cache = self.cache if spec.cache_ttl is not None else None
+        if cache is not None:
+            key = explicit_arguments(tool, arguments)
+            stale = functools.partial(spec.stale, arguments) if spec.stale is not None else None
+            cached = await cache.aget(name, key, stale)
+            if cached is not None:
+                return cached.value
+        call = asyncio.ensure_future(self._call(name, tool, arguments))
+        self._calls[call] = group
+        try:
+            result = await call
+        except asyncio.CancelledError:
+            if call not in self._cancelled:
+                raise
+            metrics.cancelled += 1
+            raise ToolCancelledError(f"Call of {name} was cancelled") from None
+        except TimeoutError:
+            metrics.timed_out += 1
+            raise
+        except Exception:
+            metrics.failed += 1
+            raise
+        finally:
+            del self._calls[call]
+            self._cancelled.discard(call)
+        if cache is not None:
+            cache.set(name, key, result, spec.cache_ttl)
+        if self.cache is not None:
+            for other in spec.invalidates:
+                self.cache.invalidate(other)
+        return result
+
+    async def _call(self, name: str, tool: Callable[..., Any], arguments: Mapping[str, Any]) -> Any:
+        spec = self.spec(name)
+        async with self._semaphore:
+            metrics = self.metrics
+            metrics.running += 1
+            metrics.max_running = max(metrics.max_running, metrics.running)
+            try:
+                if inspect.iscoroutinefunction(tool):
+                    work = tool(**arguments)
+                else:
+                    loop = asyncio.get_running_loop()
+                    work = loop.run_in_executor(self._pool(spec.pool), functools.partial(tool, **arguments))
+                try:
+                    return await asyncio.wait_for(work, spec.timeout)
+                except asyncio.TimeoutError:
+                    raise TimeoutError(f"{name} did not return within {spec.timeout}s") from None
+            finally:
+                metrics.running -= 1
+
+    def cancel(self, group: Optional[str] = None) -> int:
+        """Cancel the running calls of group, or all of them, returns how many were cancelled."""
+        cancelled = 0
+        for call, call_group in self._calls.items():
+            if (group is None or call_group == group) and not call.done():
+                self._cancelled.add(call)
+                call.cancel()
+                cancelled += 1
+        return cancelled
+
+    def shutdown(self):
+        self.cancel()
+        for pool in self._pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        self._pools.clear()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.shutdown()
+
+
+class ToolCallBatcher:
+    """Completes the function calls of each response with a single response.create.
+
+    Each call is added as a coroutine that runs the tool and sends its output, returning False
+    when no response should follow it, e.g. because it was cancelled. The calls of a response
+    run in parallel, once the response is done and all of them have finished respond is called
+    once, unless one of them returned False or raised.
+    """
+
+    def __init__(self, respond: Callable[[], Awaitable[None]]):
+        self.respond = respond
+        self.responses_created = 0
+        self._calls: dict[str, list[asyncio.Task[bool]]] = {}
+        # Every task started, kept until it finishes
+        self._tasks: set[asyncio.Task] = set()
+
+    def _start(self, work: Awaitable) -> asyncio.Task:
+        task = asyncio.ensure_future(work)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def add(self, response_id: str, call: Awaitable[bool]) -> asyncio.Task[bool]:
+        task = self._start(call)
+        self._calls.setdefault(response_id, []).append(task)
+        return task
+
+    def response_done(self, response_id: str) -> Optional[asyncio.Task]:
+        """Respond once the calls of the response finish, None when it made no calls."""
+        calls = self._calls.pop(response_id, None)
+        if not calls:
+            return None
+        return self._start(self._complete(calls))
+
+    async def _complete(self, calls: list[asyncio.Task[bool]]):
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        if all(result is True for result in results):
+            self.responses_created += 1
+            await self.respond()
+
+
+@dataclass
+class SpeculationMetrics:
+    started: int = 0
+    used: int = 0
+    discarded: int = 0
+
+
+class _Speculation:
+    __slots__ = ("name", "response_id", "parser", "arguments", "task")
+
+    def __init__(self, name: str, response_id: str, parser: IncrementalJSONObject):
+        self.name = name
+        self.response_id = response_id
+        self.parser: Optional[IncrementalJSONObject] = parser
+        self.arguments: dict[str, Any] = {}
+        self.task: Optional[asyncio.Task] = None
+
+
+def _retrieve(task: asyncio.Task):
+    # A discarded speculative call's error is never awaited
+    if not task.cancelled():
+        task.exception()
+
+
+class ToolSpeculator:
+    """Starts tool calls from their streaming arguments, ahead of response.function_call_arguments.done.
+
+    Every server event is passed to observe. A call starts once its arguments object is complete,
+    or for a tool whose ToolSpec has speculate_on, once those fields are known, with the fields
+    known at that point. result checks the early call against the final arguments: it is used
+    when it calls the tool the same way, otherwise it is dropped and the tool runs again.
+    """
+
+    def __init__(self, executor: ToolExecutor, loads: Callable[[str], Any] = json.loads):
+        self.executor = executor
+        self.loads = loads
+        self.metrics = SpeculationMetrics()
+        self._calls: dict[str, _Speculation] = {}
+
+    def observe(self, message: ServerEvent):
+        match message.type:
+            case "response.output_item.added":
+                item = message.item
+                if item.type == "function_call" and item.name in self.executor.tools:
+                    self._calls[item.id] = _Speculation(item.name, message.response_id, IncrementalJSONObject(self.loads))
+            case "response.function_call_arguments.delta":
+                speculation = self._calls.get(message.item_id)
+                if speculation is not None and speculation.parser is not None:
+                    self._advance(speculation, message.delta)
+            case "response.done":
+                # Calls whose arguments never completed
+                for item_id, speculation in list(self._calls.items()):
+                    if speculation.response_id == message.response.id:
+                        self._discard(self._calls.pop(item_id))
+
+    def _advance(self, speculation: _Speculation, delta: str):
+        parser = speculation.parser
+        try:
+            parser.feed(delta)
+        except ValueError:
+            speculation.parser = None
+            return
+        speculate_on = self.executor.spec(speculation.name).speculate_on
+        if parser.complete or (speculate_on is not None and all(key in parser.fields for key in speculate_on)):
+            speculation.parser = None
+            speculation.arguments = dict(parser.fields)
+            task = asyncio.ensure_future(
+                self.executor.run(speculation.name, speculation.arguments, group=speculation.response_id)
+            )
+            task.add_done_callback(_retrieve)
+            speculation.task = task
+            self.metrics.started += 1
+
+    def _discard(self, speculation: _Speculation):
+        if speculation.task is not None:
+            speculation.task.cancel()
+            self.metrics.discarded += 1
+
+    def result(self, message: ServerEvent) -> Awaitable[Any]:
+        """The result of the call whose arguments are done, from its early start when that is still valid.
+
+        The call is taken over right away, await the result from anywhere.
+        """
+        return self._result(message, self._calls.pop(message.item_id, None))
+
+    async def _result(self, message: ServerEvent, speculation: Optional[_Speculation]) -> Any:
+        arguments = self.loads(message.arguments) if message.arguments else {}
+        if speculation is not None and speculation.task is not None:
+            tool = self.executor.tools[message.name]
+            if explicit_arguments(tool, speculation.arguments) == explicit_arguments(tool, arguments):
+                self.metrics.used += 1
+                return await speculation.task
+            self._discard(speculation)
+        return await self.executor.run(message.name, arguments, group=message.response_id)
@@ -0,0 +1,146 @@
+import asyncio
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from mock_server import MockFunctionCall, MockRealtimeServer, MockResponse
+from tool_executor import ToolCallBatcher, ToolCancelledError, ToolExecutor, ToolSpec, ToolSpeculator
+
+from rtclient import RTLowLevelClient
+
+
+def block(seconds: float, release: threading.Event) -> str:
+    release.wait(seconds)
+    return threading.current_thread().name
+
+
+async def wait(seconds: float) -> float:
+    await asyncio.sleep(seconds)
+    return seconds
+
+
+@pytest.mark.asyncio
+async def test_sync_tools_run_off_the_loop_within_the_concurrency_limit():
+    release = threading.Event()
+    async with ToolExecutor({"block": block}, max_concurrency=2) as executor:
+        calls = [asyncio.create_task(executor.run("block", {"seconds": 5, "release": release})) for _ in range(3)]
+        # The loop keeps running while the tools block their threads
+        started = time.monotonic()
+        await asyncio.sleep(0.05)
+        assert time.monotonic() - started < 1
+        assert executor.metrics.running == 2
+        release.set()
+        names = await asyncio.gather(*calls)
+
+    assert all(name.startswith("tool") for name in names)
+    assert executor.metrics.max_running == 2
+    assert executor.metrics.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_timeouts_and_cancellation_by_group():
+    specs = {"wait": ToolSpec(timeout=0.05)}
+    async with ToolExecutor({"wait": wait, "pow": pow}, specs) as executor:
+        assert await executor.run("wait", {"seconds": 0}) == 0
+        with pytest.raises(TimeoutError):
+            await executor.run("wait", {"seconds": 1})
+
+        executor.specs = {}
+        first = asyncio.create_task(executor.run("wait", {"seconds": 0.2}, group="resp_1"))
+        second = asyncio.create_task(executor.run("wait", {"seconds": 0.2}, group="resp_2"))
+        await asyncio.sleep(0)
+        assert executor.cancel("resp_1") == 1
+        with pytest.raises(ToolCancelledError):
+            await first
+        assert await second == 0.2
+
+        executor.specs = {"pow": ToolSpec(pool="process")}
+        assert await executor.run("pow", {"base": 2, "exp": 10}) == 1024
+
+    metrics = executor.metrics
+    assert (metrics.calls, metrics.timed_out, metrics.cancelled, metrics.failed) == (5, 1, 1, 0)
+
+
+@pytest.mark.asyncio
+async def test_batcher_responds_once_after_all_calls_of_a_response():
+    responses = []
+    outputs = []
+
+    async def respond():
+        responses.append(len(outputs))
+
+    async def call(seconds: float, wanted: bool = True) -> bool:
+        await asyncio.sleep(seconds)
+        outputs.append(seconds)
+        return wanted
+
+    batcher = ToolCallBatcher(respond)
+    for seconds in (0.03, 0.01, 0.02):
+        batcher.add("resp_1", call(seconds))
+    batcher.add("resp_2", call(0, wanted=False))
+    assert batcher.response_done("resp_3") is None
+    await asyncio.sleep(0.015)
+    # The response ends while two calls are still running
+    done = batcher.response_done("resp_1")
+    skipped = batcher.response_done("resp_2")
+    await asyncio.gather(done, skipped)
+
+    assert responses == [4]
+    assert batcher.responses_created == 1
+
+
+@pytest.mark.asyncio
+async def test_speculator_starts_early_and_validates_against_final_arguments(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    started = []
+
+    async def get_time(timezone: str, verbose: bool = False) -> str:
+        started.append((timezone, verbose))
+        return f"{timezone} {verbose}"
+
+    calls = [
+        # The trailing default doesn't change the call, the early start is used
+        MockFunctionCall("get_time", '{"timezone": "UTC", "verbose": false}', delta_ms=5),
+        # This one does, the tool runs again with the final arguments
+        MockFunctionCall("get_time", '{"timezone": "UTC", "verbose": true}', delta_ms=5),
+    ]
+    specs = {"get_time": ToolSpec(speculate_on=("timezone",))}
+    async with MockRealtimeServer([MockResponse(transcript="", audio_ms=0, function_calls=calls)], speed=0) as server:
+        async with RTLowLevelClient(url=server.url) as client, ToolExecutor({"get_time": get_time}, specs) as executor:
+            speculator = ToolSpeculator(executor)
+            await client.send_response_create()
+            results = []
+            while True:
+                message = await asyncio.wait_for(client.recv(), 5)
+                speculator.observe(message)
+                if message.type == "response.function_call_arguments.done":
+                    assert started[-1] == ("UTC", False)
+                    results.append(await speculator.result(message))
+                if message.type == "response.done":
+                    break
+
+    assert results == ["UTC False", "UTC True"]
+    assert started == [("UTC", False), ("UTC", False), ("UTC", True)]
+    assert (speculator.metrics.started, speculator.metrics.used, speculator.metrics.discarded) == (2, 1, 1)
+
+
+def test_speculator_drops_calls_whose_arguments_fail_to_decode():
+    class DecodeError(Exception):
+        pass
+
+    def loads(token: str):
+        if token == "tru":
+            raise DecodeError(token)
+        return json.loads(token)
+
+    def event(type: str, **data):
+        return SimpleNamespace(type=type, **data)
+
+    speculator = ToolSpeculator(ToolExecutor({"get_time": lambda timezone: timezone}), loads)
+    item = SimpleNamespace(id="item_1", type="function_call", name="get_time")
+    speculator.observe(event("response.output_item.added", response_id="resp_1", item=item))
+    speculator.observe(event("response.function_call_arguments.delta", item_id="item_1", delta='{"timezone": tru,'))
+    speculator.observe(event("response.function_call_arguments.delta", item_id="item_1", delta='"x"}'))
+    assert speculator.metrics.started == 0